@@ -11,7 +11,14 @@ from .search.service import SearchService
 from .response.formatter import ResponseFormatter
 from .web.search_controller import SearchController
 from .web.admin_controller import AdminController
-from fastapi import FastAPI, Query, HTTPException, status, Depends
+from .web.chat_controller import ChatController
+from .web.session_store import SessionStore
+from .chatbot_client import ChatbotClient, ChatbotConfig
+from .llm.history import ConversationHistory
+from fastapi import FastAPI, Query, HTTPException, status, Depends, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import iterate_in_threadpool
+from typing import Any
 import os
 from load_events_from_csv import import_events_from_csv
 from fastapi.middleware.cors import CORSMiddleware
@@ -19,6 +26,15 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 
+class ChatRequest(BaseModel):
+    """One chat message; filters and profile, if given, replace the session's."""
+
+    message: str = Field(..., min_length=1)
+    session_id: str | None = None
+    filters: dict[str, Any] | None = None
+    profile: dict[str, Any] | None = None
+
+
 class Application:
     """Composition root; wires dependencies and exposes controllers."""
 
@@ -27,9 +43,9 @@ class Application:
         self.config = config
         self.telemetry = telemetry
         # Wire repositories, services, policies, controllers, telemetry, config
-        self.catalog_repo = CatalogRepository()
-        self.relevance_policy = RelevancePolicy()
-        self.search_service = SearchService(self.catalog_repo, self.relevance_policy)
+        self.catalog_repo = CatalogRepository(telemetry=self.telemetry)
+        self.relevance_policy = RelevancePolicy(repository=self.catalog_repo)
+        self.search_service = SearchService(self.catalog_repo, self.relevance_policy, self.telemetry)
         self.response_formatter = ResponseFormatter()
         from .ingestion.normalizer import Normalizer
         from .ingestion.deduper import Deduper
@@ -42,6 +58,21 @@ class Application:
         self.admin_controller_inst = AdminController(
             self.ingestion_service, self.telemetry
         )
+        # Chat needs the LLM backend; without an API key only search and admin are served
+        self.chat_controller_inst = None
+        if config.is_openai_enabled:
+            sessions = SessionStore(
+                ttl=config.chat_session_ttl,
+                path=config.chat_session_path,
+                new_history=lambda: ConversationHistory(
+                    keep_turns=config.llm_history_turns, token_budget=config.llm_prompt_tokens
+                ),
+                telemetry=self.telemetry,
+            )
+            self.chat_controller_inst = ChatController(
+                ChatbotClient(ChatbotConfig(config), telemetry=self.telemetry),
+                sessions, self.catalog_repo, config, self.telemetry,
+            )
 
     @classmethod
     def build_default(cls) -> "Application":
@@ -58,6 +89,10 @@ class Application:
         """Return the admin controller."""
         return self.admin_controller_inst
 
+    def chat_controller(self) -> ChatController | None:
+        """Return the chat controller, or None if no LLM backend is configured."""
+        return self.chat_controller_inst
+
 
 def create_app() -> FastAPI:
     """Create and configure FastAPI app, wiring controllers to endpoints."""
@@ -79,6 +114,9 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    def is_admin(password: str | None) -> bool:
+        return password is not None and password == os.environ.get("CSV_IMPORT_PASSWORD", "import123")
+
     application = Application.build_default()
     search_controller = application.search_controller()
     admin_controller = application.admin_controller()
@@ -90,23 +128,90 @@ def create_app() -> FastAPI:
         date_to: str = Query(None),
         city: str = Query(None),
         region: str = Query(None),
+        region_radius: float = Query(None, ge=0, description="Also include regions within this many km of region"),
+        profile: bool = Query(False, description="Include per-stage timings (admin only)"),
+        password: str = Query(None, description="Admin password, required with profile"),
     ):
         """Search for events."""
+        if profile and not is_admin(password):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Profiling requires the admin password"
+            )
         filters = {
             "date_from": date_from,
             "date_to": date_to,
             "city": city,
             "region": region,
+            "region_radius": region_radius,
         }
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
-        result = search_controller.handle_search(query_text, **filters)
+        result = search_controller.handle_search(query_text, profile=profile, **filters)
         return JSONResponse(content=result)
 
+    @app.get("/suggest")
+    def suggest(
+        prefix: str = Query(..., min_length=1, description="Typed prefix"),
+        limit: int = Query(8, ge=1, le=20),
+    ):
+        """Autocomplete event names, organizers, venues and dance styles."""
+        return JSONResponse(content=search_controller.handle_suggest(prefix, limit))
+
+    @app.get("/events/{event_id}/similar")
+    def similar_events(event_id: str, limit: int = Query(10, ge=1, le=20)):
+        """Upcoming events most similar to the given one."""
+        result = search_controller.handle_similar(event_id, limit)
+        if result is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+        return JSONResponse(content=result)
+
+    def require_chat() -> ChatController:
+        controller = application.chat_controller()
+        if controller is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Chat is not configured (OPENAI_API_KEY is missing)"
+            )
+        return controller
+
+    @app.post("/chat")
+    def chat(request: ChatRequest, controller: ChatController = Depends(require_chat)):
+        """Answer one chat message within a server-side session (a new one without session_id)."""
+        result = controller.handle_chat(request.message, request.session_id, request.filters, request.profile)
+        return JSONResponse(content=result)
+
+    @app.websocket("/ws/chat")
+    async def chat_stream(websocket: WebSocket):
+        """Stream the answers to chat messages sent as JSON ChatRequests (see ChatController.stream_chat)."""
+        await websocket.accept()
+        controller = application.chat_controller()
+        if controller is None:
+            await websocket.send_json({"type": "error", "detail": "Chat is not configured (OPENAI_API_KEY is missing)"})
+            await websocket.close(code=1011)
+            return
+        try:
+            while True:
+                try:
+                    request = ChatRequest.model_validate(await websocket.receive_json())
+                except (ValidationError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                    continue
+                frames = controller.stream_chat(request.message, request.session_id, request.filters, request.profile)
+                try:
+                    # The chat path blocks on the LLM; run it off the event loop
+                    async for frame in iterate_in_threadpool(frames):
+                        await websocket.send_json(frame)
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                finally:
+                    frames.close()
+        except WebSocketDisconnect:
+            logger.info("[Chat] WebSocket client disconnected")
+
     # --- API ENDPOINT TO TRIGGER CSV IMPORT (with password auth) ---
     def check_password(password: str = Query(..., description="Admin password")):
-        default_pw = os.environ.get("CSV_IMPORT_PASSWORD", "import123")
-        if password != default_pw:
+        if not is_admin(password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
             )
@@ -120,6 +225,11 @@ def create_app() -> FastAPI:
             "errors": result["errors"]
         }
 
+    @app.get("/admin/status")
+    def admin_status():
+        """Return system status and in-process counters."""
+        return JSONResponse(content=admin_controller.status())
+
     @app.post("/admin/reingest")
     def reingest():
         """Trigger re-ingestion of all sources."""
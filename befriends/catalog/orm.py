@@ -1,6 +1,10 @@
 from sqlalchemy import (
     create_engine,
+    inspect,
+    text,
+    Boolean,
     Column,
+    Float,
     String,
     Date,
     DateTime,
@@ -9,6 +13,7 @@ from sqlalchemy import (
 )
 class StringList(TypeDecorator):
     impl = String
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is None:
@@ -34,15 +39,19 @@ class EventORM(Base):  # type: ignore[misc, valid-type]
     __tablename__ = "events"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     event_name = Column(String, nullable=False)
-    start_datetime = Column(DateTime, nullable=True)
+    start_datetime = Column(DateTime, nullable=True, index=True)
     end_datetime = Column(DateTime, nullable=True)
     recurrence_rule = Column(String, nullable=True)
     date_description = Column(String, nullable=True)
-    event_type = Column(String, nullable=True)
+    event_type = Column(String, nullable=True, index=True)
     dance_focus = Column(String, nullable=True)
     dance_style = Column(StringList, nullable=True)
     price_min = Column(String, nullable=True)
     price_max = Column(String, nullable=True)
+    # Prices in the reference currency of the FX rate table (see catalog.prices)
+    price_min_norm = Column(Float, nullable=True, index=True)
+    price_max_norm = Column(Float, nullable=True, index=True)
+    is_free = Column(Boolean, nullable=True, index=True)
     currency = Column(String, nullable=True)
     pricing_type = Column(String, nullable=True)
     price_category = Column(String, nullable=True)
@@ -55,11 +64,11 @@ class EventORM(Base):  # type: ignore[misc, valid-type]
     user_category = Column(String, nullable=True)
     event_location = Column(String, nullable=True)
     region = Column(String, nullable=True)
-    region_standardized = Column(String, nullable=True)
+    region_standardized = Column(String, nullable=True, index=True)
     season = Column(String, nullable=True)
     cross_border_potential = Column(String, nullable=True)
-    organizer = Column(String, nullable=True)
-    instagram = Column(String, nullable=True)
+    organizer = Column(String, nullable=True, index=True)
+    instagram = Column(String, nullable=True, index=True)
     event_link = Column(String, nullable=True)
     event_link_fit = Column(String, nullable=True)
     description = Column(Text, nullable=True)
@@ -72,6 +81,8 @@ class EventORM(Base):  # type: ignore[misc, valid-type]
     city = Column(String, nullable=True)
     latitude = Column(String, nullable=True)
     longitude = Column(String, nullable=True)
+    # Casefolded text of the SEARCH_FIELDS (see folded_search_text), matched by search_text.
+    search_folded = Column(Text, nullable=True)
 
     def to_domain(self) -> "Event":
         from datetime import datetime
@@ -175,9 +186,48 @@ class EventORM(Base):  # type: ignore[misc, valid-type]
         )
 
 
+# Fields free-text search matches, and the version of their folding stored in search_folded.
+SEARCH_FIELDS = (
+    "event_name", "event_type", "dance_style", "region_standardized", "event_location", "organizer", "instagram",
+)
+SEARCH_FOLD_VERSION = "casefold-1"
+
+
+def folded_search_text(row) -> str:
+    """The SEARCH_FIELDS of an ORM object, Event or row, casefolded like search queries are.
+
+    SQLite's lower()/LIKE only fold ASCII, so both sides are folded in Python.
+    Fields are separated by a control character so a pattern cannot span two.
+    """
+    values = []
+    for field in SEARCH_FIELDS:
+        value = getattr(row, field, None)
+        if isinstance(value, list):
+            value = ",".join(str(v) for v in value)
+        if value:
+            values.append(str(value).casefold())
+    return "\x1f".join(values)
+
+
+class CatalogMetaORM(Base):  # type: ignore[misc, valid-type]
+    """Key/value metadata about the catalog (e.g. the current generation token)."""
+    __tablename__ = "catalog_meta"
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=True)
+
+
 def get_engine_and_session(db_url: str = "sqlite:///events.db"):
     """Create SQLAlchemy engine and session factory."""
     engine = create_engine(db_url, echo=False, future=True)
     Base.metadata.create_all(engine)
+    # create_all skips tables that already exist; add columns and indexes introduced since.
+    existing = {c["name"] for c in inspect(engine).get_columns(EventORM.__tablename__)}
+    with engine.begin() as conn:
+        for column in EventORM.__table__.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {EventORM.__tablename__} ADD COLUMN {column.name} {column_type}"))
+    for index in EventORM.__table__.indexes:
+        index.create(engine, checkfirst=True)
     Session = sessionmaker(bind=engine, expire_on_commit=False)
     return engine, Session
@@ -0,0 +1,85 @@
+"""Currency normalisation of event prices for cross-border price filtering."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+FX_RATES_PATH = Path(__file__).resolve().parents[1] / "data" / "fx_rates.json"
+
+# price_category / pricing_type / currency values that mark an event as free.
+FREE_MARKERS = frozenset({"free", "kostenlos", "gratis", "eintritt frei", "gratuit", "entree libre"})
+# Currency implied by the country suffix of region_standardized when currency is missing.
+REGION_CURRENCIES = {"(CH)": "CHF", "(DE)": "EUR", "(FR)": "EUR"}
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class FxRates:
+    """Conversion rates into a reference currency (units of reference per unit)."""
+
+    reference: str
+    rates: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "FxRates":
+        """Read the local rate table (``BEFRIENDS_FX_RATES_PATH`` overrides the shipped one)."""
+        path = path or os.getenv("BEFRIENDS_FX_RATES_PATH") or FX_RATES_PATH
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+        return cls(
+            reference=table["reference"].upper(),
+            rates={currency.upper(): float(rate) for currency, rate in table["rates"].items()},
+        )
+
+    @property
+    def version(self) -> str:
+        """Fingerprint of the table; stored prices are re-normalised when it changes."""
+        payload = json.dumps([self.reference, sorted(self.rates.items())])
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    def currency_of(self, currency: str | None, region: str | None = None) -> str:
+        """Explicit currency, else the one implied by the region, else the reference."""
+        if currency and currency.strip() and currency.strip().upper() != "FREE":
+            return currency.strip().upper()
+        for suffix, implied in REGION_CURRENCIES.items():
+            if region and region.strip().endswith(suffix):
+                return implied
+        return self.reference
+
+    def convert(self, amount: Any, currency: str | None, region: str | None = None) -> float | None:
+        """amount in the reference currency; None if amount is missing or the currency unknown."""
+        value = _as_float(amount)
+        rate = self.rates.get(self.currency_of(currency, region))
+        if value is None or rate is None:
+            return None
+        return round(value * rate, 2)
+
+
+def is_free(price_category: str | None, pricing_type: str | None, currency: str | None) -> bool:
+    """Whether the source data explicitly marks the event as free of charge.
+
+    Missing prices are stored as 0, so a zero price alone does not count.
+    """
+    return any((value or "").strip().lower() in FREE_MARKERS for value in (price_category, pricing_type, currency))
+
+
+def normalized_prices(row: Any, rates: FxRates) -> dict[str, Any]:
+    """price_min_norm / price_max_norm / is_free for an ORM object, Event or row."""
+    currency = getattr(row, "currency", None)
+    region = getattr(row, "region_standardized", None)
+    return {
+        "price_min_norm": rates.convert(getattr(row, "price_min", None), currency, region),
+        "price_max_norm": rates.convert(getattr(row, "price_max", None), currency, region),
+        "is_free": is_free(getattr(row, "price_category", None), getattr(row, "pricing_type", None), currency),
+    }
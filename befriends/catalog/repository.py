@@ -3,9 +3,69 @@
 from __future__ import annotations
 
 
+import dataclasses
+import datetime
 import logging
+import random
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping
+from ..common.telemetry import Profile, Telemetry
 from ..domain.event import Event
-from .orm import EventORM, get_engine_and_session
+from ..domain.filters import EventFilter
+from ..search.planner import CatalogStatistics, FilterPlanner, Predicate, QueryPlan
+from ..search.regions import region_graph_for
+from ..search.trigram import TrigramIndex
+from .orm import SEARCH_FIELDS, SEARCH_FOLD_VERSION, CatalogMetaORM, EventORM, folded_search_text, get_engine_and_session
+from .prices import FxRates, normalized_prices
+
+# Indexes derived from a catalog are shared by every repository on the same
+# database in this process, keyed by (scope, name) and tagged with the
+# generation they were built from. _derived_lock only guards the registry;
+# builds run under the index's own lock, so a slow build of one index never
+# holds up lookups of another.
+_derived_lock = threading.RLock()
+_derived_indexes: dict[tuple[Any, str], tuple[str, Any, Any]] = {}
+_build_locks: dict[tuple[Any, str], threading.RLock] = {}
+
+Filters = EventFilter | Mapping[str, Any] | None
+
+
+def _detached(events: Iterable[Event]) -> list[Event]:
+    """Copies of events that share no mutable state (Event is frozen except for its dance_style list)."""
+    return [
+        dataclasses.replace(e, dance_style=list(e.dance_style)) if isinstance(e.dance_style, list) else e
+        for e in events
+    ]
+
+
+class _ResultCache:
+    """Bounded LRU map of search results; lives in the derived-index registry, so imports clear it.
+
+    Entries are detached copies on the way in and out, so no caller can
+    change what another one gets.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Any, tuple[Event, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> tuple[Event, ...] | None:
+        with self._lock:
+            events = self._entries.get(key)
+            if events is not None:
+                self._entries.move_to_end(key)
+        return None if events is None else tuple(_detached(events))
+
+    def put(self, key: Any, events: list[Event]) -> None:
+        events = _detached(events)
+        with self._lock:
+            self._entries[key] = tuple(events)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
 
 
 class CatalogRepository:
@@ -14,14 +74,33 @@ class CatalogRepository:
     def _get_logger(self):
         return logging.getLogger(self.__class__.__name__)
 
-    def __init__(self, db_url: str = "sqlite:///events.db"):
+    def __init__(
+        self,
+        db_url: str = "sqlite:///events.db",
+        fuzzy_min_results: int = 3,
+        telemetry: Telemetry | None = None,
+        planner: FilterPlanner | None = None,
+        fx_rates: FxRates | None = None,
+    ):
         self.engine, self.Session = get_engine_and_session(db_url)
+        self.fuzzy_min_results = fuzzy_min_results
+        self.telemetry = telemetry or Telemetry()
+        self.planner = planner or FilterPlanner()
+        self.fx_rates = fx_rates or FxRates.load()
+        # In-memory SQLite databases are private to their engine, so they cannot share indexes.
+        self._scope: Any = id(self) if self.engine.url.database in (None, "", ":memory:") else str(self.engine.url)
+        if self._meta("fx_rates") != self.fx_rates.version:
+            self.renormalize_prices()
+        if self._meta("search_fold") != SEARCH_FOLD_VERSION:
+            self.refold_search_text()
 
     def upsert(self, events: list[Event]) -> int:
         logger = self._get_logger()
         session = self.Session()
         count = 0
         try:
+            meta = session.get(CatalogMetaORM, "generation")
+            previous = meta.value if meta and meta.value else ""
             for event in events:
                 obj = session.get(EventORM, event.id) if event.id else None
                 if obj:
@@ -30,11 +109,18 @@ class CatalogRepository:
                         if field == "tags":
                             value = ",".join(value) if value else None
                         setattr(obj, field, value)
+                    for field, value in self._computed_columns(obj).items():
+                        setattr(obj, field, value)
                 else:
                     obj = EventORM.from_domain(event)
+                    for field, value in self._computed_columns(obj).items():
+                        setattr(obj, field, value)
                     session.merge(obj)
                 count += 1
+            generation = uuid.uuid4().hex
+            session.merge(CatalogMetaORM(key="generation", value=generation))
             session.commit()
+            self._update_derived(events, previous, generation)
             # Info log removed
         except Exception as e:
             logger.error(f"Error during upsert: {e}")
@@ -44,6 +130,10 @@ class CatalogRepository:
             session.close()
         return count
 
+    def _computed_columns(self, obj: EventORM) -> dict[str, Any]:
+        """Columns derived from an event's own fields: normalized prices and the folded search text."""
+        return {**normalized_prices(obj, self.fx_rates), "search_folded": folded_search_text(obj)}
+
     def list_recent(self, limit: int = 50) -> list[Event]:
         logger = self._get_logger()
         session = self.Session()
@@ -76,79 +166,47 @@ class CatalogRepository:
         finally:
             session.close()
 
-    def search_text(self, text: str, filters: dict | None = None) -> list[Event]:
+    def search_text(self, text: str, filters: Filters = None, profile: Profile | None = None) -> list[Event]:
+        """Upcoming events matching text and filters, soonest first.
+
+        Results are memoized per catalog generation and day, keyed by the text,
+        the canonical filter and the settings that shape the result; profiled
+        searches always run.
+        """
+        filters = EventFilter.of(filters)
+        if profile is not None:
+            return self._search_text(text, filters, profile)
+        key = (text or "", filters, self.planner, self.fuzzy_min_results, datetime.date.today())
+        cache = self.derived_index("search_results", _ResultCache)
+        cached = cache.get(key)
+        self.telemetry.increment("search_cache.hit" if cached is not None else "search_cache.miss")
+        if cached is None:
+            events = self._search_text(text, filters)
+            cache.put(key, events)
+            return events
+        return list(cached)
+
+    def _search_text(self, text: str, filters: EventFilter, profile: Profile | None = None) -> list[Event]:
         logger = self._get_logger()
-        from sqlalchemy import or_, cast, Float
         session = self.Session()
         try:
             logger.info(f"[DEBUG] search_text called with text='{text}' and filters={filters}")
             q = session.query(EventORM)
             if text:
-                pattern = f"%{text}%"
-                q = q.filter(
-                    or_(
-                        EventORM.event_name.ilike(pattern),
-                        EventORM.event_type.ilike(pattern),
-                        EventORM.dance_style.ilike(pattern),
-                        EventORM.region_standardized.ilike(pattern),
-                        EventORM.event_location.ilike(pattern),
-                        EventORM.organizer.ilike(pattern),
-                        EventORM.instagram.ilike(pattern),
-                    )
-                )
+                # Casefolded on both sides; SQLite would only fold ASCII
+                q = q.filter(EventORM.search_folded.like(f"%{text.casefold()}%"))
             logger.info(f"[DEBUG] search_text SQL after text filter: {str(q)}")
-            if filters:
-                logger.info(f"[DEBUG] search_text applying filters: {filters}")
-                region_val = filters.get("region_standardized")
-                # Only filter by region if not 'All' and not empty
-                if region_val and region_val != "All":
-                    q = q.filter(EventORM.region_standardized == region_val)
-                    logger.info(f"[DEBUG] search_text filter region_standardized={region_val}")
-                if filters.get("event_type"):
-                    q = q.filter(EventORM.event_type == filters["event_type"])
-                    logger.info(f"[DEBUG] search_text filter event_type={filters['event_type']}")
-                # Map date_from/date_to to strict date filtering if both are present and equal
-                if filters.get("date_from") and filters.get("date_to") and filters["date_from"] == filters["date_to"]:
-                    from sqlalchemy import func
-                    q = q.filter(func.date(EventORM.start_datetime) == filters["date_from"])
-                    logger.info(f"[DEBUG] search_text filter date_from=date_to={filters['date_from']}")
-                else:
-                    if filters.get("date_from"):
-                        q = q.filter(EventORM.start_datetime >= filters["date_from"])
-                        logger.info(f"[DEBUG] search_text filter date_from>={filters['date_from']}")
-                    if filters.get("date_to"):
-                        q = q.filter(EventORM.start_datetime <= filters["date_to"])
-                        logger.info(f"[DEBUG] search_text filter date_to<={filters['date_to']}")
-                if filters.get("start_datetime_from"):
-                    q = q.filter(EventORM.start_datetime >= filters["start_datetime_from"])
-                    logger.info(f"[DEBUG] search_text filter start_datetime_from>={filters['start_datetime_from']}")
-                if filters.get("start_datetime_to"):
-                    q = q.filter(EventORM.start_datetime <= filters["start_datetime_to"])
-                    logger.info(f"[DEBUG] search_text filter start_datetime_to<={filters['start_datetime_to']}")
-                if filters.get("price_min"):
-                    q = q.filter(cast(EventORM.price_min, Float) >= filters["price_min"])
-                    logger.info(f"[DEBUG] search_text filter price_min>={filters['price_min']}")
-                if filters.get("price_max"):
-                    q = q.filter(cast(EventORM.price_max, Float) <= filters["price_max"])
-                    logger.info(f"[DEBUG] search_text filter price_max<={filters['price_max']}")
-                if filters.get("dance_style"):
-                    q = q.filter(EventORM.dance_style == filters["dance_style"])
-                    logger.info(f"[DEBUG] search_text filter dance_style={filters['dance_style']}")
-                if filters.get("organizer"):
-                    q = q.filter(EventORM.organizer == filters["organizer"])
-                    logger.info(f"[DEBUG] search_text filter organizer={filters['organizer']}")
-                if filters.get("instagram"):
-                    q = q.filter(EventORM.instagram == filters["instagram"])
-                    logger.info(f"[DEBUG] search_text filter instagram={filters['instagram']}")
-            # Exclude past events by default (start_datetime >= today, date only)
-            import datetime
-            from sqlalchemy import func
-            today_date = datetime.date.today()
-            q = q.filter(func.date(EventORM.start_datetime) >= today_date)
-            # Order by ascending start_datetime (upcoming first)
-            q = q.order_by(EventORM.start_datetime.asc())
+            with self.telemetry.time_block("plan", profile):
+                q = self._apply_filters(q, filters, profile)
             logger.info(f"[DEBUG] search_text final SQL: {str(q)}")
-            events = [e.to_domain() for e in q.all()]
+            with self.telemetry.time_block("sql", profile):
+                rows = q.all()
+            with self.telemetry.time_block("hydration", profile):
+                events = [e.to_domain() for e in rows]
+            if profile is not None:
+                profile.count("rows", len(rows))
+            if text and len(events) < self.fuzzy_min_results:
+                events += self._fuzzy_search(text, filters, exclude={e.id for e in events}, profile=profile)
             logger.info(f"[DEBUG] search_text returned {len(events)} events")
             for ev in events:
                 logger.info(f"[DEBUG] Event: name={getattr(ev, 'event_name', None)}, city={getattr(ev, 'city', None)}, region_standardized={getattr(ev, 'region_standardized', None)}, organizer={getattr(ev, 'organizer', None)}")
@@ -162,6 +220,363 @@ class CatalogRepository:
         finally:
             session.close()
 
+    def exists(self, filters: Filters = None) -> bool:
+        """Whether any upcoming event passes filters, as one EXISTS query that loads no rows."""
+        logger = self._get_logger()
+        session = self.Session()
+        try:
+            q = self._apply_filters(session.query(EventORM.id), filters).order_by(None)
+            return bool(session.query(q.exists()).scalar())
+        except Exception as e:
+            logger.error(f"Error during exists: {e}")
+            raise
+        finally:
+            session.close()
+
+    def _apply_filters(self, q, filters: Filters, profile: Profile | None = None):
+        """Apply structured filters, the upcoming-only cut-off and date ordering to a query.
+
+        The filters are planned first: predicates are added most selective
+        first, and only the plan's driving predicate is left eligible for a
+        SQL index (see ``plan_filters``).
+        """
+        logger = self._get_logger()
+        from sqlalchemy import func
+        filters = EventFilter.of(filters)
+        if filters:
+            logger.info(f"[DEBUG] search_text applying filters: {filters.as_dict()}")
+            predicates = self._predicates(filters)
+            if predicates:
+                plan = self.plan_filters(predicates, profile)
+                if plan.strategy == "memory":
+                    q = q.filter(EventORM.id.in_(plan.ids or ()))
+                for predicate in plan.order:
+                    indexed = plan.strategy == "index" and predicate == plan.driving
+                    q = q.filter(self._clause(predicate, indexed))
+                    logger.info(f"[DEBUG] search_text filter {predicate.column} {predicate.op} {predicate.value}")
+        # Exclude past events by default (start_datetime >= today, date only)
+        today_date = datetime.date.today()
+        q = q.filter(func.date(EventORM.start_datetime) >= today_date)
+        # Order by ascending start_datetime (upcoming first)
+        return q.order_by(EventORM.start_datetime.asc())
+
+    def _predicates(self, filters: EventFilter) -> list[Predicate]:
+        """Translate a canonical filter into planner predicates."""
+        predicates = []
+        if filters.region:
+            if filters.region_radius:
+                # Nearby regions within the radius (km), resolved in one IN (...) predicate.
+                nearby = region_graph_for(self).within(filters.region, filters.region_radius)
+                predicates.append(Predicate("region_standardized", "in", tuple(nearby)))
+            else:
+                predicates.append(Predicate("region_standardized", "eq", filters.region))
+        if filters.event_type:
+            predicates.append(Predicate("event_type", "eq", filters.event_type))
+        # Map date_from/date_to to strict date filtering if both are present and equal
+        if filters.date_from and filters.date_from == filters.date_to:
+            predicates.append(Predicate("start_datetime", "day", filters.date_from))
+        else:
+            if filters.date_from:
+                predicates.append(Predicate("start_datetime", "ge", filters.date_from))
+            if filters.date_to:
+                predicates.append(Predicate("start_datetime", "le", filters.date_to))
+        # Price bounds are in the reference currency of the FX rate table.
+        if filters.price_min:
+            predicates.append(Predicate("price_min_norm", "ge", filters.price_min))
+        if filters.price_max:
+            predicates.append(Predicate("price_max_norm", "le", filters.price_max))
+        if filters.is_free:
+            predicates.append(Predicate("is_free", "eq", True))
+        if filters.dance_style:
+            predicates.append(Predicate("dance_style", "eq", list(filters.dance_style)))
+        for column in ("organizer", "instagram"):
+            if getattr(filters, column):
+                predicates.append(Predicate(column, "eq", getattr(filters, column)))
+        return predicates
+
+    @staticmethod
+    def _clause(predicate: Predicate, indexed: bool):
+        """SQL clause for a predicate; unless indexed, SQLite is kept from using an index for it."""
+        from sqlalchemy import func
+        from sqlalchemy.sql import operators
+        from sqlalchemy.sql.expression import UnaryExpression
+        column = getattr(EventORM, predicate.column)
+        if not indexed:
+            # Unary "+" is a no-op on the value but disqualifies the term from index use.
+            column = UnaryExpression(column, operator=operators.custom_op("+"), type_=column.type)
+        if predicate.op == "day":
+            return func.date(column) == predicate.value
+        if predicate.op == "ge":
+            return column >= predicate.value
+        if predicate.op == "le":
+            return column <= predicate.value
+        if predicate.op == "in":
+            return column.in_(predicate.value)
+        return column == predicate.value
+
+    def plan_filters(self, predicates: list[Predicate], profile: Profile | None = None) -> QueryPlan:
+        """Plan predicates against the catalog statistics and log the choice through telemetry."""
+        stats = self.statistics(profile)
+        plan = self.planner.plan(stats, predicates)
+        self.telemetry.increment(f"planner.{plan.strategy}")
+        self.telemetry.record_event(
+            "query_plan",
+            strategy=plan.strategy,
+            order=[f"{p.column} {p.op}" for p in plan.order],
+            driving=plan.driving.column if plan.driving else None,
+            estimated_rows=round(plan.estimated_rows, 1),
+            catalog_rows=stats.n_rows,
+        )
+        return plan
+
+    def statistics(self, profile: Profile | None = None) -> CatalogStatistics:
+        """Return planner statistics over upcoming events, rebuilt on generation or day change."""
+        stats = self.derived_index("planner_stats", self._build_statistics, profile=profile)
+        if stats.built_on != datetime.date.today():
+            self.invalidate_derived("planner_stats")
+            stats = self.derived_index("planner_stats", self._build_statistics, profile=profile)
+        return stats
+
+    def _build_statistics(self) -> CatalogStatistics:
+        from sqlalchemy import func
+        today = datetime.date.today()
+        columns = ("id", *CatalogStatistics.EQUALITY_COLUMNS, *CatalogStatistics.RANGE_COLUMNS)
+        session = self.Session()
+        try:
+            rows = session.query(*(getattr(EventORM, c) for c in columns)).filter(
+                func.date(EventORM.start_datetime) >= today
+            )
+            return CatalogStatistics.collect((row._asdict() for row in rows), built_on=today)
+        finally:
+            session.close()
+
+    def find_by_ids(
+        self, event_ids: list[str], filters: Filters = None, profile: Profile | None = None
+    ) -> list[Event]:
+        """Return the upcoming events among event_ids that pass filters, in the given order."""
+        logger = self._get_logger()
+        if not event_ids:
+            return []
+        session = self.Session()
+        try:
+            q = session.query(EventORM).filter(EventORM.id.in_(list(event_ids)))
+            with self.telemetry.time_block("plan", profile):
+                q = self._apply_filters(q, filters, profile)
+            with self.telemetry.time_block("sql", profile):
+                rows = q.all()
+            with self.telemetry.time_block("hydration", profile):
+                by_id = {obj.id: obj.to_domain() for obj in rows}
+            if profile is not None:
+                profile.count("rows", len(rows))
+            return [by_id[event_id] for event_id in event_ids if event_id in by_id]
+        except Exception as e:
+            logger.error(f"Error during find_by_ids: {e}")
+            raise
+        finally:
+            session.close()
+
+    def sample(self, filters: Filters = None, k: int = 1, rng: random.Random | None = None) -> list[Event]:
+        """Return up to k uniformly random upcoming events that pass filters.
+
+        Candidates are drawn from the planner's in-memory id arrays: the
+        smallest exact id list of an equality filter, else all upcoming ids.
+        A random subset sized for the estimated match rate is checked against
+        the filters by primary key; the subset grows only if too few match, so
+        the cost is O(k / selectivity) rather than a sort of the whole table.
+        """
+        logger = self._get_logger()
+        rng = rng or random.Random()
+        if k <= 0:
+            return []
+        try:
+            stats = self.statistics()
+            filters = EventFilter.of(filters)
+            predicates = self._predicates(filters)
+            pool: list[str] = stats.ids
+            source = None
+            for predicate in predicates:
+                ids = stats.matching_ids(predicate)
+                if ids is not None and len(ids) < len(pool):
+                    pool, source = ids, predicate
+            if not pool:
+                return []
+            # Expected share of the pool passing the other filters (independence
+            # assumption), padded for estimation error.
+            rate = 1.0
+            for predicate in predicates:
+                if predicate is not source:
+                    rate *= stats.selectivity(predicate)
+            size = min(len(pool), max(2 * k, int(1.5 * k / max(rate, 1e-3))))
+            while True:
+                candidates = rng.sample(pool, size)
+                events = self.find_by_ids(candidates, filters)
+                if len(events) >= k or size == len(pool):
+                    return events[:k]
+                size = min(len(pool), size * 4)
+        except Exception as e:
+            logger.error(f"Error during sample: {e}")
+            raise
+
+    def _fuzzy_search(
+        self, text: str, filters: EventFilter, exclude: set, profile: Profile | None = None
+    ) -> list[Event]:
+        """Typo-tolerant fallback: trigram candidates re-checked against the SQL filters."""
+        logger = self._get_logger()
+        with self.telemetry.time_block("fuzzy", profile):
+            index = self.derived_index("trigram", self._build_trigram_index, profile=profile)
+            matches = [event_id for event_id, _ in index.search(text, limit=50) if event_id not in exclude]
+        events = self.find_by_ids(matches, filters, profile)
+        logger.info(f"[DEBUG] search_text fuzzy fallback for '{text}' added {len(events)} events")
+        return events
+
+    def _build_trigram_index(self) -> TrigramIndex:
+        session = self.Session()
+        try:
+            rows = session.query(EventORM.id, *(getattr(EventORM, f) for f in TrigramIndex.FIELDS))
+            return TrigramIndex.build(rows)
+        finally:
+            session.close()
+
+    def renormalize_prices(self) -> int:
+        """Recompute the reference-currency prices and free flags of every event in bulk.
+
+        Runs automatically when the FX rate table differs from the one the
+        stored prices were computed with; returns the number of events updated.
+        """
+        logger = self._get_logger()
+        from sqlalchemy import update
+        columns = ("price_min", "price_max", "currency", "region_standardized", "price_category", "pricing_type")
+        session = self.Session()
+        try:
+            meta = session.get(CatalogMetaORM, "generation")
+            previous = meta.value if meta and meta.value else ""
+            rows = session.query(EventORM.id, *(getattr(EventORM, c) for c in columns)).all()
+            values = [{"id": row.id, **normalized_prices(row, self.fx_rates)} for row in rows]
+            if values:
+                session.execute(update(EventORM), values)
+            generation = uuid.uuid4().hex
+            session.merge(CatalogMetaORM(key="fx_rates", value=self.fx_rates.version))
+            session.merge(CatalogMetaORM(key="generation", value=generation))
+            session.commit()
+            logger.info(f"Normalized prices of {len(values)} events to {self.fx_rates.reference}")
+        except Exception as e:
+            logger.error(f"Error during renormalize_prices: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        # No event content changed: patchable indexes carry over, the planner statistics rebuild.
+        self._update_derived([], previous, generation)
+        return len(values)
+
+    def refold_search_text(self) -> int:
+        """Recompute the casefolded search text of every event in bulk.
+
+        Runs automatically when the stored text was folded by another
+        version (or not at all, in catalogs created before the column);
+        returns the number of events updated.
+        """
+        logger = self._get_logger()
+        from sqlalchemy import update
+        session = self.Session()
+        try:
+            meta = session.get(CatalogMetaORM, "generation")
+            previous = meta.value if meta and meta.value else ""
+            rows = session.query(EventORM.id, *(getattr(EventORM, f) for f in SEARCH_FIELDS)).all()
+            values = [{"id": row.id, "search_folded": folded_search_text(row)} for row in rows]
+            if values:
+                session.execute(update(EventORM), values)
+            generation = uuid.uuid4().hex
+            session.merge(CatalogMetaORM(key="search_fold", value=SEARCH_FOLD_VERSION))
+            session.merge(CatalogMetaORM(key="generation", value=generation))
+            session.commit()
+            logger.info(f"Folded the search text of {len(values)} events")
+        except Exception as e:
+            logger.error(f"Error during refold_search_text: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self._update_derived([], previous, generation)
+        return len(values)
+
+    def _meta(self, key: str) -> str:
+        from sqlalchemy import select
+        # Plain Core query: this runs on hot paths (every derived index lookup).
+        with self.engine.connect() as conn:
+            value = conn.execute(select(CatalogMetaORM.value).where(CatalogMetaORM.key == key)).scalar()
+        return value or ""
+
+    def generation(self) -> str:
+        """Return the catalog generation token; it changes whenever events are written."""
+        return self._meta("generation")
+
+    def derived_index(
+        self,
+        name: str,
+        build: Callable[[], Any],
+        update: Callable[[Any, list[Event], str], None] | None = None,
+        profile: Profile | None = None,
+    ) -> Any:
+        """Return a process-wide index derived from this catalog, rebuilt on generation change.
+
+        If ``update`` is given, upserts made through any repository on the same
+        database in this process patch the index in place instead of forcing a rebuild.
+        Reuse and rebuilds are counted as ``cache_hits``/``cache_misses`` of profile.
+        """
+        generation = self.generation()
+        key = (self._scope, name)
+        with _derived_lock:
+            cached = _derived_indexes.get(key)
+            hit = cached is not None and cached[0] == generation
+            build_lock = _build_locks.setdefault(key, threading.RLock())
+        if cached is None or cached[0] != generation:
+            with build_lock:
+                # Another thread may have built it while this one waited
+                with _derived_lock:
+                    cached = _derived_indexes.get(key)
+                if cached is None or cached[0] != generation:
+                    cached = (generation, build(), update)
+                    with _derived_lock:
+                        _derived_indexes[key] = cached
+        if profile is not None:
+            profile.count("cache_hits" if hit else "cache_misses")
+        return cached[1]
+
+    def invalidate_derived(self, name: str) -> None:
+        """Drop a derived index so the next derived_index() call rebuilds it."""
+        with _derived_lock:
+            _derived_indexes.pop((self._scope, name), None)
+
+    def _update_derived(self, events: list[Event], previous: str, generation: str) -> None:
+        """Patch up-to-date derived indexes with freshly upserted events.
+
+        Each patch runs under its index's build lock only (an update may do
+        disk I/O), so lookups of other indexes go on meanwhile; lookups of
+        the index being patched wait for it like for a build.
+        """
+        with _derived_lock:
+            patchable = [
+                (key, entry, _build_locks.setdefault(key, threading.RLock()))
+                for key, entry in _derived_indexes.items()
+                if key[0] == self._scope and entry[2] is not None and entry[0] == previous
+            ]
+        for key, (built_for, index, update), build_lock in patchable:
+            with build_lock:
+                with _derived_lock:
+                    current = _derived_indexes.get(key)
+                if current is None or current[0] != built_for or current[1] is not index:
+                    continue  # rebuilt or dropped meanwhile
+                try:
+                    update(index, events, generation)
+                except Exception as e:
+                    self._get_logger().warning(f"Dropping derived index {key[1]} after failed update: {e}")
+                    with _derived_lock:
+                        _derived_indexes.pop(key, None)
+                    continue
+                with _derived_lock:
+                    _derived_indexes[key] = (generation, index, update)
+
     def search_events(self, filters, *args, **kwargs):
     # Entry log removed
         # Do not modify filters here
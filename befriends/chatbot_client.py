@@ -1,10 +1,25 @@
 from befriends.common.config import AppConfig
+from befriends.common.telemetry import Telemetry
+from befriends.llm.cache import ResponseCache, cache_key, entry_scope, shared_response_cache
+from befriends.llm.hedging import Hedger, shared_hedger
+from befriends.llm.scheduler import INTERACTIVE, LLMScheduler, request_tokens, shared_scheduler
+from befriends.llm.transport import LLMTransport, shared_transport
+import json
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 import requests
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 
+FALLBACK_REPLY = "I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊"
+
+
+class Replacement(str):
+    """A streamed chunk that replaces all text streamed before it (e.g. a late LLM answer replacing a fallback)."""
+
+
 class ChatbotConfig:
     """Configuration for the GPT-5 chatbot client."""
 
@@ -12,6 +27,16 @@ class ChatbotConfig:
         self.config = config or AppConfig.from_env()
         self.endpoint = self.config.openai_api_endpoint
         self.api_key = self.config.openai_api_key
+        self.connect_timeout = self.config.llm_connect_timeout
+        self.read_timeout = self.config.llm_read_timeout
+        self.max_retries = self.config.llm_max_retries
+        self.cache_path = self.config.llm_cache_path
+        self.cache_size = self.config.llm_cache_size
+        self.hedge_after = self.config.llm_hedge_after
+        self.requests_per_minute = self.config.llm_requests_per_minute
+        self.tokens_per_minute = self.config.llm_tokens_per_minute
+        self.queue_depth = self.config.llm_queue_depth
+        self.rate_lease_path = self.config.llm_rate_lease_path
         if not self.api_key:
             raise ValueError(
                 "OPENAI_API_KEY must be set in environment or AppConfig."
@@ -21,20 +46,52 @@ class ChatbotConfig:
 class ChatbotClient:
     """Client for interacting with GPT-5 via OpenAI API."""
 
-    def __init__(self, config: ChatbotConfig):
+    def __init__(
+        self,
+        config: ChatbotConfig,
+        telemetry: Optional[Telemetry] = None,
+        transport: Optional[LLMTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        hedger: Optional[Hedger] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        priority: int = INTERACTIVE,
+    ):
+        """
+        Requests go through the process-wide LLMScheduler when a requests- or
+        tokens-per-minute limit is configured; priority places them in its
+        queue (scheduler.BACKGROUND for work no user is waiting on).
+        """
         self.config = config
+        self.telemetry = telemetry or Telemetry()
+        # The process-wide pool and cache for these settings unless given; they
+        # count on the caller's telemetry if one was passed (one pool and cache per instance)
+        self.transport = transport or shared_transport(
+            config.connect_timeout, config.read_timeout, config.max_retries, telemetry
+        )
+        if cache is None and config.cache_size > 0:
+            cache = shared_response_cache(config.cache_path, config.cache_size, telemetry)
+        self.cache = cache
+        self.hedger = hedger or shared_hedger(config.hedge_after)
+        # Streams are hedged on their time to first token, which has its own latency window
+        self.stream_hedger = hedger or shared_hedger(config.hedge_after, "ttft")
+        if scheduler is None and (config.requests_per_minute or config.tokens_per_minute):
+            scheduler = shared_scheduler(
+                config.requests_per_minute, config.tokens_per_minute, config.queue_depth, config.rate_lease_path
+            )
+        self.scheduler = scheduler
+        self.priority = priority
 
-    def get_response(
-        self,
-        user_id: str,
-        messages: List[Dict[str, str]],
-        model: str = "gpt-3.5-turbo"  # Use a valid default model
-    ) -> str:
-        logger = logging.getLogger("ChatbotClient")
-        headers = {
+    def _timeout_message(self) -> str:
+        return f"The backend took too long to respond ({self.transport.read_timeout:g}s). Please try again later."
+
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.config.api_key}",
             "Content-Type": "application/json"
         }
+
+    @staticmethod
+    def _payload(user_id: str, messages: List[Dict[str, str]], model: str) -> Dict:
         payload = {
             "model": model,
             "messages": messages,
@@ -45,6 +102,314 @@ class ChatbotClient:
         # Only add 'user' if not None and not empty
         if user_id:
             payload["user"] = user_id
+        return payload
+
+    def stream_response(
+        self,
+        user_id: str,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-3.5-turbo",
+        cache_scope: Optional[str] = None,
+        deadline: Optional[float] = None,
+        fallback: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Yield the completion's text as the endpoint generates it.
+
+        With a deadline (seconds) the stream is hedged on its first token:
+        if none arrived after the hedge delay a second stream is opened and
+        the first one to produce a token is streamed (see Hedger). If the
+        deadline passes first, fallback is yielded at once and a late stream
+        follows, starting with a ``Replacement`` chunk.
+
+        Sends the same request as get_response with ``"stream": true`` and reads
+        the server-sent events of the chunked response, yielding each non-empty
+        ``choices[0].delta.content`` until ``data: [DONE]``. The transport's read
+        timeout applies to every read, not to the whole completion.
+
+        Time to first token is recorded as telemetry event ``llm.ttft`` and the
+        whole stream as ``llm.stream``, both in milliseconds. Cached answers
+        (see get_response) are yielded as a single chunk; a stream that
+        completes is cached.
+        """
+        if deadline:
+            yield from self._stream_within(user_id, messages, model, cache_scope, deadline, fallback)
+        else:
+            yield from self._stream(user_id, messages, model, cache_scope)
+
+    def _stream(
+        self, user_id: str, messages: List[Dict[str, str]], model: str, cache_scope: Optional[str]
+    ) -> Iterator[str]:
+        logger = logging.getLogger("ChatbotClient")
+        headers = {**self._headers(), "Accept": "text/event-stream"}
+        payload = {**self._payload(user_id, messages, model), "stream": True}
+        key, scope = cache_key(payload), entry_scope(cache_scope)
+        cached = self.cache.get(key, scope) if self.cache is not None else None
+        if cached is not None:
+            yield cached
+            return
+        if not isinstance(self.config.endpoint, str):
+            logger.error("ChatbotConfig.endpoint must be a string, got: %s",
+                         type(self.config.endpoint))
+            raise ValueError("ChatbotConfig.endpoint must be a string.")
+        logger.info("Streaming from backend endpoint: %s", self.config.endpoint)
+        started = time.perf_counter()
+        try:
+            response = self._post(headers, payload, stream=True)
+            response.raise_for_status()
+        except requests.Timeout:
+            logger.error(f"Backend request timed out after {self.transport.read_timeout:g} seconds.")
+            raise RuntimeError(self._timeout_message())
+        except Exception as e:
+            logger.exception("Backend request failed: %s", e)
+            raise RuntimeError(f"Backend error: {e}")
+        first_token = None
+        chunks = 0
+        parts = []
+        try:
+            # chunk_size=None hands over each chunk as it arrives instead of filling a buffer first
+            for line in response.iter_lines(chunk_size=None):
+                line = line.decode("utf-8") if isinstance(line, bytes) else line
+                if not line.startswith("data:"):
+                    continue  # blank separators, comments and event/id fields
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(data)["choices"][0].get("delta") or {}
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    logger.error(f"[ERROR] Malformed stream event: {data!r} ({e})")
+                    continue
+                content = delta.get("content")
+                if not content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                    self.telemetry.record_event(
+                        "llm.ttft", ms=round((first_token - started) * 1000, 3), model=model
+                    )
+                chunks += 1
+                parts.append(content)
+                yield content
+            if self.cache is not None and "".join(parts).strip():
+                self.cache.put(key, scope, "".join(parts), (time.perf_counter() - started) * 1000)
+        except requests.Timeout:
+            logger.error(f"Backend stream stalled for {self.transport.read_timeout:g} seconds.")
+            raise RuntimeError(self._timeout_message())
+        except requests.RequestException as e:
+            logger.exception("Backend stream failed: %s", e)
+            raise RuntimeError(f"Backend error: {e}")
+        finally:
+            response.close()
+            self.telemetry.record_event(
+                "llm.stream", ms=round((time.perf_counter() - started) * 1000, 3), chunks=chunks, model=model
+            )
+
+    def get_response(
+        self,
+        user_id: str,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-3.5-turbo",  # Use a valid default model
+        cache_scope: Optional[str] = None,
+        deadline: Optional[float] = None,
+        fallback: Optional[str] = None,
+    ) -> str:
+        """
+        Return the completion for messages.
+
+        Identical requests (model, messages and sampling parameters) are
+        answered from the response cache while the calendar day and
+        cache_scope (e.g. the catalog generation the prompt was built from)
+        stay the same. Fallback answers are not cached.
+
+        With a deadline (seconds) the request is hedged (see Hedger) and, if
+        no answer arrived in time, fallback is returned instead; without a
+        fallback the call raises RuntimeError. A late answer is still cached.
+        """
+        if deadline:
+            answer = self._answer_within(user_id, messages, model, cache_scope, deadline)
+            if answer.done():
+                return answer.result()
+            if fallback is None:
+                raise RuntimeError(f"The backend did not answer within the {deadline:g}s deadline.")
+            return fallback
+        payload = self._payload(user_id, messages, model)
+        if self.cache is None:
+            return self._complete(payload)
+        key, scope = cache_key(payload), entry_scope(cache_scope)
+        cached = self.cache.get(key, scope)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        content = self._complete(payload)
+        if content != FALLBACK_REPLY:
+            self.cache.put(key, scope, content, (time.perf_counter() - started) * 1000)
+        return content
+
+    def _answer_within(
+        self, user_id: str, messages: List[Dict[str, str]], model: str, cache_scope: Optional[str], deadline: float
+    ) -> Future:
+        """Hedged completion, waited for up to deadline seconds; not done() if the deadline passed."""
+        self.telemetry.increment("llm.slo.call")
+        payload = self._payload(user_id, messages, model)
+        key, scope = cache_key(payload), entry_scope(cache_scope)
+        cached = self.cache.get(key, scope) if self.cache is not None else None
+        if cached is not None:
+            answer: Future = Future()
+            answer.set_result(cached)
+            return answer
+        started = time.perf_counter()
+        answer = self.hedger.submit(lambda: self._complete(payload), self.telemetry)
+
+        def store(done: Future) -> None:
+            if self.cache is not None and not done.exception() and done.result() != FALLBACK_REPLY:
+                self.cache.put(key, scope, done.result(), (time.perf_counter() - started) * 1000)
+
+        answer.add_done_callback(store)
+        try:
+            answer.result(timeout=deadline)
+        except FutureTimeout:
+            self.telemetry.increment("llm.slo.fallback")
+            logging.getLogger("ChatbotClient").warning(f"No LLM answer within {deadline:g}s; serving the fallback")
+        return answer
+
+    def _open_stream(
+        self, user_id: str, messages: List[Dict[str, str]], model: str, cache_scope: Optional[str]
+    ) -> tuple[str, Iterator[str]]:
+        """Start a stream and wait for its first chunk; the rest follows from the returned iterator."""
+        chunks = self._stream(user_id, messages, model, cache_scope)
+        for first in chunks:
+            return first, chunks
+        return "", chunks
+
+    def _stream_within(
+        self,
+        user_id: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        cache_scope: Optional[str],
+        deadline: float,
+        fallback: Optional[str],
+    ) -> Iterator[str]:
+        logger = logging.getLogger("ChatbotClient")
+        self.telemetry.increment("llm.slo.call")
+        # A losing stream's iterator is dropped by the hedger, which closes its response
+        opened = self.stream_hedger.submit(lambda: self._open_stream(user_id, messages, model, cache_scope), self.telemetry)
+        try:
+            first, rest = opened.result(timeout=deadline)
+        except FutureTimeout:
+            self.telemetry.increment("llm.slo.fallback")
+            logger.warning(f"No LLM answer within {deadline:g}s; serving the fallback")
+            if fallback is None:
+                raise RuntimeError(f"The backend did not answer within the {deadline:g}s deadline.")
+            yield fallback
+            try:
+                first, rest = opened.result(timeout=self.transport.read_timeout)
+            except Exception as e:
+                logger.warning(f"No late LLM answer, keeping the fallback: {e}")
+                return
+            self.telemetry.increment("llm.slo.late_answer")
+            yield Replacement(first)
+            yield from rest
+            return
+        yield first
+        yield from rest
+
+    def slo_stats(self) -> Dict[str, float]:
+        """Rates of hedged requests, hedges that won, fallbacks served and fallbacks later replaced."""
+        counters = self.telemetry.counters()
+        calls = counters.get("llm.slo.call", 0)
+        hedges = counters.get("llm.hedge.sent", 0)
+        fallbacks = counters.get("llm.slo.fallback", 0)
+        return {
+            "calls": calls,
+            "hedge_rate": hedges / calls if calls else 0.0,
+            "hedge_win_rate": counters.get("llm.hedge.won", 0) / hedges if hedges else 0.0,
+            "fallback_rate": fallbacks / calls if calls else 0.0,
+            "late_answer_rate": counters.get("llm.slo.late_answer", 0) / fallbacks if fallbacks else 0.0,
+        }
+
+    def complete_with_tools(
+        self,
+        user_id: str,
+        messages: List[Dict[str, Any]],
+        tools: Any,
+        model: str = "gpt-3.5-turbo",
+        max_rounds: int = 3,
+    ) -> str:
+        """
+        Answer messages while letting the model call tools.
+
+        tools provides ``definitions()`` (OpenAI tool schemas) and
+        ``call(name, arguments) -> str``. Each round in which the model asks
+        for tools runs them locally and sends the results back; after
+        max_rounds such rounds the model must answer (``tool_choice: none``),
+        so one answer costs at most max_rounds + 1 completions. Answers are
+        not cached, since they depend on what the tools return.
+
+        Telemetry event ``llm.tool_loop`` records the rounds, tool calls,
+        characters of all request payloads and the total latency.
+        """
+        logger = logging.getLogger("ChatbotClient")
+        conversation = list(messages)
+        started = time.perf_counter()
+        prompt_chars = 0
+        calls_made = 0
+        content = None
+        for round_ in range(max_rounds + 1):
+            payload = {
+                **self._payload(user_id, conversation, model),
+                "tools": tools.definitions(),
+                "tool_choice": "auto" if round_ < max_rounds else "none",
+            }
+            prompt_chars += len(json.dumps(payload, ensure_ascii=False))
+            data = self._request(payload)
+            try:
+                message = data["choices"][0]["message"]
+            except (KeyError, IndexError, TypeError) as e:
+                logger.error(f"[ERROR] Malformed OpenAI API response: {data} ({e})")
+                break
+            content = message.get("content")
+            calls = message.get("tool_calls") or []
+            # Calls requested despite tool_choice "none" are not run
+            if not calls or round_ == max_rounds:
+                break
+            conversation.append({"role": "assistant", "content": content, "tool_calls": calls})
+            for call in calls:
+                function = call.get("function") or {}
+                calls_made += 1
+                conversation.append({
+                    "role": "tool",
+                    "tool_call_id": call.get("id"),
+                    "content": tools.call(function.get("name"), function.get("arguments") or "{}"),
+                })
+            content = None
+        self.telemetry.record_event(
+            "llm.tool_loop",
+            rounds=round_ + 1,
+            tool_calls=calls_made,
+            prompt_chars=prompt_chars,
+            ms=round((time.perf_counter() - started) * 1000, 3),
+            model=model,
+        )
+        if not isinstance(content, str) or not content.strip():
+            logger.error("[ERROR] Tool loop ended without an answer")
+            return FALLBACK_REPLY
+        return content
+
+    def _post(self, headers: Dict[str, str], payload: Dict, stream: bool = False) -> requests.Response:
+        """POST payload through the transport, after the scheduler's queue and rate budget if there is one."""
+        def post() -> requests.Response:
+            return self.transport.post(self.config.endpoint, headers=headers, json=payload, stream=stream)
+
+        if self.scheduler is None:
+            return post()
+        return self.scheduler.run(post, tokens=request_tokens(payload), priority=self.priority)
+
+    def _request(self, payload: Dict) -> Dict:
+        """POST payload and return the parsed response JSON; RuntimeError on failure."""
+        logger = logging.getLogger("ChatbotClient")
+        headers = self._headers()
         if not isinstance(self.config.endpoint, str):
             logger.error("ChatbotConfig.endpoint must be a string, got: %s",
                          type(self.config.endpoint))
@@ -52,18 +417,12 @@ class ChatbotClient:
         logger.info("Sending request to backend endpoint: %s", self.config.endpoint)
         logger.debug("Payload: %s", payload)
         try:
-            response = requests.post(
-                self.config.endpoint,
-                headers=headers,
-                json=payload,
-                timeout=30  # Allow up to 30s for OpenAI response
-            )
+            response = self._post(headers, payload)
             logger.info(f"[DEBUG] OpenAI API request payload: {payload}")
             logger.info(f"[DEBUG] OpenAI API response status: {response.status_code}")
         except requests.Timeout:
-            logger.error("Backend request timed out after 30 seconds.")
-            msg = "The backend took too long to respond (30s). Please try again later."
-            raise RuntimeError(msg)
+            logger.error(f"Backend request timed out after {self.transport.read_timeout:g} seconds.")
+            raise RuntimeError(self._timeout_message())
         except Exception as e:
             logger.exception("Backend request failed: %s", e)
             raise RuntimeError(f"Backend error: {e}")
@@ -76,18 +435,23 @@ class ChatbotClient:
         except Exception as e:
             logger.exception("Failed to parse backend response: %s", e)
             raise RuntimeError(f"Failed to parse backend response: {e}")
-        # OpenAI API returns choices[0]['message']['content']
         logger.debug("Backend response JSON: %s", data)
+        return data
+
+    def _complete(self, payload: Dict) -> str:
+        logger = logging.getLogger("ChatbotClient")
+        data = self._request(payload)
+        # OpenAI API returns choices[0]['message']['content']
         # Defensive: Always return a string, even if malformed
         try:
             content = data["choices"][0]["message"]["content"]
             if not isinstance(content, str) or not content.strip():
                 logger.error(f"[ERROR] OpenAI API response missing or empty content: {data}")
-                logger.info(f"[TRACE] Returning fallback assistant message from ChatbotClient: I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊")
-                return "I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊"
+                logger.info(f"[TRACE] Returning fallback assistant message from ChatbotClient: {FALLBACK_REPLY}")
+                return FALLBACK_REPLY
             logger.info(f"[TRACE] Returning assistant content from ChatbotClient: {repr(content)}")
             return content
         except Exception as e:
             logger.error(f"[ERROR] Exception extracting content from OpenAI API response: {e}, data: {data}")
-            logger.info(f"[TRACE] Returning fallback assistant message from ChatbotClient: I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊")
-            return "I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊"
+            logger.info(f"[TRACE] Returning fallback assistant message from ChatbotClient: {FALLBACK_REPLY}")
+            return FALLBACK_REPLY
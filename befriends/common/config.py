@@ -20,12 +20,46 @@ class AppConfig:
         openai_api_endpoint: str,
         sources: list[dict],
         features: dict[str, Any],
+        llm_connect_timeout: float = 5.0,
+        llm_read_timeout: float = 30.0,
+        llm_max_retries: int = 3,
+        llm_cache_path: str | None = None,
+        llm_cache_size: int = 512,
+        llm_context_tokens: int = 700,
+        llm_history_turns: int = 4,
+        llm_prompt_tokens: int = 2000,
+        llm_deadline: float = 0.0,
+        llm_hedge_after: float | None = None,
+        llm_requests_per_minute: float = 0,
+        llm_tokens_per_minute: float = 0,
+        llm_queue_depth: int = 64,
+        llm_rate_lease_path: str | None = None,
+        chat_session_ttl: float = 1800.0,
+        chat_session_path: str | None = None,
+        chat_api_url: str | None = None,
     ):
         self.db_url = db_url
         self.openai_api_key = openai_api_key
         self.openai_api_endpoint = openai_api_endpoint
         self.sources = sources
         self.features = features
+        self.llm_connect_timeout = llm_connect_timeout
+        self.llm_read_timeout = llm_read_timeout
+        self.llm_max_retries = llm_max_retries
+        self.llm_cache_path = llm_cache_path
+        self.llm_cache_size = llm_cache_size
+        self.llm_context_tokens = llm_context_tokens
+        self.llm_history_turns = llm_history_turns
+        self.llm_prompt_tokens = llm_prompt_tokens
+        self.llm_deadline = llm_deadline
+        self.llm_hedge_after = llm_hedge_after
+        self.llm_requests_per_minute = llm_requests_per_minute
+        self.llm_tokens_per_minute = llm_tokens_per_minute
+        self.llm_queue_depth = llm_queue_depth
+        self.llm_rate_lease_path = llm_rate_lease_path
+        self.chat_session_ttl = chat_session_ttl
+        self.chat_session_path = chat_session_path
+        self.chat_api_url = chat_api_url
 
     @classmethod
     def from_env(cls) -> "AppConfig":
@@ -52,6 +86,23 @@ class AppConfig:
             openai_api_endpoint=openai_api_endpoint,
             sources=sources,
             features=features,
+            llm_connect_timeout=float(os.getenv("BEFRIENDS_LLM_CONNECT_TIMEOUT", "5")),
+            llm_read_timeout=float(os.getenv("BEFRIENDS_LLM_READ_TIMEOUT", "30")),
+            llm_max_retries=int(os.getenv("BEFRIENDS_LLM_MAX_RETRIES", "3")),
+            llm_cache_path=os.getenv("BEFRIENDS_LLM_CACHE_PATH") or None,
+            llm_cache_size=int(os.getenv("BEFRIENDS_LLM_CACHE_SIZE", "512")),
+            llm_context_tokens=int(os.getenv("BEFRIENDS_LLM_CONTEXT_TOKENS", "700")),
+            llm_history_turns=int(os.getenv("BEFRIENDS_LLM_HISTORY_TURNS", "4")),
+            llm_prompt_tokens=int(os.getenv("BEFRIENDS_LLM_PROMPT_TOKENS", "2000")),
+            llm_deadline=float(os.getenv("BEFRIENDS_LLM_DEADLINE", "0")),
+            llm_hedge_after=float(os.environ["BEFRIENDS_LLM_HEDGE_AFTER"]) if os.getenv("BEFRIENDS_LLM_HEDGE_AFTER") else None,
+            llm_requests_per_minute=float(os.getenv("BEFRIENDS_LLM_RPM", "0")),
+            llm_tokens_per_minute=float(os.getenv("BEFRIENDS_LLM_TPM", "0")),
+            llm_queue_depth=int(os.getenv("BEFRIENDS_LLM_QUEUE_DEPTH", "64")),
+            llm_rate_lease_path=os.getenv("BEFRIENDS_LLM_RATE_LEASE_PATH") or None,
+            chat_session_ttl=float(os.getenv("BEFRIENDS_CHAT_SESSION_TTL", "1800")),
+            chat_session_path=os.getenv("BEFRIENDS_CHAT_SESSION_PATH") or None,
+            chat_api_url=os.getenv("BEFRIENDS_CHAT_API_URL") or None,
         )
 
     @property
@@ -1,20 +1,84 @@
 """Telemetry and instrumentation."""
 
 from __future__ import annotations
-from contextlib import contextmanager
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager
+
+# Returned by time_block when nothing is being profiled; entering it does no work.
+_NOT_TIMED = nullcontext()
+
+
+class Profile:
+    """Per-request breakdown of stage timings and counts, filled in by time_block."""
+
+    def __init__(self, *counts: str) -> None:
+        """counts names the counts to report even when they stay at zero."""
+        self._started = time.perf_counter()
+        self.timings: dict[str, float] = {}
+        self.counts: dict[str, int] = dict.fromkeys(counts, 0)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Add the wall time of the block to stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add value to a per-request count such as rows fetched."""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def as_dict(self) -> dict[str, float]:
+        """Stage timings in milliseconds (``<stage>_ms``), counts and the total so far."""
+        result: dict[str, float] = {f"{name}_ms": round(t * 1000, 3) for name, t in self.timings.items()}
+        result.update(self.counts)
+        result["total_ms"] = round((time.perf_counter() - self._started) * 1000, 3)
+        return result
 
 
 class Telemetry:
     """Records events and timings for observability."""
 
+    def __init__(self, max_events: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._events: deque[dict] = deque(maxlen=max_events)
+
     def record_event(self, name: str, **fields) -> None:
         """Record a named event with fields."""
+        event = {"name": name, "time": time.time(), **fields}
+        with self._lock:
+            self._events.append(event)
+        logging.getLogger(self.__class__.__name__).debug(f"[Telemetry] {event}")
         # ...send event to backend...
-        pass
 
-    @contextmanager
-    def time_block(self, name: str):
-        """Context manager stub for timing a code block."""
-        # ...start timer...
-        yield
-        # ...end timer, record duration...
+    def recent_events(self, name: str | None = None) -> list[dict]:
+        """Return the most recent recorded events, optionally only those called name."""
+        with self._lock:
+            return [e for e in self._events if name is None or e["name"] == name]
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add value to an in-process counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counters(self) -> dict[str, float]:
+        """Return a snapshot of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def time_block(self, name: str, profile: Profile | None = None) -> ContextManager:
+        """Time a code block as stage name of profile.
+
+        Without a profile this returns a shared no-op context, so instrumented
+        code paths cost nothing unless profiling was requested.
+        """
+        if profile is None:
+            return _NOT_TIMED
+        return profile.stage(name)
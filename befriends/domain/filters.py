@@ -0,0 +1,139 @@
+"""Structured event filter value object."""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Tuple
+
+# Legacy and UI keys mapped onto the canonical field names.
+ALIASES = {
+    "region_standardized": "region",
+    "city": "region",
+    "category": "event_type",
+    "start_datetime_from": "date_from",
+    "start_datetime_to": "date_to",
+}
+# Values that mean "no filter" for string fields.
+UNSET = frozenset({"", "all"})
+# A region that was explicitly asked for as every region (the UI's "All").
+ALL = "all"
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value.lower() in UNSET else value
+
+
+def _date(value: Any) -> Optional[datetime.date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.fromisoformat(str(value).strip()).date()
+
+
+def _positive(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    value = float(value)
+    return value if value > 0 else None
+
+
+def _styles(value: Any) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    items = [value] if isinstance(value, str) else list(value)
+    return tuple(s for s in (_text(item) for item in items) if s)
+
+
+@dataclass(frozen=True, slots=True)
+class EventFilter:
+    """Immutable, hashable set of structured event filters.
+
+    Build instances with ``EventFilter.of``, which canonicalizes keys and
+    values, so equal filters compare and hash equal and can key caches.
+    An instance with no field set is falsy.
+
+    ``all_regions`` records an explicit "All" region: it filters nothing,
+    but unlike an unset region it is not to be replaced by a default such
+    as the profile's city (see ``region_unset``).
+    """
+
+    region: Optional[str] = None
+    all_regions: bool = False
+    region_radius: Optional[float] = None
+    event_type: Optional[str] = None
+    dance_style: Tuple[str, ...] = ()
+    organizer: Optional[str] = None
+    instagram: Optional[str] = None
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    is_free: bool = False
+
+    @classmethod
+    def of(cls, filters: "EventFilter | Mapping[str, Any] | None" = None, **overrides: Any) -> "EventFilter":
+        """Canonical filter from a mapping (or an existing filter) plus keyword overrides.
+
+        Aliased keys (``region_standardized``, ``city``, ``category``,
+        ``start_datetime_from/to``) are mapped onto their canonical field,
+        dates are coerced to ``datetime.date``, ``"All"``/empty strings and
+        non-positive numbers are dropped (an ``"All"`` region sets
+        ``all_regions``), and unknown keys (UI flags such as
+        ``apply_filters``) are ignored.
+        """
+        if isinstance(filters, EventFilter):
+            if not overrides:
+                return filters
+            raw: dict[str, Any] = filters.as_dict()
+        else:
+            raw = {}
+            # Canonical keys win over their aliases.
+            for key, value in sorted((filters or {}).items(), key=lambda item: item[0] in ALIASES):
+                key = ALIASES.get(key, key)
+                if raw.get(key) in (None, "") and key in cls.__dataclass_fields__:
+                    raw[key] = value
+        raw.update((ALIASES.get(k, k), v) for k, v in overrides.items())
+        region = _text(raw.get("region"))
+        asked_all = str(raw.get("region") or "").strip().lower() == ALL
+        return cls(
+            region=region,
+            all_regions=region is None and (asked_all or bool(raw.get("all_regions"))),
+            region_radius=_positive(raw.get("region_radius")),
+            event_type=_text(raw.get("event_type")),
+            dance_style=_styles(raw.get("dance_style")),
+            organizer=_text(raw.get("organizer")),
+            instagram=_text(raw.get("instagram")),
+            date_from=_date(raw.get("date_from")),
+            date_to=_date(raw.get("date_to")),
+            price_min=_positive(raw.get("price_min")),
+            price_max=_positive(raw.get("price_max")),
+            is_free=bool(raw.get("is_free")),
+        )
+
+    def replace(self, **changes: Any) -> "EventFilter":
+        """Copy with some fields changed, normalized like ``of``."""
+        return EventFilter.of(self, **changes)
+
+    def as_dict(self) -> dict[str, Any]:
+        """The fields that are set, e.g. for logging and telemetry."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in dataclasses.fields(self)
+            if getattr(self, f.name) not in (None, (), False)
+        }
+
+    @property
+    def region_unset(self) -> bool:
+        """Whether no region was chosen at all, so a default region may apply."""
+        return self.region is None and not self.all_regions
+
+    def __bool__(self) -> bool:
+        return bool(self.as_dict())
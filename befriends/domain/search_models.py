@@ -7,6 +7,7 @@ from datetime import date
 from typing import List, Optional
 from pydantic import BaseModel
 from .event import Event, EventModel
+from .filters import EventFilter
 
 
 
@@ -22,6 +23,35 @@ class SearchQuery:
     dance_style: Optional[str] = None
     price_min: Optional[float] = None
     price_max: Optional[float] = None
+    region_radius: Optional[float] = None
+
+    @classmethod
+    def from_filter(cls, text: str, filters: EventFilter) -> "SearchQuery":
+        """Build a query for text restricted by a canonical filter."""
+        return cls(
+            text=text,
+            start_datetime_from=filters.date_from,
+            start_datetime_to=filters.date_to,
+            region=filters.region,
+            event_type=filters.event_type,
+            dance_style=",".join(filters.dance_style) or None,
+            price_min=filters.price_min,
+            price_max=filters.price_max,
+            region_radius=filters.region_radius,
+        )
+
+    def as_filter(self) -> EventFilter:
+        """The structured part of the query as a canonical filter."""
+        return EventFilter.of(
+            date_from=self.start_datetime_from,
+            date_to=self.start_datetime_to,
+            region=self.region,
+            region_radius=self.region_radius,
+            event_type=self.event_type,
+            dance_style=self.dance_style,
+            price_min=self.price_min,
+            price_max=self.price_max,
+        )
 
     def has_filters(self) -> bool:
         """Return True if any filters are set."""
@@ -49,6 +79,7 @@ class SearchQueryModel(BaseModel):
     dance_style: Optional[str] = None
     price_min: Optional[float] = None
     price_max: Optional[float] = None
+    region_radius: Optional[float] = None
 
     model_config = {"from_attributes": True}
 
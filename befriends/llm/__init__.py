@@ -0,0 +1,2 @@
+
+"""Transport and call policies for the chatbot LLM backend."""
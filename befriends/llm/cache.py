@@ -0,0 +1,161 @@
+"""Prompt-level cache of LLM completions, optionally persisted in SQLite."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+
+from ..common.telemetry import Telemetry
+
+
+def cache_key(payload: dict[str, Any]) -> str:
+    """Hash of what determines a completion: model, messages and sampling parameters.
+
+    The ``user`` and ``stream`` fields do not change the answer and are left out.
+    """
+    relevant = {k: v for k, v in payload.items() if k not in ("user", "stream")}
+    encoded = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def entry_scope(scope: str | None = None, today: datetime.date | None = None) -> str:
+    """Validity scope of an entry: the calendar day plus the caller's scope (e.g. catalog generation)."""
+    return f"{(today or datetime.date.today()).isoformat()}|{scope or ''}"
+
+
+class ResponseCache:
+    """
+    LRU cache of completions keyed by ``cache_key``.
+
+    Every entry belongs to a scope (see ``entry_scope``); a lookup only hits
+    entries of the same scope, so answers expire when the day rolls over or
+    the catalog generation the prompt was built from changes. ``max_entries``
+    bounds the in-memory LRU and, with ``path`` set, a SQLite table shared by
+    every process and Streamlit session that opens the same file.
+
+    Counters ``llm_cache.hit``, ``llm_cache.miss`` and ``llm_cache.saved_ms``
+    (the original latency of every answer served from cache) are kept on the
+    telemetry instance; ``stats()`` derives the hit rate from them.
+    """
+
+    def __init__(self, max_entries: int = 512, path: str | None = None, telemetry: Telemetry | None = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.telemetry = telemetry or Telemetry()
+        self._entries: OrderedDict[str, tuple[str, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            with self._connect() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, scope TEXT NOT NULL, response TEXT NOT NULL, "
+                    "latency_ms REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=5.0)  # type: ignore[arg-type]
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:  # commits, or rolls back on error
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key: str, scope: str) -> str | None:
+        """The cached completion for key in scope, or None."""
+        entry = self._get_memory(key)
+        # Another process may have stored a fresher answer
+        if (entry is None or entry[0] != scope) and self.path:
+            entry = self._get_disk(key)
+            if entry is not None:
+                self._put_memory(key, entry)
+        if entry is None or entry[0] != scope:
+            self.telemetry.increment("llm_cache.miss")
+            return None
+        self.telemetry.increment("llm_cache.hit")
+        self.telemetry.increment("llm_cache.saved_ms", entry[2])
+        return entry[1]
+
+    def put(self, key: str, scope: str, response: str, latency_ms: float) -> None:
+        """Store a completion and the latency it took to produce."""
+        entry = (scope, response, latency_ms)
+        self._put_memory(key, entry)
+        if not self.path:
+            return
+        try:
+            with self._connect() as db:
+                # Entries of earlier days can never hit again. Other scopes of the same day
+                # (another catalog generation, prompts without one) are left to the scope check in get
+                day = scope.split("|", 1)[0]
+                db.execute("DELETE FROM llm_cache WHERE scope < ?", (f"{day}|",))
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, scope, response, latency_ms, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, *entry, time.time()),
+                )
+                db.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logging.getLogger(self.__class__.__name__).warning(f"Could not persist LLM cache entry: {e}")
+
+    def _get_memory(self, key: str) -> tuple[str, str, float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put_memory(self, key: str, entry: tuple[str, str, float]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_disk(self, key: str) -> tuple[str, str, float] | None:
+        try:
+            with self._connect() as db:
+                row = db.execute("SELECT scope, response, latency_ms FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            logging.getLogger(self.__class__.__name__).warning(f"Could not read LLM cache: {e}")
+            return None
+        return None if row is None else (row[0], row[1], float(row[2]))
+
+    def stats(self) -> dict[str, float]:
+        """Hits, misses, hit rate and the latency saved by hits (ms)."""
+        counters = self.telemetry.counters()
+        hits = counters.get("llm_cache.hit", 0)
+        misses = counters.get("llm_cache.miss", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "saved_ms": counters.get("llm_cache.saved_ms", 0),
+        }
+
+
+@lru_cache(maxsize=None)
+def shared_response_cache(
+    path: str | None = None, max_entries: int = 512, telemetry: Telemetry | None = None
+) -> ResponseCache:
+    """One cache per file (or in-memory) for the whole process, shared by every client and session.
+
+    Pass the application's telemetry so the hit and miss counters show up with its others.
+    """
+    return ResponseCache(max_entries=max_entries, path=path, telemetry=telemetry)
@@ -0,0 +1,112 @@
+"""Hedged calls: a second attempt when the first is slower than usual."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+from ..common.telemetry import Telemetry
+
+T = TypeVar("T")
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..1) of non-empty samples."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class Hedger:
+    """
+    Runs a call and, if it has not succeeded after the hedge delay, the
+    same call once more in parallel; the first success wins.
+
+    The delay is ``hedge_after`` seconds if set, otherwise the p95 latency
+    of the last ``window`` successful attempts once ``min_samples`` were
+    seen, and ``default_delay`` before that. The losing attempt is not
+    interrupted (a blocking HTTP request cannot be); its result is dropped.
+
+    Counters ``llm.hedge.call``, ``llm.hedge.sent`` and ``llm.hedge.won``
+    are kept on the telemetry passed to ``submit``.
+    """
+
+    def __init__(
+        self,
+        hedge_after: float | None = None,
+        default_delay: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 16,
+    ):
+        self.hedge_after = hedge_after
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds to wait for the first attempt before sending the hedge."""
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            samples = list(self._latencies)
+        return percentile(samples, 0.95) if len(samples) >= self.min_samples else self.default_delay
+
+    def submit(self, call: Callable[[], T], telemetry: Telemetry | None = None) -> Future:
+        """Future of the first successful attempt, or of the first error once every attempt failed."""
+        telemetry = telemetry or Telemetry()
+        telemetry.increment("llm.hedge.call")
+        result: Future = Future()
+        state: dict[str, Any] = {"launched": 0, "failed": 0, "error": None}
+        lock = threading.Lock()
+
+        def attempt(hedge: bool) -> None:
+            started = time.perf_counter()
+            try:
+                value = call()
+            except Exception as e:
+                with lock:
+                    state["failed"] += 1
+                    state["error"] = state["error"] or e
+                    # A cancelled result is done as well
+                    if state["failed"] == state["launched"] and not result.done():
+                        result.set_exception(state["error"])
+                return
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+            with lock:
+                if result.done():
+                    return
+                result.set_result(value)
+            if hedge:
+                telemetry.increment("llm.hedge.won")
+
+        def launch(hedge: bool) -> None:
+            with lock:
+                if result.done():
+                    return
+                state["launched"] += 1
+            if hedge:
+                telemetry.increment("llm.hedge.sent")
+                logging.getLogger(self.__class__.__name__).info("Sending hedged request")
+            self._executor.submit(attempt, hedge)
+
+        launch(False)
+        timer = threading.Timer(self.delay(), launch, args=(True,))
+        timer.daemon = True
+        timer.start()
+        result.add_done_callback(lambda _: timer.cancel())
+        return result
+
+
+@lru_cache(maxsize=None)
+def shared_hedger(hedge_after: float | None = None, kind: str = "completion") -> Hedger:
+    """One hedger per setting and kind of latency for the whole process, so the window covers every session."""
+    return Hedger(hedge_after=hedge_after)
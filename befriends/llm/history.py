@@ -0,0 +1,158 @@
+"""Token-bounded conversation history: recent turns verbatim, older ones as a rolling summary."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import statistics
+from typing import Any, Callable, Mapping, Sequence
+
+from ..common.telemetry import Telemetry
+from ..response.event_context import estimate_tokens
+
+# Every message costs a few tokens of framing on top of its content.
+MESSAGE_OVERHEAD = 4
+SUMMARY_HEADER = "Summary of the earlier conversation (oldest first):\n"
+
+Message = Mapping[str, Any]
+Summarizer = Callable[[str, Sequence[Message]], str]
+
+
+def message_tokens(messages: Sequence[Message]) -> int:
+    """Estimated prompt tokens of messages (see ``estimate_tokens``)."""
+    return sum(MESSAGE_OVERHEAD + estimate_tokens(str(m.get("content") or "")) for m in messages)
+
+
+def _clip(text: str, words: int) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + (" …" if len(parts) > words else "")
+
+
+def extractive_summary(summary: str, messages: Sequence[Message], words: int = 25) -> str:
+    """Append one clipped line per user and assistant message to summary; no model call."""
+    speakers = {"user": "User", "assistant": "EventMate"}
+    lines = [summary] if summary else []
+    lines.extend(
+        f"{speakers[m['role']]}: {_clip(str(m.get('content') or ''), words)}"
+        for m in messages
+        if m.get("role") in speakers and m.get("content")
+    )
+    return "\n".join(lines)
+
+
+def _digest(messages: Sequence[Message]) -> str:
+    encoded = json.dumps([(m.get("role"), m.get("content")) for m in messages], ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ConversationHistory:
+    """
+    The part of a chat session that goes into the next prompt.
+
+    ``compact`` keeps the last ``keep_turns`` turns (a user message and the
+    replies to it) verbatim and folds everything before them into a summary
+    message. Folding is incremental: the summary of the already folded prefix
+    is kept, and each turn only the newly folded messages are passed to
+    ``summarize(summary, messages)``. The summary is cut to ``summary_tokens``
+    by dropping its oldest lines. If the prompt, system prompt included, still
+    exceeds ``token_budget``, further turns are folded; the latest user
+    message is always kept verbatim.
+
+    One instance belongs to one session. When the session's history no
+    longer starts with the folded prefix (e.g. the chat was reset), the
+    summary starts over.
+
+    Each call records a ``chat.prompt`` telemetry event with the prompt size;
+    ``stats()`` summarizes them.
+    """
+
+    def __init__(
+        self,
+        keep_turns: int = 4,
+        token_budget: int = 2000,
+        summary_tokens: int = 300,
+        summarize: Summarizer = extractive_summary,
+        telemetry: Telemetry | None = None,
+    ):
+        self.keep_turns = max(1, keep_turns)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.telemetry = telemetry or Telemetry()
+        self.summary = ""
+        self._folded = 0
+        self._folded_digest = _digest([])
+
+    def compact(self, messages: Sequence[Message], system_prompt: Message | None = None) -> list[dict[str, Any]]:
+        """The prompt for messages: system_prompt, the summary (if any) and the recent turns."""
+        history = [{"role": m.get("role"), "content": m.get("content")} for m in messages]
+        if len(history) < self._folded or _digest(history[: self._folded]) != self._folded_digest:
+            self.summary, self._folded, self._folded_digest = "", 0, _digest([])
+        starts = [i for i, m in enumerate(history) if m["role"] == "user"]
+        # Turns older than keep_turns are folded in any case
+        self._fold(history, max(starts[-self.keep_turns] if len(starts) >= self.keep_turns else 0, self._folded))
+        system = [dict(system_prompt)] if system_prompt else []
+        while self._total(system, history) > self.token_budget:
+            # Fold the oldest verbatim turn, but never the latest user message
+            later = [i for i in starts[:-1] if i > self._folded] + starts[-1:]
+            if not later or later[0] <= self._folded:
+                break
+            self._fold(history, later[0])
+        prompt = system + self._summary_message() + history[self._folded:]
+        self.telemetry.record_event(
+            "chat.prompt",
+            tokens=message_tokens(prompt),
+            system_tokens=message_tokens(system),
+            summary_tokens=estimate_tokens(self.summary),
+            verbatim_messages=len(history) - self._folded,
+            folded_messages=self._folded,
+        )
+        return prompt
+
+    def trim(self, messages: Sequence[Message]) -> list[Message]:
+        """Messages without the folded prefix, which the summary stands in for from now on."""
+        kept = list(messages[self._folded:])
+        self._folded, self._folded_digest = 0, _digest([])
+        return kept
+
+    def state(self) -> dict[str, Any]:
+        """What ``restore`` needs to continue this history elsewhere, e.g. in another process."""
+        return {"summary": self.summary, "folded": self._folded, "folded_digest": self._folded_digest}
+
+    def restore(self, state: Mapping[str, Any]) -> "ConversationHistory":
+        self.summary = state.get("summary", "")
+        self._folded = state.get("folded", 0)
+        self._folded_digest = state.get("folded_digest") or _digest([])
+        return self
+
+    def _fold(self, messages: list[dict[str, Any]], upto: int) -> None:
+        if upto <= self._folded:
+            return
+        summary = self.summarize(self.summary, messages[self._folded:upto])
+        lines = summary.split("\n")
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+        self._folded = upto
+        self._folded_digest = _digest(messages[:upto])
+
+    def _summary_message(self) -> list[dict[str, Any]]:
+        return [{"role": "system", "content": SUMMARY_HEADER + self.summary}] if self.summary else []
+
+    def _total(self, system: list[dict[str, Any]], messages: list[dict[str, Any]]) -> int:
+        return message_tokens(system + self._summary_message() + messages[self._folded:])
+
+    def stats(self) -> dict[str, Any]:
+        """Prompt size of the last turn and over all recorded turns."""
+        turns = self.telemetry.recent_events("chat.prompt")
+        if not turns:
+            return {"turns": 0}
+        tokens = [t["tokens"] for t in turns]
+        return {
+            "turns": len(turns),
+            "last_tokens": tokens[-1],
+            "mean_tokens": round(statistics.mean(tokens), 1),
+            "max_tokens": max(tokens),
+            "summary_tokens": turns[-1]["summary_tokens"],
+            "folded_messages": turns[-1]["folded_messages"],
+        }
@@ -0,0 +1,279 @@
+"""Client-side rate limiting and priority queueing of LLM requests."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Mapping, TypeVar
+
+from ..common.telemetry import Telemetry
+from .hedging import percentile
+from .history import message_tokens
+
+T = TypeVar("T")
+
+# Queue priorities; lower runs first.
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class SchedulerOverloaded(RuntimeError):
+    """Raised for a request shed because the queue is full or it waited too long."""
+
+
+def request_tokens(payload: Mapping[str, Any]) -> int:
+    """Tokens a chat completion request counts against a tokens-per-minute limit: prompt plus max_tokens."""
+    return message_tokens(payload.get("messages") or []) + int(payload.get("max_tokens") or 0)
+
+
+class TokenBucket:
+    """
+    Holds up to ``capacity`` units, refilled continuously at ``per_minute``.
+
+    The capacity defaults to one minute's worth, which is how providers
+    enforce their per-minute limits.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None, level: float | None = None, updated: float = 0.0):
+        self.per_minute = per_minute
+        self.capacity = capacity or per_minute
+        self.level = self.capacity if level is None else level
+        self.updated = updated
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until amount is available (amounts above the capacity wait for a full bucket)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) * 60 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateBudget:
+    """
+    Requests-per-minute and tokens-per-minute buckets of one process.
+
+    ``acquire`` takes one request and the given tokens if both buckets have
+    them, and otherwise takes nothing and says how long to wait. A limit of 0
+    is no limit.
+    """
+
+    def __init__(
+        self, requests_per_minute: float = 0, tokens_per_minute: float = 0, clock: Callable[[], float] = time.monotonic
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._buckets = self._fresh_buckets()
+        self._lock = threading.Lock()
+
+    def _fresh_buckets(self) -> dict[str, TokenBucket]:
+        now = self.clock()
+        limits = {"requests": self.requests_per_minute, "tokens": self.tokens_per_minute}
+        return {name: TokenBucket(limit, updated=now) for name, limit in limits.items() if limit}
+
+    @contextmanager
+    def _state(self) -> Iterator[dict[str, TokenBucket]]:
+        with self._lock:
+            yield self._buckets
+
+    def acquire(self, tokens: int) -> float:
+        """0.0 once a request of tokens was granted, else the seconds to wait before asking again."""
+        amounts = {"requests": 1, "tokens": tokens}
+        with self._state() as buckets:
+            now = self.clock()
+            for bucket in buckets.values():
+                bucket.refill(now)
+            wait = max((bucket.wait_for(amounts[name]) for name, bucket in buckets.items()), default=0.0)
+            if wait == 0:
+                for name, bucket in buckets.items():
+                    bucket.take(amounts[name])
+            return wait
+
+
+class SQLiteRateBudget(RateBudget):
+    """
+    RateBudget shared by every process that opens the same SQLite file.
+
+    Bucket levels live in one table and are read and written inside a
+    ``BEGIN IMMEDIATE`` transaction, which holds the database's write lock:
+    one process at a time holds the lease on the budget. The wall clock is
+    used, since monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, path: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        super().__init__(requests_per_minute, tokens_per_minute, clock)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_rate_budget (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _state(self) -> Iterator[dict[str, TokenBucket]]:
+        with self._lock, self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = {name: (level, updated) for name, level, updated in db.execute(
+                    "SELECT name, level, updated FROM llm_rate_budget"
+                )}
+                buckets = {
+                    name: TokenBucket(bucket.per_minute, level=rows[name][0], updated=rows[name][1]) if name in rows else bucket
+                    for name, bucket in self._fresh_buckets().items()
+                }
+                yield buckets
+                db.executemany(
+                    "INSERT OR REPLACE INTO llm_rate_budget (name, level, updated) VALUES (?, ?, ?)",
+                    [(name, bucket.level, bucket.updated) for name, bucket in buckets.items()],
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    shed: bool = field(default=False, compare=False)
+
+
+class LLMScheduler:
+    """
+    Runs LLM requests within a rate budget, queued by priority.
+
+    ``run`` blocks until the request is at the head of the queue (lowest
+    priority value, then arrival) and the budget grants it, then makes the
+    call. At most ``max_queue`` requests wait: when full, a request evicts
+    the newest waiting request of a lower priority or is refused with
+    SchedulerOverloaded, and so is a request still waiting after
+    ``max_wait`` seconds. Interactive chat thereby keeps its place during a
+    spike while background work is shed first.
+
+    Telemetry event ``llm.queue_wait`` records the wait of every granted
+    request in milliseconds; counters ``llm.queue.granted`` and
+    ``llm.queue.shed`` count the outcomes. ``stats()`` summarizes both.
+    """
+
+    def __init__(
+        self,
+        budget: RateBudget,
+        max_queue: int = 64,
+        max_wait: float = 30.0,
+        telemetry: Telemetry | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget = budget
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.telemetry = telemetry or Telemetry()
+        self.clock = clock
+        self._queue: list[_Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def run(self, call: Callable[[], T], tokens: int = 0, priority: int = INTERACTIVE) -> T:
+        """call() once the queue and the budget let a request of tokens through."""
+        started = self.clock()
+        ticket = _Ticket(priority, next(self._seq), tokens)
+        with self._cond:
+            self._enqueue(ticket)
+            try:
+                self._wait_turn(ticket, started)
+            except SchedulerOverloaded:
+                if not ticket.shed:
+                    self._shed(ticket)
+                raise
+        waited_ms = round((self.clock() - started) * 1000, 3)
+        self.telemetry.increment("llm.queue.granted")
+        self.telemetry.record_event("llm.queue_wait", ms=waited_ms, priority=priority, tokens=tokens)
+        return call()
+
+    def _enqueue(self, ticket: _Ticket) -> None:
+        if len(self._queue) >= self.max_queue:
+            victim = max(self._queue)
+            if victim.priority <= ticket.priority:
+                self._shed(ticket)
+                raise SchedulerOverloaded(f"The LLM request queue is full ({self.max_queue} waiting).")
+            self._shed(victim)
+        heapq.heappush(self._queue, ticket)
+        self._cond.notify_all()
+
+    def _wait_turn(self, ticket: _Ticket, started: float) -> None:
+        while True:
+            if ticket.shed:
+                raise SchedulerOverloaded("The LLM request was shed for a more urgent one.")
+            timeout = None
+            if self._queue[0] is ticket:
+                timeout = self.budget.acquire(ticket.tokens)
+                if timeout == 0:
+                    heapq.heappop(self._queue)
+                    self._cond.notify_all()
+                    return
+            remaining = self.max_wait - (self.clock() - started)
+            if remaining <= 0:
+                raise SchedulerOverloaded(f"The LLM request waited more than {self.max_wait:g}s for the rate limit.")
+            self._cond.wait(remaining if timeout is None else min(timeout, remaining))
+
+    def _shed(self, ticket: _Ticket) -> None:
+        ticket.shed = True
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+        self.telemetry.increment("llm.queue.shed")
+        logging.getLogger(self.__class__.__name__).warning(f"Shedding LLM request of priority {ticket.priority}")
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> dict[str, float]:
+        """Queue depth, granted and shed requests, and p50/p95 queue wait in milliseconds."""
+        waits = [e["ms"] for e in self.telemetry.recent_events("llm.queue_wait")]
+        counters = self.telemetry.counters()
+        return {
+            "depth": self.depth(),
+            "granted": counters.get("llm.queue.granted", 0),
+            "shed": counters.get("llm.queue.shed", 0),
+            "wait_p50_ms": percentile(waits, 0.5) if waits else 0.0,
+            "wait_p95_ms": percentile(waits, 0.95) if waits else 0.0,
+        }
+
+
+@lru_cache(maxsize=None)
+def shared_scheduler(
+    requests_per_minute: float = 0, tokens_per_minute: float = 0, max_queue: int = 64, lease_path: str | None = None
+) -> LLMScheduler:
+    """One scheduler per setting for the whole process, so every session draws from the same budget.
+
+    With lease_path the budget is also shared with other processes (see SQLiteRateBudget).
+    """
+    if lease_path:
+        budget: RateBudget = SQLiteRateBudget(lease_path, requests_per_minute, tokens_per_minute)
+    else:
+        budget = RateBudget(requests_per_minute, tokens_per_minute)
+    return LLMScheduler(budget, max_queue=max_queue)
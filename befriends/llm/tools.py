@@ -0,0 +1,181 @@
+"""Catalog tools the LLM can call instead of reading events from the prompt."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+from typing import Any, Callable
+
+from ..domain.event import Event
+from ..domain.filters import EventFilter
+from ..recommendation.context import RetrievalContext
+from ..recommendation.similar import similar_index_for
+from ..response.event_context import FORMAT_NOTE, events_to_context
+
+# Descriptions are cut to this many characters in get_event answers.
+DESCRIPTION_CHARS = 500
+
+_DATE = {"type": "string", "description": "YYYY-MM-DD"}
+
+DEFINITIONS: list[dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_events",
+            "description": f"Find upcoming events; omitted arguments default to the user's filters. Returns a table ({FORMAT_NOTE}).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "free text"},
+                    "region": {"type": "string", "description": "e.g. 'Basel (CH)'"},
+                    "event_type": {"type": "string", "description": "e.g. 'Concert'"},
+                    "date_from": _DATE,
+                    "date_to": _DATE,
+                    "free_only": {"type": "boolean"},
+                    "max_results": {"type": "integer", "minimum": 1, "maximum": 10},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_event",
+            "description": "Details of one event.",
+            "parameters": {
+                "type": "object",
+                "properties": {"event_id": {"type": "string"}},
+                "required": ["event_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "similar_events",
+            "description": "Upcoming events similar to one event. Returns a table.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "event_id": {"type": "string"},
+                    "max_results": {"type": "integer", "minimum": 1, "maximum": 10},
+                },
+                "required": ["event_id"],
+            },
+        },
+    },
+]
+
+
+class EventTools:
+    """
+    ``search_events``, ``get_event`` and ``similar_events`` over one chat turn.
+
+    Retrievals go through the turn's RetrievalContext, so repeated calls with
+    the same arguments are answered from memory. Answers are compact event
+    tables (see EventContextEncoder). Every event shown to the model is kept in
+    ``returned``, in order, for the recommendation panel.
+
+    ``call`` never raises: bad arguments and retrieval errors are reported to
+    the model as ``error: ...`` so it can correct itself.
+    """
+
+    def __init__(
+        self,
+        context: RetrievalContext,
+        profile: dict | None = None,
+        defaults: EventFilter | None = None,
+        today: datetime.date | None = None,
+        encode_events: Callable[..., str] = events_to_context,
+        generation: str | None = None,
+        max_results: int = 5,
+    ):
+        self.context = context
+        self.profile = profile or {}
+        self.today = today or datetime.date.today()
+        self.defaults = defaults or context.recommender.effective_filters(None, self.profile, self.today)
+        self.encode_events = encode_events
+        self.generation = generation
+        self.max_results = max_results
+        self.returned: list[Event] = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def definitions() -> list[dict[str, Any]]:
+        """OpenAI ``tools`` entries of the three tools."""
+        return DEFINITIONS
+
+    def call(self, name: str | None, arguments: str) -> str:
+        """Run tool name with its JSON-encoded arguments and return the text for the model."""
+        handlers: dict[str, Callable[..., str]] = {
+            "search_events": self.search_events,
+            "get_event": self.get_event,
+            "similar_events": self.similar_events,
+        }
+        handler = handlers.get(name or "")
+        if handler is None:
+            self.logger.warning(f"Model called unknown tool {name!r}")
+            return f"error: unknown tool {name!r}"
+        try:
+            kwargs = json.loads(arguments or "{}")
+            if not isinstance(kwargs, dict):
+                raise TypeError("arguments must be a JSON object")
+            return handler(**kwargs)
+        except Exception as e:
+            self.logger.warning(f"Tool {name} failed with arguments {arguments!r}: {e}")
+            return f"error: {e}"
+
+    def _limit(self, max_results: Any) -> int:
+        return max(1, min(int(max_results or self.max_results), 10))
+
+    def _table(self, events: list[Event], limit: int) -> str:
+        events = events[:limit]
+        table = self.encode_events(events, max_events=limit, generation=self.generation)
+        # Rows that did not fit the token budget were not shown; ids are the first column
+        in_table = {line.split("|", 1)[0] for line in table.split("\n")[1:]}
+        shown = {e.id for e in self.returned}
+        self.returned.extend(e for e in events if e.id in in_table and e.id not in shown)
+        return table or "no events found"
+
+    def search_events(
+        self,
+        query: str = "",
+        region: str | None = None,
+        event_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        free_only: bool = False,
+        max_results: int | None = None,
+    ) -> str:
+        """Upcoming events for the query, with the user's filters as defaults."""
+        given = {"region": region, "event_type": event_type, "date_from": date_from, "date_to": date_to}
+        filters = self.defaults.replace(**{k: v for k, v in given.items() if v is not None})
+        if free_only:
+            filters = filters.replace(is_free=True)
+        limit = self._limit(max_results)
+        if query:
+            events = self.context.recommender.recommend_events(filters, self.profile, limit, today=self.today, text=query)
+        else:
+            events = self.context.recommend(filters, self.profile, limit, today=self.today)
+        return self._table(events, limit)
+
+    def get_event(self, event_id: str) -> str:
+        """One event's row plus its (shortened) description."""
+        event = self.context.repository.find_by_id(str(event_id))
+        if event is None:
+            return f"error: no event with id {event_id!r}"
+        table = self._table([event], 1)
+        description = " ".join((event.description or "").split())
+        if len(description) > DESCRIPTION_CHARS:
+            description = description[:DESCRIPTION_CHARS].rsplit(" ", 1)[0] + " …"
+        return f"{table}\ndescription: {description}" if description else table
+
+    def similar_events(self, event_id: str, max_results: int | None = None) -> str:
+        """Upcoming look-alikes of an event from the neighbour index."""
+        limit = self._limit(max_results)
+        neighbours = similar_index_for(self.context.repository).similar(str(event_id), limit=limit)
+        if neighbours is None:
+            return f"error: no event with id {event_id!r}"
+        events = self.context.repository.find_by_ids([n for n, _ in neighbours])
+        return self._table(events, limit)
@@ -0,0 +1,204 @@
+"""Pooled HTTP transport with retries and a circuit breaker for the LLM endpoint."""
+
+from __future__ import annotations
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..common.telemetry import Telemetry
+
+# Upstream answers worth retrying: rate limited or temporarily broken.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the backend while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated backend failures.
+
+    After ``failure_threshold`` consecutive failed calls the circuit opens and
+    every call is refused for ``reset_timeout`` seconds. Then one probe call is
+    let through (half-open): its success closes the circuit, its failure opens
+    it again for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """``"closed"``, ``"open"`` or ``"half_open"``."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if self.clock() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the probe slot when half-open."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._probing = False
+
+
+def retry_after_seconds(response: requests.Response, now: float | None = None) -> float | None:
+    """Delay requested by a Retry-After header (seconds or HTTP date), if any."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - (time.time() if now is None else now), 0.0)
+
+
+class LLMTransport:
+    """
+    Keep-alive connection pool for the LLM endpoint with retries and a circuit breaker.
+
+    Requests go through one ``requests.Session``, so TCP and TLS setup is paid
+    once per pooled connection instead of once per chat turn. Connection
+    errors and 429/5xx answers are retried up to ``max_retries`` times after a
+    full-jitter exponential backoff (uniform in [0, min(backoff_max,
+    backoff_base * 2**attempt)]), or after the server's Retry-After if it sent
+    one and it is at most ``max_retry_after``. Read timeouts are not retried:
+    the backend is up but slow, and a retry would only double the wait.
+
+    A call that still fails counts against the circuit breaker; while it is
+    open, ``post`` raises ``CircuitOpenError`` without touching the network.
+    Counters ``llm.retry``, ``llm.failure`` and ``llm.circuit_open`` are kept on
+    the telemetry instance.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        max_retry_after: float = 30.0,
+        pool_size: int = 10,
+        breaker: CircuitBreaker | None = None,
+        telemetry: Telemetry | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self.telemetry = telemetry or Telemetry()
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.session = requests.Session()
+        # Retries are ours; urllib3 must not retry underneath.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay before retry number attempt + 1."""
+        return self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post(self, url: str, headers: dict[str, str], json: Any, stream: bool = False) -> requests.Response:
+        """POST through the pool; returns the final response, whatever its status.
+
+        Raises CircuitOpenError while the breaker is open, and the last
+        requests exception if no attempt got a response.
+        """
+        logger = logging.getLogger(self.__class__.__name__)
+        if not self.breaker.allow():
+            self.telemetry.increment("llm.circuit_open")
+            raise CircuitOpenError("The chatbot backend is unavailable right now; not calling it.")
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(
+                    url, headers=headers, json=json, timeout=(self.connect_timeout, self.read_timeout), stream=stream
+                )
+            except requests.ConnectionError as e:
+                # ConnectTimeout is a ConnectionError too; ReadTimeout is not and propagates.
+                if attempt >= self.max_retries:
+                    self._failed()
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"LLM request failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+            except requests.RequestException:
+                self._failed()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                requested = retry_after_seconds(response)
+                if attempt >= self.max_retries or (requested is not None and requested > self.max_retry_after):
+                    self._failed()
+                    return response
+                delay = requested if requested is not None else self.backoff(attempt)
+                logger.warning(f"LLM request got HTTP {response.status_code}; retry {attempt + 1} in {delay:.2f}s")
+                response.close()
+            self.telemetry.increment("llm.retry")
+            self.sleep(delay)
+            attempt += 1
+
+    def _failed(self) -> None:
+        self.telemetry.increment("llm.failure")
+        self.breaker.record_failure()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+@lru_cache(maxsize=None)
+def shared_transport(
+    connect_timeout: float = 5.0, read_timeout: float = 30.0, max_retries: int = 3, telemetry: Telemetry | None = None
+) -> LLMTransport:
+    """One transport per setting for the whole process, so connections and breaker state outlive a client.
+
+    Streamlit re-creates the ChatbotClient on every script run; the pool and
+    the breaker must not be re-created with it. Pass the application's
+    telemetry so the retry and breaker counters show up with its others.
+    """
+    return LLMTransport(
+        connect_timeout=connect_timeout, read_timeout=read_timeout, max_retries=max_retries, telemetry=telemetry
+    )
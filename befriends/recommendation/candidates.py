@@ -0,0 +1,135 @@
+"""
+Materialized recommendation candidates per region and standard date window.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+from typing import Iterable
+
+from befriends.domain.event import Event
+from befriends.domain.filters import EventFilter
+
+WINDOWS = ("today", "weekend", "week", "month")
+
+
+def window_bounds(window: str, today: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """(date_from, date_to) of a standard window, as the UI and chatbot compute it."""
+    if window == "today":
+        return today, today
+    if window == "weekend":
+        saturday = today + datetime.timedelta(days=(5 - today.weekday()) % 7)
+        return saturday, saturday + datetime.timedelta(days=1)
+    if window == "week":
+        monday = today - datetime.timedelta(days=today.weekday())
+        return monday, monday + datetime.timedelta(days=6)
+    if window == "month":
+        return today, today + datetime.timedelta(days=30)
+    raise ValueError(f"Unknown window: {window}")
+
+
+def _in_window(start: datetime.date, date_from: datetime.date, date_to: datetime.date) -> bool:
+    # Mirrors CatalogRepository._predicates: equal bounds select one day, otherwise
+    # start_datetime <= date_to compares against midnight, so date_to itself is excluded.
+    if date_from == date_to:
+        return start == date_from
+    return date_from <= start < date_to
+
+
+class CandidateLists:
+    """
+    Soonest-first upcoming events for every region × standard window, plus all regions.
+
+    Lists are keyed by the exact ``EventFilter`` that ``recommend_events``
+    builds for that region and window, so serving one is a dict lookup.
+    Each list keeps the first ``limit`` events.
+    """
+
+    def __init__(self, limit: int = 50, built_on: datetime.date | None = None):
+        self.limit = limit
+        self.built_on = built_on or datetime.date.today()
+        self.lists: dict[EventFilter, tuple[Event, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.lists)
+
+    def load(self, events: Iterable[Event], today: datetime.date) -> "CandidateLists":
+        """Rebuild every list from upcoming events in start order."""
+        bounds = [window_bounds(window, today) for window in WINDOWS]
+        # One bucket per (region, window); region None collects every region.
+        buckets: dict[str | None, list[list[Event]]] = {None: [[] for _ in bounds]}
+        canonical: dict[str | None, str | None] = {}
+        for event in events:
+            if not isinstance(event.start_datetime, datetime.datetime):
+                continue
+            start = event.start_datetime.date()
+            if start < today:
+                continue
+            raw = event.region_standardized
+            if raw not in canonical:
+                canonical[raw] = EventFilter.of(region=raw).region
+            region = canonical[raw]
+            targets = [buckets[None]]
+            if region is not None:
+                targets.append(buckets.setdefault(region, [[] for _ in bounds]))
+            for i, (date_from, date_to) in enumerate(bounds):
+                if _in_window(start, date_from, date_to):
+                    for region_buckets in targets:
+                        if len(region_buckets[i]) < self.limit:
+                            region_buckets[i].append(event)
+        # Empty windows are kept too, so they are answered without a query.
+        self.lists = {
+            EventFilter(region=region, date_from=date_from, date_to=date_to): tuple(bucket)
+            for region, region_buckets in buckets.items()
+            for (date_from, date_to), bucket in zip(bounds, region_buckets)
+        }
+        self.built_on = today
+        return self
+
+    def get(self, filters: EventFilter, max_events: int) -> list[Event] | None:
+        """The first max_events candidates for filters, or None if they are not materialized."""
+        if max_events > self.limit:
+            return None
+        # An explicit "All" region is served from the every-region lists
+        events = self.lists.get(filters.replace(all_regions=False) if filters.all_regions else filters)
+        return None if events is None else list(events[:max_events])
+
+
+def candidate_lists_for(repo) -> CandidateLists:
+    """Return the shared candidate lists of a catalog.
+
+    They are recomputed right after every upsert and rebuilt once the date
+    rolls over, since the windows move with it.
+    """
+    logger = logging.getLogger("CandidateLists")
+    today = datetime.date.today()
+
+    def upcoming() -> list[Event]:
+        from sqlalchemy import func
+        from befriends.catalog.orm import EventORM
+        last = max(window_bounds(window, today)[1] for window in WINDOWS)
+        session = repo.Session()
+        try:
+            rows = (
+                session.query(EventORM)
+                .filter(func.date(EventORM.start_datetime) >= today, func.date(EventORM.start_datetime) <= last)
+                .order_by(EventORM.start_datetime.asc())
+            )
+            return [row.to_domain() for row in rows]
+        finally:
+            session.close()
+
+    def build() -> CandidateLists:
+        lists = CandidateLists().load(upcoming(), today)
+        logger.info(f"Materialized {len(lists)} recommendation candidate lists")
+        return lists
+
+    def update(lists: CandidateLists, events: list, generation: str) -> None:
+        lists.load(upcoming(), today)
+
+    lists = repo.derived_index("recommendation_candidates", build, update)
+    if lists.built_on != today:
+        repo.invalidate_derived("recommendation_candidates")
+        lists = repo.derived_index("recommendation_candidates", build, update)
+    return lists
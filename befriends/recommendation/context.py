@@ -0,0 +1,84 @@
+"""
+Retrieval shared by everything that answers one chat turn.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+from typing import Any, Hashable, Mapping, Optional
+
+from befriends.domain.event import Event
+from befriends.domain.filters import EventFilter
+from befriends.recommendation.service import RecommendationService
+
+
+def _profile_key(profile: Optional[Mapping[str, Any]]) -> str:
+    return json.dumps(profile or {}, sort_keys=True, default=str)
+
+
+class RetrievalContext:
+    """
+    Memoized retrievals of one chat turn.
+
+    The chatbot's existence check, the events put into the LLM prompt and the
+    recommendation panel ask for overlapping event sets while one turn is
+    answered. Within a context each distinct (text, filter) or
+    (filter, profile, size) signature is retrieved once, existence checks are
+    answered from results already fetched or else a single EXISTS query, and
+    ``shared_events`` holds the set given to the LLM so the panel can show the
+    same events. Create one per turn; results are not invalidated.
+    """
+
+    def __init__(self, repository, recommender: Optional[RecommendationService] = None):
+        self.repository = repository
+        self.recommender = recommender or RecommendationService(repository)
+        self.shared_events: Optional[list[Event]] = None
+        self._results: dict[Hashable, list[Event]] = {}
+        self._exists: dict[EventFilter, bool] = {}
+
+    def _memoized(self, key: Hashable, fetch) -> list[Event]:
+        if key in self._results:
+            self.repository.telemetry.increment("turn_context.hit")
+            return list(self._results[key])
+        self.repository.telemetry.increment("turn_context.miss")
+        events = self._results[key] = list(fetch())
+        return list(events)
+
+    def search(self, text: str = "", filters=None) -> list[Event]:
+        """``repository.search_text(text, filters)``, once per signature."""
+        filters = EventFilter.of(filters)
+        events = self._memoized(("search", text, filters), lambda: self.repository.search_text(text, filters))
+        if not text:
+            self._exists[filters] = bool(events)
+        return events
+
+    def recommend(
+        self,
+        filters=None,
+        profile: Optional[dict] = None,
+        max_events: int = 6,
+        today: Optional[datetime.date] = None,
+    ) -> list[Event]:
+        """``recommender.recommend_events``, once per signature."""
+        day = today.date() if isinstance(today, datetime.datetime) else today or datetime.date.today()
+        filters = self.recommender.effective_filters(filters, profile, day)
+        key = ("recommend", filters, _profile_key(profile), max_events, day)
+        events = self._memoized(key, lambda: self.recommender.recommend_events(filters, profile or {}, max_events, today=today))
+        # An empty list may also be a swallowed error, so only a hit settles existence.
+        if events:
+            self._exists[filters] = True
+        return events
+
+    def exists(self, filters=None) -> bool:
+        """Whether any upcoming event passes filters, reusing what this turn already fetched."""
+        filters = EventFilter.of(filters)
+        if filters not in self._exists:
+            self.repository.telemetry.increment("turn_context.exists_query")
+            self._exists[filters] = self.repository.exists(filters)
+        return self._exists[filters]
+
+    def share(self, events: list[Event]) -> list[Event]:
+        """Remember the events given to the LLM; the recommendation panel shows them."""
+        self.shared_events = list(events)
+        return events
@@ -0,0 +1,262 @@
+"""
+Vectorized scoring of candidate events against user profiles.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable
+
+import numpy as np
+
+from befriends.search.trigram import fold_text
+
+# Shorter words ("and", "of", ...) carry no interest signal.
+MIN_TOKEN_LENGTH = 3
+
+
+def _stem(word: str) -> str:
+    # Plural "s" only, so "concerts" meets "Concert" and "festivals" meets "Festival".
+    return word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def words(values: Iterable[Any]) -> set[str]:
+    """Folded, singularized words of the string items in values."""
+    tokens: set[str] = set()
+    for value in values:
+        if isinstance(value, str):
+            tokens.update(_stem(w) for w in fold_text(value).split() if len(w) >= MIN_TOKEN_LENGTH)
+    return tokens
+
+
+def event_words(event: Any) -> set[str]:
+    """Words of the event attributes that profile interests are matched against."""
+    values = []
+    for field in EventEncodings.FIELDS:
+        value = getattr(event, field, None)
+        values.extend(value if isinstance(value, list) else [value])
+    return words(values)
+
+
+def profile_words(profile: dict) -> set[str]:
+    interests = (profile or {}).get("interests") or []
+    return words(interests if isinstance(interests, list) else [interests])
+
+
+def is_personal(profile: dict | None) -> bool:
+    """Whether the profile carries anything to score against (interests or an age)."""
+    return bool(profile_words(profile or {})) or not np.isnan(_as_float((profile or {}).get("age")))
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value) if value not in (None, "") else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class EventEncodings:
+    """
+    Sparse word vectors and age ranges of every event in a catalog.
+
+    Vectors are stored CSR-style: the word columns and weights of row ``r``
+    are ``entry_columns[row_start[r]:row_end[r]]`` (and ``entry_weights``);
+    each event's weights are 1/sqrt(word count). Upserts append the new
+    entries of changed events and point their rows at them, so encodings are
+    built once per catalog and patched afterwards; once more than
+    ``max_dead_fraction`` of the entries are orphaned the arrays are compacted.
+    """
+
+    FIELDS = ("event_type", "dance_style", "user_category", "age_group_label")
+
+    def __init__(self, max_dead_fraction: float = 0.5) -> None:
+        self.max_dead_fraction = max_dead_fraction
+        self.vocabulary: dict[str, int] = {}
+        self.row_of: dict[str, int] = {}
+        # (row_start, row_end, entry_columns, entry_weights), replaced as a whole
+        # so a concurrent event_matrix never pairs offsets with other entries.
+        self._entries: tuple[np.ndarray, ...] = (
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32),
+        )
+        self.age_min = np.zeros(0, dtype=np.float32)
+        self.age_max = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    @property
+    def row_start(self) -> np.ndarray:
+        return self._entries[0]
+
+    @property
+    def row_end(self) -> np.ndarray:
+        return self._entries[1]
+
+    @property
+    def entry_columns(self) -> np.ndarray:
+        return self._entries[2]
+
+    @property
+    def entry_weights(self) -> np.ndarray:
+        return self._entries[3]
+
+    @classmethod
+    def build(cls, events: Iterable[Any]) -> "EventEncodings":
+        encodings = cls()
+        encodings.upsert(events)
+        return encodings
+
+    def upsert(self, events: Iterable[Any]) -> None:
+        """Encode new events and re-encode changed ones."""
+        columns: list[int] = []
+        weights: list[float] = []
+        age_min, age_max, changed = [], [], []
+        latest = {str(getattr(event, "id", None)): event for event in events}
+        offset = len(self.entry_columns)
+        for event_id, event in latest.items():
+            row = self.row_of.get(event_id)
+            if row is None:
+                row = self.row_of[event_id] = len(self.row_of)
+                age_min.append(np.nan)
+                age_max.append(np.nan)
+            tokens = event_words(event)
+            start = offset + len(columns)
+            for word in tokens:
+                columns.append(self.vocabulary.setdefault(word, len(self.vocabulary)))
+                weights.append(1.0 / np.sqrt(len(tokens)))
+            changed.append((row, start, offset + len(columns),
+                            _as_float(getattr(event, "age_min", None)), _as_float(getattr(event, "age_max", None))))
+        if not changed:
+            return
+        changed_rows = np.fromiter((c[0] for c in changed), dtype=np.int64)
+        grow = np.zeros(len(self.row_of) - len(self.row_start), dtype=np.int64)
+        row_start = np.concatenate([self.row_start, grow])
+        row_end = np.concatenate([self.row_end, grow])
+        row_start[changed_rows] = [c[1] for c in changed]
+        row_end[changed_rows] = [c[2] for c in changed]
+        entries: tuple[np.ndarray, ...] = (
+            row_start, row_end,
+            np.concatenate([self.entry_columns, np.asarray(columns, dtype=np.int64)]),
+            np.concatenate([self.entry_weights, np.asarray(weights, dtype=np.float32)]),
+        )
+        live = int((row_end - row_start).sum())
+        if len(entries[2]) - live > self.max_dead_fraction * len(entries[2]):
+            entries = self._compact(*entries)
+        self.age_min = np.concatenate([self.age_min, np.asarray(age_min, dtype=np.float32)])
+        self.age_max = np.concatenate([self.age_max, np.asarray(age_max, dtype=np.float32)])
+        self.age_min[changed_rows] = [c[3] for c in changed]
+        self.age_max[changed_rows] = [c[4] for c in changed]
+        self._entries = entries
+
+    @staticmethod
+    def _entry_positions(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Indices of the entries of every [start, end) range, range after range."""
+        lengths = ends - starts
+        first = np.cumsum(lengths) - lengths
+        return np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(starts - first, lengths)
+
+    def _compact(self, row_start, row_end, columns, weights) -> tuple[np.ndarray, ...]:
+        """Drop orphaned entries and lay the rows out in order."""
+        live = self._entry_positions(row_start, row_end)
+        lengths = row_end - row_start
+        row_end = np.cumsum(lengths)
+        return row_end - lengths, row_end, columns[live], weights[live]
+
+    def rows(self, events: list[Any]) -> np.ndarray:
+        """Row of each event, -1 for events that are not encoded."""
+        return np.fromiter((self.row_of.get(str(getattr(e, "id", None)), -1) for e in events), dtype=np.int64, count=len(events))
+
+    def profile_matrix(self, profiles: list[dict]) -> np.ndarray:
+        """(len(profiles), vocabulary) binary interest vectors."""
+        matrix = np.zeros((len(profiles), len(self.vocabulary)), dtype=np.float32)
+        for i, profile in enumerate(profiles):
+            matrix[i, [self.vocabulary[w] for w in profile_words(profile) if w in self.vocabulary]] = 1.0
+        return matrix
+
+    def event_matrix(self, rows: np.ndarray) -> np.ndarray:
+        """(len(rows), vocabulary) dense word vectors of the given rows, gathered from their entries."""
+        row_start, row_end, columns, weights = self._entries
+        # Rows added by an upsert that has not published its entries yet score as unknown
+        known = np.nonzero((rows >= 0) & (rows < len(row_start)))[0]
+        starts, ends = row_start[rows[known]], row_end[rows[known]]
+        entries = self._entry_positions(starts, ends)
+        matrix = np.zeros((len(rows), len(self.vocabulary)), dtype=np.float32)
+        matrix[np.repeat(known, ends - starts), columns[entries]] = weights[entries]
+        return matrix
+
+
+class ProfileScorer:
+    """
+    Scores every (profile, event) pair of a batch with a few matrix operations.
+
+    score = interest_weight * interest overlap
+            - age_weight * years outside the event's age range
+            - recency_weight * position in the (soonest-first) candidate list
+
+    Interest overlap is the dot product of a profile's binary word vector with
+    an event's word vector (see EventEncodings), so a single profile costs one
+    matrix-vector product. Unknown ages or ranges cost nothing, and with no
+    interests at all the candidates keep their soonest-first order.
+    """
+
+    def __init__(self, interest_weight: float = 1.0, age_weight: float = 0.1, recency_weight: float = 0.05):
+        self.interest_weight = interest_weight
+        self.age_weight = age_weight
+        self.recency_weight = recency_weight
+
+    def score(self, profiles: list[dict], events: list[Any], encodings: EventEncodings | None = None) -> np.ndarray:
+        """Return a (len(profiles), len(events)) float32 score matrix.
+
+        encodings should be the catalog's per-generation encodings; without
+        them the events are encoded on the fly.
+        """
+        encodings = encodings or EventEncodings.build(events)
+        rows = encodings.rows(events)
+        interest = encodings.profile_matrix(profiles) @ encodings.event_matrix(rows).T
+
+        ages = np.array([_as_float((p or {}).get("age")) for p in profiles], dtype=np.float32)[:, None]
+        known = rows >= 0
+        age_min = np.where(known, encodings.age_min[rows], np.nan)[None, :]
+        age_max = np.where(known, encodings.age_max[rows], np.nan)[None, :]
+        # fmax ignores NaN, so a missing age or bound contributes 0 years.
+        years_outside = np.fmax(age_min - ages, 0) + np.fmax(ages - age_max, 0)
+
+        position = np.arange(len(events), dtype=np.float32)[None, :] / max(len(events), 1)
+        return (
+            self.interest_weight * interest
+            - self.age_weight * years_outside
+            - self.recency_weight * position
+        ).astype(np.float32)
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Column indices of the k best scores per row, best first."""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.zeros((scores.shape[0], 0), dtype=np.int64)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1)
+
+
+def interest_encodings_for(repo) -> EventEncodings:
+    """Return the shared event encodings of a catalog, patched in place by imports."""
+    logger = logging.getLogger("EventEncodings")
+
+    def build() -> EventEncodings:
+        from befriends.catalog.orm import EventORM
+        columns = ("age_min", "age_max", *EventEncodings.FIELDS)
+        session = repo.Session()
+        try:
+            rows = session.query(EventORM.id, *(getattr(EventORM, c) for c in columns)).all()
+        finally:
+            session.close()
+        encodings = EventEncodings.build(rows)
+        logger.info(f"Encoded {len(encodings)} events over {len(encodings.vocabulary)} interest words")
+        return encodings
+
+    def update(encodings: EventEncodings, events: list, generation: str) -> None:
+        encodings.upsert(events)
+
+    return repo.derived_index("interest_encodings", build, update)
@@ -5,12 +5,15 @@ Supports dependency injection for repository.
 """
 
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Mapping, Tuple, Union
 from befriends.catalog.repository import CatalogRepository
 from befriends.domain.event import Event
+from befriends.domain.filters import EventFilter
+from befriends.recommendation.candidates import candidate_lists_for
+from befriends.recommendation.scoring import ProfileScorer, interest_encodings_for, is_personal
+from befriends.search.embedding import embedding_index_for
 import datetime
 import logging
-import copy
 
 
 class RecommendationService:
@@ -19,18 +22,40 @@ class RecommendationService:
     Accepts a repository dependency for testability and flexibility.
     """
 
-    def __init__(self, repository: CatalogRepository):
+    def __init__(self, repository: CatalogRepository, scorer: Optional[ProfileScorer] = None, candidate_pool: int = 50):
         """
         Initialize RecommendationService.
         Args:
             repository (CatalogRepository): The event repository to use.
+            scorer (Optional[ProfileScorer]): Scores candidates against profile interests and age.
+            candidate_pool (int): Soonest candidates scored per personalised request.
         """
         self.repository = repository
+        self.scorer = scorer or ProfileScorer()
+        self.candidate_pool = candidate_pool
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    @staticmethod
+    def effective_filters(
+        filters: Union[EventFilter, Mapping[str, Any], None],
+        profile: Optional[Dict[str, Any]],
+        today: datetime.date,
+    ) -> EventFilter:
+        """Filters with the default window (today + 30 days) and the profile's city as region."""
+        filters = EventFilter.of(filters)
+        # Only set defaults if missing
+        if filters.date_from is None:
+            filters = filters.replace(date_from=today)
+        if filters.date_to is None:
+            filters = filters.replace(date_to=today + datetime.timedelta(days=30))
+        # Region from the filters if set, otherwise the profile's city
+        if filters.region_unset and profile and profile.get('city'):
+            filters = filters.replace(region=profile['city'])
+        return filters
+
     def recommend_events(
         self,
-        filters: Dict[str, Any],
+        filters: Union[EventFilter, Mapping[str, Any], None],
         profile: Dict[str, Any],
         max_events: int = 6,
         today: Optional[datetime.date] = None,
@@ -39,8 +64,11 @@ class RecommendationService:
         """
         Recommend events based on filters, user profile, and optional free-text query.
 
+        Candidates are ranked for the profile's interests and age when it has
+        any (see ProfileScorer), otherwise they are returned soonest first.
+
         Args:
-            filters (Dict[str, Any]): Filtering options (city, category, etc.)
+            filters (EventFilter | Mapping | None): Filtering options (region, event_type, etc.)
             profile (Dict[str, Any]): User profile (city, interests, etc.)
             max_events (int): Max number of events to return
             today (Optional[datetime.date]): Override for 'now'. Defaults to today.
@@ -49,41 +77,151 @@ class RecommendationService:
         Returns:
             List[Event]: Recommended events
         """
-        filters = copy.deepcopy(filters)  # Deepcopy FIRST, before any other code
         self.logger.info(f"[DEBUG] recommend_events called with filters: {filters}")
         self.logger.info(f"[DEBUG] recommend_events called with profile: {profile}")
-        self.logger.info(f"[DEBUG] recommend_events initial city: {filters.get('city')}, region_standardized: {filters.get('region_standardized')}")
         if today is None:
             today = datetime.date.today()
         try:
-            # Only set defaults if missing or None
-            if 'date_from' not in filters or filters['date_from'] is None:
-                filters['date_from'] = today
-            if 'date_to' not in filters or filters['date_to'] is None:
-                filters['date_to'] = today + datetime.timedelta(days=30)
-            # NEW LOGIC: Always use region_standardized from filters if set
-            if filters.get('region_standardized') not in (None, '', ' '):
-                pass  # region_standardized already set by UI
-            # Otherwise, set region_standardized from profile if empty
-            elif profile and profile.get('city'):
-                filters['region_standardized'] = profile['city']
-            self.logger.info(f"[DEBUG] recommend_events after region/city logic: city={filters.get('city')}, region_standardized={filters.get('region_standardized')}")
-            self.logger.info(f"[DEBUG] recommend_events filters after defaults: {filters}")
+            filters = self.effective_filters(filters, profile, today)
+            self.logger.info(f"[DEBUG] recommend_events filters after defaults: {filters.as_dict()}")
             # If a free-text query is provided, use full-text search
             if text:
                 self.logger.info(f"[DEBUG] recommend_events using search_text with text='{text}' and filters={filters}")
                 events = self.repository.search_text(text, filters)
                 self.logger.info(f"[DEBUG] recommend_events search_text('{text}') returned {len(events)} events")
+                if len(events) < max_events:
+                    events += self._semantic_candidates(text, filters, max_events - len(events), {e.id for e in events})
                 for ev in events:
                     self.logger.info(f"[DEBUG] Event: name={getattr(ev, 'event_name', None)}, city={getattr(ev, 'city', None)}, region_standardized={getattr(ev, 'region_standardized', None)}, organizer={getattr(ev, 'organizer', None)}")
-                return events[:max_events]
-            # Otherwise, use filters/profile for recommendations
+                return self._rank_for_profile(events, profile, max_events)
+            # Otherwise, serve the standard region/window combinations from the materialized lists
+            personal = is_personal(profile)
+            pool = max(max_events, self.candidate_pool) if personal else max_events
+            materialized = self._materialized_candidates(filters, pool)
+            if materialized is not None:
+                return self._rank_for_profile(materialized, profile, max_events)
+            # Unusual filter sets fall back to a live query
             self.logger.info(f"[DEBUG] recommend_events using search_text with empty text and filters={filters}")
             events = self.repository.search_text("", filters)
             self.logger.info(f"[DEBUG] recommend_events search_text('') returned {len(events)} events")
             for ev in events:
                 self.logger.info(f"[DEBUG] Event: name={getattr(ev, 'event_name', None)}, city={getattr(ev, 'city', None)}, region_standardized={getattr(ev, 'region_standardized', None)}, organizer={getattr(ev, 'organizer', None)}")
-            return events[:max_events]
+            return self._rank_for_profile(events[:pool], profile, max_events)
         except Exception as e:
             self.logger.error(f"Error in recommend_events: {e}")
             return []
+
+    def _rank_for_profile(self, events: List[Event], profile: Optional[Dict[str, Any]], max_events: int) -> List[Event]:
+        """
+        The max_events candidates that best fit the profile, or the first ones if it has nothing to score.
+
+        Failures only cost the personalisation.
+        """
+        if not events or not is_personal(profile):
+            return events[:max_events]
+        try:
+            encodings = interest_encodings_for(self.repository)
+            top = self.scorer.top_k(self.scorer.score([profile or {}], events, encodings), max_events)[0]
+            return [events[j] for j in top]
+        except Exception as e:
+            self.logger.warning(f"Profile scoring unavailable: {e}")
+            return events[:max_events]
+
+    def recommend_many(
+        self,
+        profiles: Iterable[Dict[str, Any]],
+        filters: Union[EventFilter, Mapping[str, Any], None] = None,
+        k: int = 6,
+        today: Optional[datetime.date] = None,
+        batch_size: int = 500,
+        candidate_limit: int = 200,
+    ) -> Iterator[Tuple[Dict[str, Any], List[Event]]]:
+        """
+        Recommend k events to each of many profiles, e.g. for a weekly digest.
+
+        Profiles are read in batches and grouped by their effective filters
+        (region from the profile's city, date window), so each candidate set is
+        fetched once per batch (and served from the search cache after that).
+        Candidates are scored for the whole group at once by the ProfileScorer.
+
+        Args:
+            profiles (Iterable[Dict[str, Any]]): User profiles (city, interests, age)
+            filters (EventFilter | Mapping | None): Filters shared by all profiles
+            k (int): Events per profile
+            today (Optional[datetime.date]): Override for 'now'. Defaults to today.
+            batch_size (int): Profiles held in memory at a time
+            candidate_limit (int): Soonest candidates scored per group
+
+        Yields:
+            Tuple[Dict[str, Any], List[Event]]: Each profile with its events, in input order
+        """
+        if today is None:
+            today = datetime.date.today()
+        batch: List[Dict[str, Any]] = []
+        for profile in profiles:
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                yield from self._recommend_batch(batch, filters, k, today, candidate_limit)
+                batch = []
+        if batch:
+            yield from self._recommend_batch(batch, filters, k, today, candidate_limit)
+
+    def _recommend_batch(
+        self,
+        profiles: List[Dict[str, Any]],
+        filters: Union[EventFilter, Mapping[str, Any], None],
+        k: int,
+        today: datetime.date,
+        candidate_limit: int,
+    ) -> Iterator[Tuple[Dict[str, Any], List[Event]]]:
+        groups: Dict[EventFilter, List[int]] = {}
+        for i, profile in enumerate(profiles):
+            groups.setdefault(self.effective_filters(filters, profile, today), []).append(i)
+        results: List[List[Event]] = [[] for _ in profiles]
+        encodings = interest_encodings_for(self.repository)
+        for signature, members in groups.items():
+            try:
+                candidates = self.repository.search_text("", signature)[:candidate_limit]
+                if not candidates:
+                    continue
+                scores = self.scorer.score([profiles[i] for i in members], candidates, encodings)
+                for i, top in zip(members, self.scorer.top_k(scores, k)):
+                    results[i] = [candidates[j] for j in top]
+            except Exception as e:
+                self.logger.error(f"Error in recommend_many for filters {signature.as_dict()}: {e}")
+        self.logger.info(f"recommend_many scored {len(profiles)} profiles in {len(groups)} groups")
+        return zip(profiles, results)
+
+    def _materialized_candidates(self, filters: EventFilter, max_events: int) -> Optional[List[Event]]:
+        """
+        Precomputed candidates for a region × standard window filter, or None to query live.
+
+        Failures only cost the shortcut.
+        """
+        try:
+            events = candidate_lists_for(self.repository).get(filters, max_events)
+            if events is not None:
+                self.logger.info(f"[DEBUG] recommend_events served {len(events)} materialized candidates")
+            return events
+        except Exception as e:
+            self.logger.warning(f"Materialized candidates unavailable: {e}")
+            return None
+
+    def _semantic_candidates(
+        self, text: str, filters: EventFilter, limit: int, exclude: set
+    ) -> List[Event]:
+        """
+        Events close to the free-text query in the offline embedding space.
+
+        Used to top up literal matches; failures only cost the extra candidates.
+        """
+        try:
+            index = embedding_index_for(self.repository)
+            # Over-fetch because the structured filters are applied afterwards.
+            matches = [event_id for event_id, _ in index.search(text, k=limit * 5 + 20) if event_id not in exclude]
+            events = self.repository.find_by_ids(matches, filters)[:limit]
+            self.logger.info(f"[DEBUG] recommend_events semantic candidates for '{text}': {len(events)} events")
+            return events
+        except Exception as e:
+            self.logger.warning(f"Semantic candidates unavailable: {e}")
+            return []
@@ -0,0 +1,279 @@
+"""
+"More like this": precomputed nearest-neighbour lists over event feature vectors.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import math
+import zlib
+from typing import Any, Iterable
+
+import numpy as np
+
+from befriends.search.trigram import fold_text
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class EventFeaturizer:
+    """
+    Maps events to fixed-length float32 vectors whose dot product is a weighted similarity.
+
+    Each block is L2-normalised and scaled by the square root of its weight, so
+    the dot product of two vectors is the weighted sum of per-block cosines:
+
+    * categories: hashed one-hot of event_type, dance styles, price_category
+      and age_group_label;
+    * location: random Fourier features of the coordinates, approximating a
+      Gaussian kernel with ``location_scale_km`` width;
+    * weekday and time of day: points on a circle, so Sunday is next to Monday.
+    """
+
+    CATEGORY_FIELDS = ("event_type", "dance_style", "price_category", "age_group_label")
+    _MISSING = frozenset({"", "none", "unknown", "n/a"})
+
+    def __init__(
+        self,
+        category_dim: int = 32,
+        location_dim: int = 16,
+        location_scale_km: float = 15.0,
+        weights: tuple[float, float, float, float] = (0.5, 0.3, 0.1, 0.1),
+        seed: int = 7,
+    ):
+        self.category_dim = category_dim
+        self.location_dim = location_dim
+        self.scales = np.sqrt(np.asarray(weights, dtype=np.float32))
+        rng = np.random.default_rng(seed)
+        self._frequencies = rng.normal(0.0, 1.0 / location_scale_km, size=(2, location_dim)).astype(np.float32)
+        self._phases = rng.uniform(0.0, 2 * math.pi, size=location_dim).astype(np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self.category_dim + self.location_dim + 4
+
+    def _categories(self, event: Any) -> list[str]:
+        tokens = []
+        for field in self.CATEGORY_FIELDS:
+            value = getattr(event, field, None)
+            for item in value if isinstance(value, list) else [value]:
+                folded = fold_text(item if isinstance(item, str) else None).strip()
+                if folded and folded not in self._MISSING:
+                    tokens.append(f"{field}={folded}")
+        return tokens
+
+    def transform(self, events: list[Any]) -> np.ndarray:
+        """Return an (n, dim) float32 matrix for events (Event objects or ORM rows)."""
+        n = len(events)
+        categories = np.zeros((n, self.category_dim), dtype=np.float32)
+        coordinates = np.full((n, 2), np.nan, dtype=np.float32)
+        cycles = np.zeros((n, 4), dtype=np.float32)
+        for row, event in enumerate(events):
+            for token in self._categories(event):
+                categories[row, zlib.crc32(token.encode()) % self.category_dim] = 1.0
+            lat, lon = _as_float(getattr(event, "latitude", None)), _as_float(getattr(event, "longitude", None))
+            if lat is not None and lon is not None:
+                # Roughly km on the ground around 47.5°N.
+                coordinates[row] = (lat * 111.2, lon * 75.1)
+            start = getattr(event, "start_datetime", None)
+            if isinstance(start, datetime.datetime):
+                day = 2 * math.pi * start.weekday() / 7
+                cycles[row, 0:2] = (math.cos(day), math.sin(day))
+                if start.hour or start.minute:
+                    minute = 2 * math.pi * (start.hour * 60 + start.minute) / 1440
+                    cycles[row, 2:4] = (math.cos(minute), math.sin(minute))
+        known = ~np.isnan(coordinates[:, 0])
+        location = np.zeros((n, self.location_dim), dtype=np.float32)
+        if known.any():
+            location[known] = np.cos(coordinates[known] @ self._frequencies + self._phases)
+        blocks = [categories, location, cycles[:, 0:2], cycles[:, 2:4]]
+        for block, scale in zip(blocks, self.scales):
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            np.divide(block, norms, out=block, where=norms > 0)
+            block *= scale
+        return np.hstack(blocks)
+
+
+class NeighbourIndex:
+    """
+    Top-N most similar upcoming events for every event in the catalog.
+
+    Lists are computed in chunks of query rows so the score matrix never
+    exceeds ``memory_budget_bytes``; lookups are a dict access. Candidates are
+    limited to events starting today or later, and lists are re-filtered at
+    lookup time so events that have since passed drop out.
+    """
+
+    FIELDS = ("event_type", "dance_style", "price_category", "age_group_label", "latitude", "longitude", "start_datetime")
+
+    def __init__(
+        self,
+        featurizer: EventFeaturizer | None = None,
+        top_n: int = 20,
+        memory_budget_bytes: int = 32 * 2 ** 20,
+        built_on: datetime.date | None = None,
+    ):
+        self.featurizer = featurizer or EventFeaturizer()
+        self.top_n = top_n
+        self.memory_budget_bytes = memory_budget_bytes
+        self.built_on = built_on or datetime.date.today()
+        self.ids: list[str] = []
+        self.vectors = np.zeros((0, self.featurizer.dim), dtype=np.float32)
+        self.starts: list[datetime.datetime | None] = []
+        self.neighbours: dict[str, list[tuple[str, float]]] = {}
+        self._row_of: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, events: Iterable[Any], **kwargs) -> "NeighbourIndex":
+        """Featurize events and compute every neighbour list."""
+        index = cls(**kwargs)
+        events = [e for e in events if getattr(e, "id", None) is not None]
+        index.ids = [str(e.id) for e in events]
+        index._row_of = {event_id: row for row, event_id in enumerate(index.ids)}
+        index.starts = [getattr(e, "start_datetime", None) for e in events]
+        index.vectors = index.featurizer.transform(events)
+        index._compute(np.arange(len(index.ids)))
+        return index
+
+    def _candidates(self) -> np.ndarray:
+        today = datetime.datetime.combine(self.built_on, datetime.time())
+        return np.fromiter(
+            (row for row, start in enumerate(self.starts) if start is not None and start >= today), dtype=np.int64
+        )
+
+    def _chunk_rows(self, n_columns: int) -> int:
+        # float32 scores plus the int64 indices argpartition returns.
+        return max(1, self.memory_budget_bytes // max(1, 12 * n_columns))
+
+    def _compute(self, rows: np.ndarray) -> None:
+        """Recompute the neighbour lists of the given rows against all upcoming events."""
+        candidates = self._candidates()
+        if not len(candidates):
+            self.neighbours.update({self.ids[r]: [] for r in rows})
+            return
+        matrix = self.vectors[candidates].T
+        k = min(self.top_n + 1, len(candidates))
+        step = self._chunk_rows(len(candidates))
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            scores = self.vectors[chunk] @ matrix
+            # Never list an event as its own neighbour.
+            own = np.searchsorted(candidates, chunk)
+            hit = (own < len(candidates)) & (candidates[np.minimum(own, len(candidates) - 1)] == chunk)
+            scores[np.nonzero(hit)[0], own[hit]] = -np.inf
+            top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row, columns, values in zip(chunk, top, top_scores):
+                self.neighbours[self.ids[row]] = [
+                    (self.ids[candidates[c]], round(float(v), 4))
+                    for c, v in zip(columns, values) if v > 0
+                ][: self.top_n]
+
+    def upsert(self, events: Iterable[Any]) -> None:
+        """Refresh vectors of changed or new events and patch the affected neighbour lists.
+
+        Changed events get fresh lists. Every other list is merged with the new
+        scores against the changed events, except lists that contained one of
+        them: those are recomputed because an entry may have dropped out.
+        """
+        events = [e for e in events if getattr(e, "id", None) is not None]
+        if not events:
+            return
+        vectors = self.featurizer.transform(events)
+        changed = []
+        new_vectors = []
+        for event, vector in zip(events, vectors):
+            event_id = str(event.id)
+            row = self._row_of.get(event_id)
+            if row is None:
+                row = self._row_of[event_id] = len(self.ids)
+                self.ids.append(event_id)
+                self.starts.append(getattr(event, "start_datetime", None))
+                new_vectors.append(vector)
+            else:
+                self.starts[row] = getattr(event, "start_datetime", None)
+                self.vectors[row] = vector
+            changed.append(row)
+        if new_vectors:
+            self.vectors = np.vstack([self.vectors, np.asarray(new_vectors, dtype=np.float32)])
+        changed_rows = np.unique(np.asarray(changed, dtype=np.int64))
+        changed_ids = {self.ids[r] for r in changed_rows}
+        stale = [
+            self._row_of[event_id] for event_id, neighbours in self.neighbours.items()
+            if event_id not in changed_ids and any(n in changed_ids for n, _ in neighbours)
+        ]
+        self._compute(np.concatenate([changed_rows, np.asarray(stale, dtype=np.int64)]))
+        self._merge_changed(changed_rows, changed_ids.union(self.ids[r] for r in stale))
+
+    def _merge_changed(self, changed_rows: np.ndarray, recomputed: set[str]) -> None:
+        """Offer the changed upcoming events to every list that was not recomputed."""
+        upcoming = set(self._candidates().tolist())
+        offered = np.asarray([r for r in changed_rows if r in upcoming], dtype=np.int64)
+        rows = np.asarray([r for r, event_id in enumerate(self.ids) if event_id not in recomputed], dtype=np.int64)
+        if not len(offered) or not len(rows):
+            return
+        step = self._chunk_rows(len(offered))
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            scores = self.vectors[chunk] @ self.vectors[offered].T
+            for row, values in zip(chunk, scores):
+                event_id = self.ids[row]
+                merged = self.neighbours.get(event_id, []) + [
+                    (self.ids[c], round(float(v), 4)) for c, v in zip(offered, values) if v > 0
+                ]
+                merged.sort(key=lambda item: -item[1])
+                self.neighbours[event_id] = merged[: self.top_n]
+
+    def similar(self, event_id: str, limit: int | None = None) -> list[tuple[str, float]] | None:
+        """(event_id, similarity) pairs of upcoming look-alikes, or None for an unknown event."""
+        neighbours = self.neighbours.get(str(event_id))
+        if neighbours is None:
+            return None
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        upcoming = [
+            (n, score) for n, score in neighbours
+            if (start := self.starts[self._row_of[n]]) is not None and start >= today
+        ]
+        return upcoming[:limit] if limit else upcoming
+
+
+def similar_index_for(repo) -> NeighbourIndex:
+    """Return the shared neighbour index of a catalog.
+
+    Imports patch it incrementally; it is rebuilt once the date rolls over so
+    that passed events leave the candidate set.
+    """
+    logger = logging.getLogger("NeighbourIndex")
+    today = datetime.date.today()
+
+    def build() -> NeighbourIndex:
+        from befriends.catalog.orm import EventORM
+        session = repo.Session()
+        try:
+            rows = session.query(EventORM.id, *(getattr(EventORM, f) for f in NeighbourIndex.FIELDS)).all()
+        finally:
+            session.close()
+        index = NeighbourIndex.build(rows, built_on=today)
+        logger.info(f"Built neighbour lists for {len(index)} events")
+        return index
+
+    def update(index: NeighbourIndex, events: list, generation: str) -> None:
+        index.upsert(events)
+
+    index = repo.derived_index("similar", build, update)
+    if index.built_on != today:
+        repo.invalidate_derived("similar")
+        index = repo.derived_index("similar", build, update)
+    return index
@@ -0,0 +1,179 @@
+"""Token-budgeted, tabular encoding of events for the LLM prompt."""
+
+from __future__ import annotations
+
+import datetime
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from ..catalog.prices import is_free
+
+# Each BPE token covers roughly four characters of a word; punctuation is a token of its own.
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Local estimate of the model's token count for text, without a tokenizer."""
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECES.findall(text))
+
+
+def _clean(value: Any) -> str:
+    if value is None:
+        return ""
+    # The separator and line breaks would break the table
+    return " ".join(str(value).replace("|", "/").split())
+
+
+def _start(event: Any) -> str:
+    start = getattr(event, "start_datetime", None)
+    if not isinstance(start, datetime.datetime):
+        return ""
+    return start.strftime("%a %Y-%m-%d" if start.time() == datetime.time() else "%a %Y-%m-%d %H:%M")
+
+
+def _end(event: Any) -> str:
+    start, end = getattr(event, "start_datetime", None), getattr(event, "end_datetime", None)
+    if not isinstance(end, datetime.datetime):
+        return ""
+    if isinstance(start, datetime.datetime) and end.date() == start.date():
+        return end.strftime("%H:%M")
+    return end.strftime("%Y-%m-%d %H:%M")
+
+
+def _number(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, (int, float)) else _clean(value)
+
+
+def _price(event: Any) -> str:
+    if is_free(getattr(event, "price_category", None), getattr(event, "pricing_type", None), getattr(event, "currency", None)):
+        return "free"
+    # Missing prices are stored as 0
+    low, high = (getattr(event, f, None) or None for f in ("price_min", "price_max"))
+    if low is None and high is None:
+        return ""
+    amount = _number(low or high) if low in (None, high) or high is None else f"{_number(low)}-{_number(high)}"
+    return f"{amount} {_clean(getattr(event, 'currency', None))}".strip()
+
+
+def _age(event: Any) -> str:
+    low, high = getattr(event, "age_min", None), getattr(event, "age_max", None)
+    if low and high:
+        return f"{low}-{high}"
+    if low:
+        return f"{low}+"
+    if high:
+        return f"<={high}"
+    return _clean(getattr(event, "age_group_label", None))
+
+
+def _styles(event: Any) -> str:
+    styles = getattr(event, "dance_style", None) or []
+    return "/".join(_clean(s) for s in (styles if isinstance(styles, list) else [styles]) if s)
+
+
+def _field(name: str) -> Callable[[Any], str]:
+    return lambda event: _clean(getattr(event, name, None))
+
+
+# (column, cell) in prompt order; fields the assistant never talks about are left out.
+COLUMNS: tuple[tuple[str, Callable[[Any], str]], ...] = (
+    ("id", _field("id")),
+    ("name", _field("event_name")),
+    ("start", _start),
+    ("end", _end),
+    ("when", _field("date_description")),
+    ("type", _field("event_type")),
+    ("styles", _styles),
+    ("price", _price),
+    ("age", _age),
+    ("for", _field("user_category")),
+    ("location", _field("event_location")),
+    ("region", _field("region_standardized")),
+    ("organizer", _field("organizer")),
+    ("instagram", _field("instagram")),
+    ("link", _field("event_link")),
+)
+
+FORMAT_NOTE = "one event per line, '|'-separated, columns as in the first line"
+
+
+class EventContextEncoder:
+    """
+    Packs ranked events into a compact table that fits a token budget.
+
+    The table is a header row of short column names followed by one
+    ``|``-separated row per event. Columns that are empty for every event are
+    dropped. Rows are taken in rank order while the whole table stays within
+    ``token_budget`` (see ``estimate_tokens``); an event that does not fit is
+    skipped in favour of later, shorter ones.
+
+    Cells of an event are cached by (event id, catalog generation), so a
+    generation change re-encodes it. Without a generation nothing is cached.
+    """
+
+    def __init__(self, token_budget: int = 700, max_cached: int = 4096):
+        self.token_budget = token_budget
+        self.max_cached = max_cached
+        self._cells: OrderedDict[Hashable, tuple[tuple[str, int], ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cells(self, event: Any, generation: str | None = None) -> tuple[tuple[str, int], ...]:
+        """(cell text, estimated tokens) of every column for event."""
+        key = (getattr(event, "id", None), generation)
+        if generation is not None and key[0] is not None:
+            with self._lock:
+                cached = self._cells.get(key)
+                if cached is not None:
+                    self._cells.move_to_end(key)
+                    return cached
+        cells = tuple((text, estimate_tokens(text)) for text in (cell(event) for _, cell in COLUMNS))
+        if generation is not None and key[0] is not None:
+            with self._lock:
+                self._cells[key] = cells
+                while len(self._cells) > self.max_cached:
+                    self._cells.popitem(last=False)
+        return cells
+
+    def encode(
+        self,
+        events: list[Any],
+        max_events: int = 10,
+        generation: str | None = None,
+        token_budget: int | None = None,
+    ) -> str:
+        """The table of as many of the first max_events events as fit the budget; "" if none do."""
+        budget = self.token_budget if token_budget is None else token_budget
+        rows = [self.cells(event, generation) for event in events[:max_events]]
+        used = [i for i in range(len(COLUMNS)) if any(row[i][0] for row in rows)]
+        header = "|".join(COLUMNS[i][0] for i in used)
+        # Separators and the line break are a token each
+        total = estimate_tokens(header) + len(used)
+        packed = []
+        for row in rows:
+            tokens = sum(row[i][1] for i in used) + len(used)
+            if total + tokens <= budget:
+                packed.append(row)
+                total += tokens
+        if not packed:
+            return ""
+        # Columns that only the skipped events filled are dropped too
+        used = [i for i in used if any(row[i][0] for row in packed)]
+        lines = ["|".join(COLUMNS[i][0] for i in used)]
+        lines.extend("|".join(row[i][0] for i in used) for row in packed)
+        return "\n".join(lines)
+
+
+_default_encoder = EventContextEncoder()
+
+
+def events_to_context(
+    events: list[Any],
+    max_events: int = 10,
+    generation: str | None = None,
+    token_budget: int | None = None,
+) -> str:
+    """Encode events with the process-wide encoder (and its per-event cache)."""
+    return _default_encoder.encode(events, max_events=max_events, generation=generation, token_budget=token_budget)
@@ -0,0 +1,294 @@
+"""Offline semantic retrieval: hashed TF-IDF vectors compressed by random projection."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import zlib
+from typing import Any, Iterable
+
+import numpy as np
+
+from .trigram import fold_text
+
+# Small multilingual concept lexicon so paraphrases ("live music", "Konzert",
+# "meet new people", "Begegnungen") land on shared features without a model.
+CONCEPTS: dict[str, tuple[str, ...]] = {
+    "music": ("music", "musik", "musique", "konzert", "concert", "live", "band", "jazz", "dj", "sound", "song"),
+    "social": ("meet", "people", "social", "leute", "kennenlernen", "begegnungen", "community", "treffen",
+               "rencontre", "friends", "freunde", "gesellig", "networking"),
+    "chill": ("chill", "relax", "relaxed", "entspannt", "gemutlich", "calm", "ruhig", "cozy", "gentle"),
+    "dance": ("dance", "dancing", "tanz", "tanzen", "danse", "salsa", "swing", "tango", "bachata",
+              "kizomba", "lindy", "ball"),
+    "family": ("family", "familie", "kids", "kinder", "children", "enfant", "enfants", "famille"),
+    "culture": ("museum", "museen", "kultur", "culture", "art", "kunst", "theater", "theatre", "ausstellung"),
+    "party": ("party", "fest", "fete", "club", "feiern", "festival", "fasnacht", "carnival"),
+    "sport": ("sport", "run", "lauf", "fitness", "yoga", "outdoor", "wandern", "hike"),
+    "food": ("food", "essen", "markt", "market", "wine", "wein", "beer", "bier", "kulinarisch"),
+}
+_CONCEPT_OF = {word: concept for concept, words in CONCEPTS.items() for word in words}
+_STOPWORDS = frozenset(
+    "a an and the with for of in on at to is are be something some any me my i we "
+    "und der die das mit fur ein eine in im am zu ist sind etwas ich wir "
+    "et le la les un une des avec pour de du en".split()
+)
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Words, 4-char stems, adjacent word pairs and concept tags of a text."""
+    words = [w for w in fold_text(text).split() if w not in _STOPWORDS]
+    tokens: list[str] = []
+    for word in words:
+        tokens.append(word)
+        if len(word) > 4:
+            tokens.append("s:" + word[:4])
+        concept = _CONCEPT_OF.get(word)
+        if concept:
+            tokens.append("c:" + concept)
+    tokens.extend(f"{a}_{b}" for a, b in zip(words, words[1:]))
+    return tokens
+
+
+class HashingEmbedder:
+    """Hashes tokens into a fixed feature space and projects them to ``dim`` floats."""
+
+    def __init__(self, dim: int = 128, n_features: int = 2 ** 14, seed: int = 13):
+        self.dim = dim
+        self.n_features = n_features
+        rng = np.random.default_rng(seed)
+        self.projection = (rng.standard_normal((n_features, dim)) / math.sqrt(dim)).astype(np.float32)
+
+    def buckets(self, text: str | None) -> np.ndarray:
+        """Feature bucket of every token (a stable hash, unlike ``hash()``)."""
+        return np.array(
+            [zlib.crc32(t.encode("utf-8")) % self.n_features for t in tokenize(text)], dtype=np.int64
+        )
+
+    def embed(self, bucket_lists: list[np.ndarray], idf: np.ndarray) -> np.ndarray:
+        """Project sublinear TF-IDF weights of each bucket list into unit-length rows."""
+        out = np.zeros((len(bucket_lists), self.dim), dtype=np.float32)
+        for row, buckets in enumerate(bucket_lists):
+            if buckets.size == 0:
+                continue
+            uniq, counts = np.unique(buckets, return_counts=True)
+            weights = (1.0 + np.log(counts)) * idf[uniq]
+            out[row] = weights.astype(np.float32) @ self.projection[uniq]
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+def event_text(event: Any) -> str:
+    """Concatenate the descriptive fields of an Event (or ORM row) for embedding."""
+    parts = [getattr(event, f, None) for f in EmbeddingIndex.FIELDS]
+    flat: list[str] = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            flat.extend(str(p) for p in part if p)
+        elif part:
+            flat.append(str(part))
+    return " ".join(flat)
+
+
+class EmbeddingIndex:
+    """Row-per-event float32 matrix answering k-NN queries by a single dot product.
+
+    The matrix can be persisted as a raw memory-mapped file with a JSON sidecar
+    holding ids, document frequencies and the catalog generation it was built
+    from. Upserts re-embed only the touched events; document frequencies are
+    updated but older rows keep the IDF weights they were embedded with until
+    the next full rebuild.
+    """
+
+    FIELDS = (
+        "event_name", "event_type", "dance_style", "user_category", "age_group_label",
+        "organizer", "event_location", "description",
+    )
+
+    def __init__(self, embedder: HashingEmbedder | None = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.ids: list[str] = []
+        self.vectors: np.ndarray = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self.df = np.zeros(self.embedder.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.generation = ""
+        self._row_of: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _idf(self) -> np.ndarray:
+        return np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0
+
+    @classmethod
+    def build(cls, events: Iterable[Any], embedder: HashingEmbedder | None = None) -> "EmbeddingIndex":
+        """Embed every event (Event objects or ORM rows with the FIELDS attributes)."""
+        index = cls(embedder)
+        ids, bucket_lists = [], []
+        for event in events:
+            if getattr(event, "id", None) is None:
+                continue
+            buckets = index.embedder.buckets(event_text(event))
+            ids.append(str(event.id))
+            bucket_lists.append(buckets)
+            index.df[np.unique(buckets)] += 1
+        index.n_docs = len(ids)
+        index.ids = ids
+        index._row_of = {event_id: row for row, event_id in enumerate(ids)}
+        index.vectors = index.embedder.embed(bucket_lists, index._idf())
+        return index
+
+    def upsert(self, events: Iterable[Any]) -> None:
+        """Re-embed changed events in place and append new ones."""
+        events = [e for e in events if getattr(e, "id", None) is not None]
+        if not events:
+            return
+        bucket_lists = [self.embedder.buckets(event_text(e)) for e in events]
+        for event, buckets in zip(events, bucket_lists):
+            if str(event.id) not in self._row_of:
+                self.df[np.unique(buckets)] += 1
+                self.n_docs += 1
+        rows = self.embedder.embed(bucket_lists, self._idf())
+        new_rows = []
+        # np.array() detaches a read-only memory map before writing into it.
+        vectors = np.array(self.vectors)
+        for event, row in zip(events, rows):
+            event_id = str(event.id)
+            if event_id in self._row_of:
+                vectors[self._row_of[event_id]] = row
+            else:
+                self._row_of[event_id] = len(self.ids)
+                self.ids.append(event_id)
+                new_rows.append(row)
+        if new_rows:
+            vectors = np.vstack([vectors, np.asarray(new_rows, dtype=np.float32)])
+        self.vectors = vectors
+
+    def search(self, text: str, k: int = 20, min_score: float = 0.1) -> list[tuple[str, float]]:
+        """Return up to k (event_id, cosine) pairs most similar to text."""
+        if not self.ids or not text:
+            return []
+        query = self.embedder.embed([self.embedder.buckets(text)], self._idf())[0]
+        if not query.any():
+            return []
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def save(self, path: str, generation: str) -> None:
+        """Write the matrix to ``path.<generation>`` (raw float32) and metadata to ``path + '.json'``.
+
+        Both are written to temp files and renamed into place, the metadata
+        last; since it names its matrix file, a reader (or a crash) between the
+        two renames still sees the previous complete pair.
+        """
+        self.generation = generation
+        matrix = f"{path}.{generation}" if len(self.ids) else None
+        if matrix is not None:
+            tmp = _temp_path(matrix)
+            mm = np.memmap(tmp, dtype=np.float32, mode="w+", shape=self.vectors.shape)
+            mm[:] = self.vectors
+            mm.flush()
+            del mm
+            os.replace(tmp, matrix)
+        previous = _saved_matrix(path)
+        meta = {
+            "generation": generation,
+            "matrix": os.path.basename(matrix) if matrix else None,
+            "dim": self.embedder.dim,
+            "n_features": self.embedder.n_features,
+            "n_docs": self.n_docs,
+            "ids": self.ids,
+            "df": self.df.tolist(),
+        }
+        tmp = _temp_path(path + ".json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path + ".json")
+        # Processes that already mapped the old matrix keep reading it after the unlink
+        if previous and previous != matrix and os.path.exists(previous):
+            os.remove(previous)
+
+    @classmethod
+    def load(cls, path: str, embedder: HashingEmbedder | None = None) -> "EmbeddingIndex":
+        """Memory-map a saved index; the matrix is paged in lazily by the OS."""
+        with open(path + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(embedder or HashingEmbedder(dim=meta["dim"], n_features=meta["n_features"]))
+        index.ids = meta["ids"]
+        index._row_of = {event_id: row for row, event_id in enumerate(index.ids)}
+        index.df = np.asarray(meta["df"], dtype=np.int64)
+        index.n_docs = meta["n_docs"]
+        index.generation = meta["generation"]
+        if index.ids:
+            matrix = os.path.join(os.path.dirname(path), meta["matrix"]) if meta.get("matrix") else path
+            index.vectors = np.memmap(matrix, dtype=np.float32, mode="r", shape=(len(index.ids), meta["dim"]))
+        return index
+
+
+def _temp_path(target: str) -> str:
+    """A temp file next to target, unique per process and thread."""
+    return f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _saved_matrix(path: str) -> str | None:
+    """The matrix file the metadata at ``path + '.json'`` currently points to, if any."""
+    try:
+        with open(path + ".json", encoding="utf-8") as f:
+            name = json.load(f).get("matrix")
+    except (OSError, ValueError):
+        return None
+    return os.path.join(os.path.dirname(path), name) if name else None
+
+
+def embedding_path(repo) -> str | None:
+    """Location of the persisted matrix next to a file-backed SQLite catalog."""
+    database = repo.engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return os.getenv("BEFRIENDS_EMBEDDINGS_PATH") or f"{database}.vec.f32"
+
+
+def embedding_index_for(repo) -> EmbeddingIndex:
+    """Return the shared embedding index of a catalog, loading or building it as needed.
+
+    Ingestion calls this right after an import so the vectors are computed
+    once and persisted; serving processes then only memory-map the file.
+    """
+    logger = logging.getLogger("EmbeddingIndex")
+    path = embedding_path(repo)
+
+    def build() -> EmbeddingIndex:
+        generation = repo.generation()
+        if path and os.path.exists(path + ".json"):
+            try:
+                loaded = EmbeddingIndex.load(path)
+                if loaded.generation == generation:
+                    return loaded
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable embedding index at {path}: {e}")
+        from ..catalog.orm import EventORM
+        session = repo.Session()
+        try:
+            rows = session.query(EventORM.id, *(getattr(EventORM, f) for f in EmbeddingIndex.FIELDS))
+            index = EmbeddingIndex.build(rows)
+        finally:
+            session.close()
+        logger.info(f"Built embedding index for {len(index)} events")
+        if path:
+            index.save(path, generation)
+        return index
+
+    def update(index: EmbeddingIndex, events: list, generation: str) -> None:
+        index.upsert(events)
+        if path:
+            index.save(path, generation)
+
+    return repo.derived_index("embedding", build, update)
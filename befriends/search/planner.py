@@ -0,0 +1,227 @@
+"""Cost-based planning of structured event filters."""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """One structured filter: ``column <op> value``.
+
+    ``op`` is ``"eq"``, ``"in"`` (value is a tuple), ``"ge"``, ``"le"`` or
+    ``"day"`` (same calendar day).
+    """
+
+    column: str
+    op: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Chosen strategy and predicate order for one filtered query.
+
+    ``strategy`` is one of:
+
+    * ``"memory"`` - an in-memory value index yields the candidate ids, SQL only
+      looks them up by primary key and re-checks the remaining predicates;
+    * ``"index"`` - SQL drives the query from the index on ``driving``;
+    * ``"scan"`` - nothing is selective enough, SQL scans and filters.
+    """
+
+    strategy: str
+    order: tuple[Predicate, ...]
+    estimated_rows: float
+    driving: Predicate | None = None
+    ids: tuple[str, ...] | None = None
+
+
+def normalize_value(value: Any) -> Any:
+    """Map a filter or column value onto the key used in the statistics."""
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return value
+
+
+def _as_datetime(value: Any) -> datetime.datetime | None:
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class ColumnStats:
+    """Row count, cardinality and an equi-depth histogram of one column."""
+
+    n_rows: int
+    n_null: int
+    n_distinct: int
+    bounds: list[Any] = field(default_factory=list)
+
+    @classmethod
+    def collect(cls, values: list[Any], n_rows: int, buckets: int = 32) -> "ColumnStats":
+        present = sorted(v for v in values if v is not None)
+        bounds = []
+        if present:
+            step = (len(present) - 1) / buckets
+            bounds = [present[round(i * step)] for i in range(buckets + 1)]
+        return cls(n_rows=n_rows, n_null=n_rows - len(present), n_distinct=len(set(present)), bounds=bounds)
+
+    def fraction_below(self, value: Any, inclusive: bool = True) -> float:
+        """Estimated share of non-null values <= value (< value if not inclusive)."""
+        search = bisect.bisect_right if inclusive else bisect.bisect_left
+        position = search(self.bounds, value)
+        if position == 0:
+            return 0.0
+        if position == len(self.bounds):
+            return 1.0
+        # Somewhere inside bucket position - 1: assume the middle of it.
+        return (position - 0.5) / (len(self.bounds) - 1)
+
+    def range_selectivity(self, low: Any = None, high: Any = None) -> float:
+        """Estimated share of rows with low <= value <= high."""
+        if not self.n_rows:
+            return 0.0
+        upper = self.fraction_below(high) if high is not None else 1.0
+        lower = self.fraction_below(low, inclusive=False) if low is not None else 0.0
+        return max(upper - lower, 0.0) * (self.n_rows - self.n_null) / self.n_rows
+
+
+class CatalogStatistics:
+    """Per-column statistics and value indexes over the upcoming part of a catalog.
+
+    Equality columns keep an exact value -> ids map, which doubles as the
+    in-memory index; range columns keep an equi-depth histogram. ``ids``
+    holds every upcoming event id, e.g. for random sampling.
+    """
+
+    EQUALITY_COLUMNS = ("region_standardized", "event_type", "organizer", "instagram", "dance_style", "is_free")
+    RANGE_COLUMNS = ("start_datetime", "price_min_norm", "price_max_norm")
+    # Columns with a SQL index on the events table.
+    INDEXED_COLUMNS = frozenset({
+        "region_standardized", "event_type", "organizer", "instagram", "start_datetime",
+        "price_min_norm", "price_max_norm", "is_free",
+    })
+
+    def __init__(self, built_on: datetime.date | None = None) -> None:
+        self.built_on = built_on or datetime.date.today()
+        self.n_rows = 0
+        self.ids: list[str] = []
+        self.columns: dict[str, ColumnStats] = {}
+        self.ids_by_value: dict[str, dict[Any, list[str]]] = {c: {} for c in self.EQUALITY_COLUMNS}
+
+    @classmethod
+    def collect(cls, rows: Iterable[dict[str, Any]], built_on: datetime.date | None = None) -> "CatalogStatistics":
+        """Build statistics from row dicts holding ``id`` and the tracked columns."""
+        stats = cls(built_on)
+        ranges: dict[str, list[Any]] = {c: [] for c in cls.RANGE_COLUMNS}
+        for row in rows:
+            stats.n_rows += 1
+            stats.ids.append(row["id"])
+            for column in cls.EQUALITY_COLUMNS:
+                value = normalize_value(row.get(column))
+                if value not in (None, ""):
+                    stats.ids_by_value[column].setdefault(value, []).append(row["id"])
+            for column in cls.RANGE_COLUMNS:
+                convert = _as_datetime if column == "start_datetime" else _as_float
+                ranges[column].append(convert(row.get(column)))
+        for column, index in stats.ids_by_value.items():
+            stats.columns[column] = ColumnStats(
+                n_rows=stats.n_rows,
+                n_null=stats.n_rows - sum(len(ids) for ids in index.values()),
+                n_distinct=len(index),
+            )
+        for column, values in ranges.items():
+            stats.columns[column] = ColumnStats.collect(values, stats.n_rows)
+        return stats
+
+    def matching_ids(self, predicate: Predicate) -> list[str] | None:
+        """Exact ids for an equality or IN predicate on an in-memory indexed column, else None."""
+        index = self.ids_by_value.get(predicate.column)
+        if index is None:
+            return None
+        if predicate.op == "eq":
+            return index.get(normalize_value(predicate.value), [])
+        if predicate.op == "in":
+            return [i for value in predicate.value for i in index.get(normalize_value(value), [])]
+        return None
+
+    def selectivity(self, predicate: Predicate) -> float:
+        """Estimated fraction of upcoming rows that satisfy the predicate."""
+        if not self.n_rows:
+            return 0.0
+        ids = self.matching_ids(predicate)
+        if ids is not None:
+            return len(ids) / self.n_rows
+        column = self.columns.get(predicate.column)
+        if column is None:
+            return 1 / 3
+        value: Any
+        if predicate.column == "start_datetime":
+            value = _as_datetime(predicate.value)
+        else:
+            value = _as_float(predicate.value)
+        if value is None:
+            return 1 / 3
+        try:
+            if predicate.op == "ge":
+                return column.range_selectivity(low=value)
+            if predicate.op == "le":
+                return column.range_selectivity(high=value)
+            if predicate.op == "day":
+                return column.range_selectivity(low=value, high=value + datetime.timedelta(days=1))
+        except TypeError:
+            # e.g. an aware datetime against naive stored values
+            return 1 / 3
+        return 1 / max(column.n_distinct, 1)
+
+
+@dataclass(frozen=True)
+class FilterPlanner:
+    """Picks the cheapest execution strategy and predicate order for a set of filters.
+
+    Selectivities are combined under an independence assumption. An equality
+    filter matching at most ``memory_max_rows`` upcoming events is answered
+    from the in-memory index; otherwise the most selective SQL-indexed filter
+    drives the query if it keeps at most ``index_max_selectivity`` of the rows,
+    and anything less selective is cheaper as a plain scan.
+    """
+
+    memory_max_rows: int = 64
+    index_max_selectivity: float = 0.25
+
+    def plan(self, stats: CatalogStatistics, predicates: list[Predicate]) -> QueryPlan:
+        # Filter values may be lists (dance_style), so predicates are not hashed.
+        ranked = sorted(((stats.selectivity(p), p) for p in predicates), key=lambda item: item[0])
+        order = tuple(p for _, p in ranked)
+        estimated = float(stats.n_rows)
+        for selectivity, _ in ranked:
+            estimated *= selectivity
+        for p in order:
+            ids = stats.matching_ids(p)
+            if ids is not None and len(ids) <= self.memory_max_rows:
+                return QueryPlan("memory", order, estimated, driving=p, ids=tuple(ids))
+        for selectivity, p in ranked:
+            if p.column in stats.INDEXED_COLUMNS and p.op != "day":
+                if selectivity <= self.index_max_selectivity:
+                    return QueryPlan("index", order, estimated, driving=p)
+                break
+        return QueryPlan("scan", order, estimated)
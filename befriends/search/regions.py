@@ -0,0 +1,130 @@
+"""Region proximity graph for cross-border searches in the Dreiländereck."""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+REGION_DISTANCES_PATH = Path(__file__).resolve().parents[1] / "data" / "region_distances.csv"
+
+
+def haversine_km(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Great-circle distance between two (latitude, longitude) points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+class RegionGraph:
+    """Weighted adjacency between regions with all-pairs travel distances precomputed.
+
+    Edges carry road kilometres; distances between regions that are not
+    adjacent follow the shortest path, so a radius query is a dict lookup.
+    """
+
+    def __init__(self, edges: Iterable[tuple[str, str, float]] = ()) -> None:
+        self.edges: dict[str, dict[str, float]] = {}
+        for a, b, km in edges:
+            self._add_edge(a, b, km)
+        self._distances = {region: self._shortest_paths(region) for region in self.edges}
+
+    def _add_edge(self, a: str, b: str, km: float) -> None:
+        current = self.edges.get(a, {}).get(b)
+        if current is None or km < current:
+            self.edges.setdefault(a, {})[b] = km
+            self.edges.setdefault(b, {})[a] = km
+
+    def _shortest_paths(self, source: str) -> dict[str, float]:
+        distances = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            distance, region = heapq.heappop(heap)
+            if distance > distances[region]:
+                continue
+            for neighbour, km in self.edges[region].items():
+                candidate = distance + km
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return distances
+
+    @classmethod
+    def load(cls, path: Path | str = REGION_DISTANCES_PATH) -> "RegionGraph":
+        """Load the shipped region_a,region_b,road_km table."""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls((row["region_a"], row["region_b"], float(row["road_km"])) for row in csv.DictReader(f))
+
+    def with_coordinates(
+        self,
+        centroids: dict[str, tuple[float, float]],
+        max_edge_km: float = 40.0,
+        detour: float = 1.3,
+    ) -> "RegionGraph":
+        """Return a graph that also links regions missing from the table by their coordinates.
+
+        A region without edges is connected to every region whose centroid is
+        known and lies within max_edge_km as the crow flies; the straight-line
+        distance is scaled by detour to approximate travel distance.
+        """
+        edges = [(a, b, km) for a, neighbours in self.edges.items() for b, km in neighbours.items()]
+        for region, point in centroids.items():
+            if region in self.edges:
+                continue
+            for other, other_point in centroids.items():
+                if other != region:
+                    straight = haversine_km(point, other_point)
+                    if straight <= max_edge_km:
+                        edges.append((region, other, round(straight * detour, 1)))
+        return RegionGraph(edges)
+
+    def distance(self, a: str | None, b: str | None) -> float | None:
+        """Travel distance between two regions, or None if either is unknown or unreachable."""
+        if a is None or b is None:
+            return None
+        if a == b:
+            return 0.0
+        return self._distances.get(a, {}).get(b)
+
+    def within(self, region: str, radius_km: float) -> dict[str, float]:
+        """Regions reachable from region within radius_km, nearest first, including region itself."""
+        reachable = {r: d for r, d in self._distances.get(region, {region: 0.0}).items() if d <= radius_km}
+        return dict(sorted(reachable.items(), key=lambda item: (item[1], item[0])))
+
+
+@lru_cache(maxsize=1)
+def default_region_graph() -> RegionGraph:
+    """The graph of the shipped distance table, loaded once per process."""
+    return RegionGraph.load()
+
+
+def region_graph_for(repo) -> RegionGraph:
+    """Return the shared region graph of a catalog, rebuilt on generation change.
+
+    Regions that the shipped table does not cover are linked by the centroid
+    of their events' coordinates.
+    """
+
+    def build() -> RegionGraph:
+        from sqlalchemy import Float, cast, func
+        from ..catalog.orm import EventORM
+        session = repo.Session()
+        try:
+            rows = (
+                session.query(
+                    EventORM.region_standardized,
+                    func.avg(cast(EventORM.latitude, Float)),
+                    func.avg(cast(EventORM.longitude, Float)),
+                )
+                .filter(EventORM.latitude.isnot(None), EventORM.longitude.isnot(None))
+                .group_by(EventORM.region_standardized)
+            )
+            centroids = {region: (lat, lon) for region, lat, lon in rows if region and lat is not None}
+        finally:
+            session.close()
+        return default_region_graph().with_coordinates(centroids)
+
+    return repo.derived_index("region_graph", build)
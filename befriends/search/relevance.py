@@ -3,16 +3,38 @@
 from __future__ import annotations
 from ..domain.event import Event
 from ..domain.search_models import SearchQuery
+from .regions import RegionGraph, default_region_graph, region_graph_for
 
 
 class RelevancePolicy:
     """Ranks events for search results."""
 
+    def __init__(self, regions: RegionGraph | None = None, proximity_weight: float = 0.2, repository=None):
+        """proximity_weight is the score penalty per km away from the requested region.
+
+        With a repository (and no explicit regions) distances come from its
+        region_graph_for graph, the one its region_radius filter expands with.
+        """
+        self._regions = regions
+        self.proximity_weight = proximity_weight
+        self.repository = repository
+
+    @property
+    def regions(self) -> RegionGraph:
+        if self._regions is not None:
+            return self._regions
+        if self.repository is not None:
+            return region_graph_for(self.repository)
+        self._regions = default_region_graph()
+        return self._regions
+
     def rank(self, events: list[Event], query: SearchQuery) -> list[Event]:
         """
         Rank events by recency, keyword/category/tag match,
-        price proximity, and filter match.
+        price proximity, region proximity, and filter match.
         """
+        regions = self.regions if getattr(query, "region_radius", None) and query.region else None
+
         def score(event: Event) -> float:
             s = 0.0
             from datetime import datetime, date as dt_date
@@ -67,6 +89,11 @@ class RelevancePolicy:
                         s += abs(price_val - query.price_max)
                 except Exception:
                     pass
+            # Region proximity (radius searches): nearer regions first
+            if regions is not None:
+                distance = regions.distance(query.region, event.region_standardized)
+                if distance is not None:
+                    s += distance * self.proximity_weight
             # Date range filter match
             if hasattr(query, "start_datetime_from") and query.start_datetime_from and event.start_datetime and event.start_datetime < query.start_datetime_from:
                 s += 10
@@ -2,28 +2,76 @@
 
 from __future__ import annotations
 
+import dataclasses
 import logging
 from ..catalog.repository import CatalogRepository
+from ..common.telemetry import Profile, Telemetry
 from .relevance import RelevancePolicy
+from .singleflight import SingleFlight
+from .suggest import suggest_index_for
+from ..recommendation.similar import similar_index_for
 from ..domain.search_models import SearchQuery, SearchResult
 
 
 class SearchService:
     """Handles event search and relevance ranking."""
 
-    def __init__(self, repository: CatalogRepository, policy: RelevancePolicy):
+    def __init__(
+        self,
+        repository: CatalogRepository,
+        policy: RelevancePolicy,
+        telemetry: Telemetry | None = None,
+    ):
         """Initialize with repository and ranking policy."""
         self.repository = repository
         self.policy = policy
+        self.telemetry = telemetry or Telemetry()
+        self.flight = SingleFlight(self.telemetry, name="search")
 
-    def find_events(self, query: SearchQuery) -> SearchResult:
-        """Find and rank events matching the query."""
+    @staticmethod
+    def canonical_key(query: SearchQuery) -> SearchQuery:
+        """Key under which identical concurrent searches are coalesced.
+
+        Text matching and ranking are case-insensitive, so only the case of
+        the text is normalized, with the same casefold the repository's
+        search_folded column is matched with.
+        """
+        return dataclasses.replace(query, text=(query.text or "").casefold())
+
+    def find_events(self, query: SearchQuery, profile: Profile | None = None) -> SearchResult:
+        """Find and rank events matching the query.
+
+        Concurrent identical queries share one computation and the same result
+        object. Profiled queries run on their own so the breakdown is theirs.
+        """
+        if profile is not None:
+            return self._find_events(query, profile)
+        return self.flight.do(self.canonical_key(query), lambda: self._find_events(query))
+
+    async def find_events_async(self, query: SearchQuery) -> SearchResult:
+        """Asyncio variant of find_events, coalesced with threaded callers too."""
+        return await self.flight.do_async(self.canonical_key(query), lambda: self._find_events(query))
+
+    def _find_events(self, query: SearchQuery, profile: Profile | None = None) -> SearchResult:
         logger = logging.getLogger(self.__class__.__name__)
         try:
-            events = self.repository.search_text(query.text, filters=query.__dict__)
-            ranked = self.policy.rank(events, query)
+            events = self.repository.search_text(query.text, filters=query.as_filter(), profile=profile)
+            with self.telemetry.time_block("rank", profile):
+                ranked = self.policy.rank(events, query)
             logger.info(f"Found {len(ranked)} events for query '{query.text}'")
             return SearchResult(events=ranked, total=len(ranked))
         except Exception as e:
             logger.error(f"Error in find_events: {e}")
             raise
+
+    def similar_events(self, event_id: str, limit: int = 10) -> SearchResult | None:
+        """Upcoming events most like event_id, from precomputed neighbour lists; None if unknown."""
+        neighbours = similar_index_for(self.repository).similar(event_id, limit)
+        if neighbours is None:
+            return None
+        events = self.repository.find_by_ids([n for n, _ in neighbours])
+        return SearchResult(events=events, total=len(events))
+
+    def suggest(self, prefix: str, limit: int = 8) -> list[dict]:
+        """Return autocomplete suggestions for a typed prefix."""
+        return suggest_index_for(self.repository).suggest(prefix, limit)
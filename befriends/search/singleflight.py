@@ -0,0 +1,115 @@
+"""Single-flight coalescing of identical concurrent computations."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Callable, Hashable
+
+from ..common.telemetry import Telemetry
+
+
+class _Call:
+    """One in-flight computation and everyone waiting on it."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class SingleFlight:
+    """Runs a computation once per key while it is in flight; concurrent callers share it.
+
+    Threaded callers (FastAPI sync endpoints) block on an event; asyncio callers
+    await a future, and the leader's work runs in a worker thread. Both kinds of
+    caller share the same in-flight map, so a threaded leader also serves async
+    followers and vice versa. Nothing is cached after completion.
+
+    Counters ``<name>.leader`` and ``<name>.coalesced`` are recorded on the
+    telemetry instance; ``stats()`` derives the suppression rate from them.
+    """
+
+    def __init__(self, telemetry: Telemetry | None = None, name: str = "singleflight"):
+        self.telemetry = telemetry or Telemetry()
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def _join(self, key: Hashable) -> tuple[_Call, bool]:
+        """Return the call for key and whether the caller is its leader."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.telemetry.increment(f"{self.name}.coalesced")
+                return call, False
+            call = self._calls[key] = _Call()
+            self.telemetry.increment(f"{self.name}.leader")
+            return call, True
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        # Setting done under the lock means a late async follower either sees it
+        # set or is already in async_waiters.
+        with self._lock:
+            del self._calls[key]
+            call.done.set()
+            waiters, call.async_waiters = call.async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve, future, call)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, call: _Call) -> None:
+        if future.done():
+            return
+        if call.error is not None:
+            future.set_exception(call.error)
+        else:
+            future.set_result(call.result)
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn()'s result, computing it at most once across concurrent callers."""
+        call, leader = self._join(key)
+        if leader:
+            return self._run(key, call, fn)
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Async variant of do(); fn is a blocking callable run in a worker thread."""
+        call, leader = self._join(key)
+        if leader:
+            return await asyncio.to_thread(self._run, key, call, fn)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            finished = call.done.is_set()
+            if not finished:
+                call.async_waiters.append((loop, future))
+        if finished:
+            self._resolve(future, call)
+        return await future
+
+    def stats(self) -> dict[str, float]:
+        """Leader/coalesced counts and the share of requests that were suppressed."""
+        counters = self.telemetry.counters()
+        leaders = counters.get(f"{self.name}.leader", 0)
+        coalesced = counters.get(f"{self.name}.coalesced", 0)
+        total = leaders + coalesced
+        return {
+            "leaders": leaders,
+            "coalesced": coalesced,
+            "suppression_rate": coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,146 @@
+"""Prefix autocomplete over event names, organizers, venues and dance styles."""
+
+from __future__ import annotations
+
+import datetime
+import heapq
+from bisect import bisect_left
+from typing import Iterable
+
+from .trigram import fold_text
+
+
+class PrefixIndex:
+    """Sorted-array prefix index with precomputed top-k completions.
+
+    Every completion key sits in one sorted list, so the keys sharing a prefix
+    form a contiguous slice found by two bisections. Slices larger than
+    ``dense_threshold`` (the upper trie nodes, e.g. "b" or "sal") have their
+    top-k completions precomputed at build time; smaller slices are ranked on
+    the fly. Either way a lookup touches at most ``dense_threshold`` entries.
+    """
+
+    KINDS = {
+        "event_name": "event",
+        "organizer": "organizer",
+        "event_location": "venue",
+        "dance_style": "dance_style",
+    }
+
+    def __init__(self, top_k: int = 20, dense_threshold: int = 64):
+        self.top_k = top_k
+        self.dense_threshold = dense_threshold
+        self.built_on: datetime.date | None = None
+        self._keys: list[str] = []
+        self._terms: list[int] = []
+        self._display: list[str] = []
+        self._kind: list[str] = []
+        self._weight: list[int] = []
+        self._dense: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._display)
+
+    @classmethod
+    def build(
+        cls, terms: Iterable[tuple[str, str, int]], built_on: datetime.date | None = None, **kwargs
+    ) -> "PrefixIndex":
+        """Build from (display, kind, weight) triples; repeated terms add up their weight."""
+        index = cls(**kwargs)
+        index.built_on = built_on
+        merged: dict[str, list] = {}
+        for display, kind, weight in terms:
+            display = (display or "").strip()
+            folded = " ".join(fold_text(display).split())
+            if not folded:
+                continue
+            entry = merged.get(folded)
+            if entry is None:
+                merged[folded] = [display, kind, weight]
+            else:
+                entry[2] += weight
+        pairs: list[tuple[str, int]] = []
+        for term_id, (folded, (display, kind, weight)) in enumerate(merged.items()):
+            index._display.append(display)
+            index._kind.append(kind)
+            index._weight.append(weight)
+            # Index every word start so "basel" also completes "Museumsnacht Basel".
+            words = folded.split()
+            for i in range(len(words)):
+                pairs.append((" ".join(words[i:]), term_id))
+        pairs.sort()
+        index._keys = [key for key, _ in pairs]
+        index._terms = [term_id for _, term_id in pairs]
+        index._precompute(0, len(pairs), 0)
+        return index
+
+    def _best(self, lo: int, hi: int, k: int) -> list[int]:
+        """Top-k distinct term ids by weight within the key slice [lo, hi)."""
+        best = heapq.nlargest(k * 2, set(self._terms[lo:hi]), key=self._weight.__getitem__)
+        return best[:k]
+
+    def _precompute(self, lo: int, hi: int, depth: int) -> None:
+        """Store top-k for every prefix node whose slice exceeds the dense threshold."""
+        if hi - lo <= self.dense_threshold:
+            return
+        self._dense[self._keys[lo][:depth]] = self._best(lo, hi, self.top_k)
+        # Keys equal to the prefix itself sort first and have no child node.
+        start = lo
+        while start < hi and len(self._keys[start]) <= depth:
+            start += 1
+        while start < hi:
+            child = self._keys[start][: depth + 1]
+            end = bisect_left(self._keys, child + "\uffff", start, hi)
+            self._precompute(start, end, depth + 1)
+            start = end
+
+    def suggest(self, prefix: str, limit: int = 8) -> list[dict]:
+        """Return up to ``limit`` completions for ``prefix``, heaviest first."""
+        folded = " ".join(fold_text(prefix).split())
+        if prefix[-1:].isspace() and folded:
+            folded += " "
+        if not folded:
+            return []
+        limit = min(limit, self.top_k)
+        lo = bisect_left(self._keys, folded)
+        hi = bisect_left(self._keys, folded + "\uffff", lo)
+        if hi - lo > self.dense_threshold:
+            best = self._dense.get(folded) or self._best(lo, hi, self.top_k)
+            best = best[:limit]
+        else:
+            best = self._best(lo, hi, limit)
+        return [
+            {"text": self._display[t], "kind": self._kind[t], "weight": self._weight[t]}
+            for t in best
+        ]
+
+
+def suggest_index_for(repo) -> PrefixIndex:
+    """Return the shared prefix index of a catalog, rebuilt on generation or day change.
+
+    Weights count upcoming events, so the index is also refreshed once the
+    date rolls over and yesterday's events drop out.
+    """
+    today = datetime.date.today()
+
+    def build() -> PrefixIndex:
+        from sqlalchemy import func
+        from ..catalog.orm import EventORM
+        session = repo.Session()
+        try:
+            columns = [getattr(EventORM, field) for field in PrefixIndex.KINDS]
+            rows = session.query(*columns).filter(func.date(EventORM.start_datetime) >= today)
+            terms: list[tuple[str, str, int]] = []
+            for row in rows:
+                for field, value in zip(PrefixIndex.KINDS, row):
+                    values = value if isinstance(value, list) else [value]
+                    terms.extend((v, PrefixIndex.KINDS[field], 1) for v in values if v)
+        finally:
+            session.close()
+        return PrefixIndex.build(terms, built_on=today)
+
+    index = repo.derived_index("suggest", build)
+    if index.built_on != today:
+        repo.invalidate_derived("suggest")
+        index = repo.derived_index("suggest", build)
+    return index
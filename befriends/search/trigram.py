@@ -0,0 +1,142 @@
+"""Trigram index for typo-tolerant lookup on event names, organizers and venues."""
+
+from __future__ import annotations
+
+import math
+import unicodedata
+from array import array
+from typing import Iterable
+
+
+def fold_text(text: str | None) -> str:
+    """Lowercase and strip diacritics so 'Lörrach' and 'lorrach' compare equal."""
+    if not text:
+        return ""
+    text = text.lower().replace("ß", "ss")
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return "".join(c if c.isalnum() else " " for c in stripped)
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the padded word trigrams of an already folded string."""
+    grams: set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
+    """Edit distance between a and b, giving up once it exceeds max_dist."""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        row_min = j
+        for i, ca in enumerate(a, 1):
+            cost = 0 if ca == cb else 1
+            current[i] = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + cost)
+            if current[i] < row_min:
+                row_min = current[i]
+        if row_min > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+class TrigramIndex:
+    """In-memory trigram posting lists with edit-distance re-scoring.
+
+    Candidate lookup only walks the posting lists of the rarest query
+    trigrams (prefix filtering), so the cost is bounded by
+    ``max_candidates`` rather than by the size of the catalog.
+    """
+
+    FIELDS = ("event_name", "organizer", "event_location")
+
+    def __init__(self, min_similarity: float = 0.5, max_candidates: int = 2000):
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._postings: dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple], **kwargs) -> "TrigramIndex":
+        """Build an index from (id, event_name, organizer, event_location) rows."""
+        index = cls(**kwargs)
+        postings: dict[str, list[int]] = {}
+        for row in rows:
+            event_id, fields = row[0], row[1:]
+            text = fold_text(" ".join(f for f in fields if f))
+            if not text:
+                continue
+            ordinal = len(index._ids)
+            index._ids.append(str(event_id))
+            index._texts.append(text)
+            for gram in trigrams(text):
+                postings.setdefault(gram, []).append(ordinal)
+        index._postings = {g: array("I", ords) for g, ords in postings.items()}
+        return index
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[str, float]]:
+        """Return up to ``limit`` (event_id, score) pairs above the similarity threshold."""
+        folded = fold_text(query)
+        query_grams = trigrams(folded)
+        if not query_grams:
+            return []
+        # A document reaching the threshold must share at least `needed` trigrams,
+        # so it has to appear in one of the (len - needed + 1) rarest posting lists.
+        needed = max(1, math.ceil(self.min_similarity * len(query_grams)))
+        ranked = sorted(query_grams, key=lambda g: len(self._postings.get(g, ())))
+        candidates: set[int] = set()
+        for gram in ranked[: len(ranked) - needed + 1]:
+            remaining = self.max_candidates - len(candidates)
+            if remaining <= 0:
+                break
+            candidates.update(self._postings.get(gram, array("I"))[:remaining])
+        scored: list[tuple[float, int]] = []
+        for ordinal in candidates:
+            overlap = len(query_grams & trigrams(self._texts[ordinal])) / len(query_grams)
+            if overlap >= self.min_similarity:
+                scored.append((overlap, ordinal))
+        scored.sort(reverse=True)
+        results: list[tuple[str, float]] = []
+        query_tokens = folded.split()
+        for overlap, ordinal in scored[: limit * 3]:
+            score = (overlap + self._edit_score(query_tokens, self._texts[ordinal].split())) / 2
+            if score >= self.min_similarity:
+                results.append((self._ids[ordinal], score))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:limit]
+
+    @staticmethod
+    def _edit_score(query_tokens: list[str], doc_tokens: list[str]) -> float:
+        """Mean per-token similarity of the query against the closest document token."""
+        if not query_tokens or not doc_tokens:
+            return 0.0
+        total = 0.0
+        for q in query_tokens:
+            max_dist = max(1, len(q) // 3)
+            best = max_dist + 1
+            for d in doc_tokens:
+                # Allow a query token to match a longer word's prefix ("museumsnacht").
+                dist = min(
+                    bounded_levenshtein(q, d, max_dist),
+                    bounded_levenshtein(q, d[: len(q)], max_dist),
+                )
+                if dist < best:
+                    best = dist
+                    if best == 0:
+                        break
+            if best <= max_dist:
+                total += 1 - best / max(len(q), 1)
+        return total / len(query_tokens)
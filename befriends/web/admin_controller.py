@@ -22,4 +22,4 @@ class AdminController:
     def status(self) -> dict:
         """Return system status."""
         # ...gather status info...
-        return {"status": "ok"}
+        return {"status": "ok", "counters": self.telemetry.counters()}
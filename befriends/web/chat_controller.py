@@ -0,0 +1,145 @@
+"""Controller for chat turns served over HTTP and WebSocket."""
+
+from __future__ import annotations
+
+import datetime
+import functools
+import logging
+from typing import Any, Generator, Mapping
+
+from ..chatbot_client import ChatbotClient, Replacement
+from ..common.config import AppConfig
+from ..common.telemetry import Telemetry
+from ..domain.filters import EventFilter
+from ..recommendation.context import RetrievalContext
+from ..recommendation.service import RecommendationService
+from ..response.event_context import events_to_context
+from .session_store import ChatSession, SessionStore
+
+
+def profile_summary(profile: Mapping[str, Any]) -> str:
+    """One-line profile for the system prompt; missing fields are left out."""
+    parts = []
+    if profile.get("age"):
+        parts.append(f"Age: {profile['age']}")
+    if profile.get("city"):
+        parts.append(f"City: {profile['city']}")
+    summary = ", ".join(parts) + "." if parts else ""
+    if profile.get("interests"):
+        summary += f" Interests: {', '.join(profile['interests'])}."
+    return summary.strip()
+
+
+class ChatController:
+    """
+    Answers chat turns with ChatbotService on server-side sessions.
+
+    The client, repository and recommender are built once and shared by
+    all sessions; a turn only opens its session and a RetrievalContext.
+    """
+
+    def __init__(
+        self,
+        chatbot_client: ChatbotClient,
+        sessions: SessionStore,
+        repository,
+        config: AppConfig,
+        telemetry: Telemetry,
+    ):
+        """Initialize with dependencies."""
+        self.chatbot_client = chatbot_client
+        self.sessions = sessions
+        self.repository = repository
+        self.recommender = RecommendationService(repository)
+        self.config = config
+        self.telemetry = telemetry
+        self.encode_events = functools.partial(events_to_context, token_budget=config.llm_context_tokens)
+
+    def _answer(self, session: ChatSession, message: str, stream: bool):
+        from components.chatbot_service import ChatbotService
+
+        # The session only takes the turn once it was answered
+        messages = [*session.messages, {"role": "user", "content": message}]
+        service = ChatbotService(
+            self.chatbot_client, session.profile, use_tools=self.config.features.get("llm_tools", False),
+            history=session.history, deadline=self.config.llm_deadline or None,
+        )
+        context = RetrievalContext(self.repository, self.recommender)
+        response = service.get_response(
+            message, messages, session.filters, service.detect_intent(message), datetime.datetime.now(),
+            self.repository, self.recommender, self.encode_events, profile_summary, context=context, stream=stream,
+        )
+        return response, context, messages
+
+    def _open(self, session_id, filters, profile) -> ChatSession:
+        session = self.sessions.open(session_id)
+        if filters is not None:
+            session.filters = EventFilter.of(filters)
+        if profile is not None:
+            session.profile = dict(profile)
+        return session
+
+    def _finish(self, session: ChatSession, messages: list, reply: str, context: RetrievalContext) -> dict:
+        session.messages = [*messages, {"role": "assistant", "content": reply}]
+        self.sessions.save(session)
+        self.telemetry.record_event("chat", session_id=session.session_id)
+        return {
+            "session_id": session.session_id,
+            "reply": reply,
+            "event_ids": [e.id for e in context.shared_events or []],
+        }
+
+    def handle_chat(
+        self,
+        message: str,
+        session_id: str | None = None,
+        filters: Mapping[str, Any] | None = None,
+        profile: Mapping[str, Any] | None = None,
+    ) -> dict:
+        """Answer one message; filters and profile, if given, replace the session's."""
+        logger = logging.getLogger(self.__class__.__name__)
+        try:
+            session = self._open(session_id, filters, profile)
+            with session.lock:
+                reply, context, messages = self._answer(session, message, stream=False)
+                return self._finish(session, messages, reply, context)
+        except Exception as e:
+            logger.error(f"Error in handle_chat: {e}")
+            raise
+
+    def stream_chat(
+        self,
+        message: str,
+        session_id: str | None = None,
+        filters: Mapping[str, Any] | None = None,
+        profile: Mapping[str, Any] | None = None,
+    ) -> Generator[dict, None, None]:
+        """
+        Answer one message as a sequence of frames.
+
+        ``{"type": "session"}`` carries the session id first, then
+        ``{"type": "chunk"}`` frames carry the answer as it is generated (a
+        ``"replace"`` frame replaces everything before it, see Replacement),
+        and ``{"type": "done"}`` carries the whole reply like handle_chat.
+        Close the generator if the client goes away mid-answer, which
+        releases the session's lock.
+        """
+        logger = logging.getLogger(self.__class__.__name__)
+        try:
+            session = self._open(session_id, filters, profile)
+            yield {"type": "session", "session_id": session.session_id}
+            with session.lock:
+                response, context, messages = self._answer(session, message, stream=True)
+                chunks = [response] if isinstance(response, str) else response
+                reply = ""
+                for chunk in chunks:
+                    if isinstance(chunk, Replacement):
+                        reply = str(chunk)
+                        yield {"type": "replace", "text": reply}
+                    else:
+                        reply += chunk
+                        yield {"type": "chunk", "text": chunk}
+                yield {"type": "done", **self._finish(session, messages, reply, context)}
+        except Exception as e:
+            logger.error(f"Error in stream_chat: {e}")
+            raise
@@ -5,7 +5,7 @@ from __future__ import annotations
 import logging
 from ..search.service import SearchService
 from ..response.formatter import ResponseFormatter
-from ..common.telemetry import Telemetry
+from ..common.telemetry import Profile, Telemetry
 
 
 class SearchController:
@@ -22,32 +22,57 @@ class SearchController:
         self.response_formatter = response_formatter
         self.telemetry = telemetry
 
-    def handle_search(self, query_text: str, **filters) -> dict:
-        """Handle a search request and return UI payload."""
+    def handle_search(self, query_text: str, profile: bool = False, **filters) -> dict:
+        """Handle a search request and return UI payload.
+
+        With profile set, the payload also carries a ``profile`` breakdown of
+        per-stage timings (plan, SQL, hydration, rank, format), rows fetched
+        and derived-index cache hits.
+        """
         logger = logging.getLogger(self.__class__.__name__)
+        from ..domain.filters import EventFilter
         from ..domain.search_models import SearchQuery
 
         try:
-            # Build SearchQuery from query_text and all supported filters
-            query = SearchQuery(
-                text=query_text,
-                start_datetime_from=filters.get("start_datetime_from"),
-                start_datetime_to=filters.get("start_datetime_to"),
-                region=filters.get("region"),
-                event_type=filters.get("event_type"),
-                dance_style=filters.get("dance_style"),
-                price_min=filters.get("price_min"),
-                price_max=filters.get("price_max"),
-            )
+            # Canonicalize the filter keys (date_from, city, ...) before building the query
+            event_filter = EventFilter.of(filters)
+            query = SearchQuery.from_filter(query_text, event_filter)
+            timings = Profile("rows", "cache_hits") if profile else None
             # Search for events
-            result = self.search_service.find_events(query)
+            result = self.search_service.find_events(query, profile=timings)
             # Format response
-            narrative = self.response_formatter.to_narrative(result)
-            cards = self.response_formatter.to_cards(result)
+            with self.telemetry.time_block("format", timings):
+                narrative = self.response_formatter.to_narrative(result)
+                cards = self.response_formatter.to_cards(result)
             # Record telemetry
-            self.telemetry.record_event("search", query=query_text, filters=filters)
-            logger.info(f"Handled search for '{query_text}' with filters {filters}")
-            return {"narrative": narrative, "cards": cards}
+            self.telemetry.record_event("search", query=query_text, filters=event_filter.as_dict())
+            logger.info(f"Handled search for '{query_text}' with filters {event_filter.as_dict()}")
+            payload: dict = {"narrative": narrative, "cards": cards}
+            if timings is not None:
+                payload["profile"] = timings.as_dict()
+            return payload
         except Exception as e:
             logger.error(f"Error in handle_search: {e}")
             raise
+
+    def handle_similar(self, event_id: str, limit: int = 10) -> dict | None:
+        """Handle a "more like this" request; None if the event is unknown."""
+        logger = logging.getLogger(self.__class__.__name__)
+        try:
+            result = self.search_service.similar_events(event_id, limit)
+            if result is None:
+                return None
+            return {"event_id": event_id, "cards": self.response_formatter.to_cards(result)}
+        except Exception as e:
+            logger.error(f"Error in handle_similar: {e}")
+            raise
+
+    def handle_suggest(self, prefix: str, limit: int = 8) -> dict:
+        """Handle an autocomplete request for the search box."""
+        logger = logging.getLogger(self.__class__.__name__)
+        try:
+            suggestions = self.search_service.suggest(prefix, limit)
+            return {"prefix": prefix, "suggestions": suggestions}
+        except Exception as e:
+            logger.error(f"Error in handle_suggest: {e}")
+            raise
@@ -0,0 +1,191 @@
+"""Server-side chat sessions with TTL eviction, in memory or in SQLite."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from ..common.telemetry import Telemetry
+from ..domain.filters import EventFilter
+from ..llm.history import ConversationHistory
+
+
+@dataclass
+class ChatSession:
+    """
+    What the server keeps of one chat between turns.
+
+    ``messages`` holds only the turns the next prompt repeats verbatim;
+    older ones live on as the history's rolling summary (see ``compact``).
+    """
+
+    session_id: str
+    history: ConversationHistory
+    messages: list[dict[str, str]] = field(default_factory=list)
+    filters: EventFilter = field(default_factory=EventFilter)
+    profile: dict[str, Any] = field(default_factory=dict)
+    last_used: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def compact(self) -> None:
+        """Drop the messages already folded into the history's summary."""
+        self.messages = [dict(m) for m in self.history.trim(self.messages)]
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "messages": self.messages,
+            "filters": self.filters.as_dict(),
+            "profile": self.profile,
+            "history": self.history.state(),
+        }, ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, session_id: str, encoded: str, history: ConversationHistory, last_used: float) -> "ChatSession":
+        state = json.loads(encoded)
+        return cls(
+            session_id,
+            history.restore(state["history"]),
+            messages=state["messages"],
+            filters=EventFilter.of(state["filters"]),
+            profile=state["profile"],
+            last_used=last_used,
+        )
+
+
+class SessionStore:
+    """
+    Chat sessions keyed by an opaque id, evicted after ``ttl`` seconds unused.
+
+    In memory the store is an LRU of at most ``max_sessions`` sessions, and
+    concurrent turns of one session are serialized by its lock. With
+    ``path`` the sessions are kept in a SQLite table instead, so any worker
+    process that opens the same file can continue any session; two workers
+    answering the same session at once keep the last write.
+
+    Counters ``chat.session.created``, ``chat.session.resumed`` and
+    ``chat.session.evicted`` are kept on the telemetry instance.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 1800.0,
+        max_sessions: int = 1000,
+        path: str | None = None,
+        new_history: Callable[[], ConversationHistory] = ConversationHistory,
+        telemetry: Telemetry | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.path = path
+        self.new_history = new_history
+        self.telemetry = telemetry or Telemetry()
+        self.clock = clock
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            with self._connect() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                    "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS ix_chat_sessions_last_used ON chat_sessions (last_used)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=5.0)  # type: ignore[arg-type]
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def open(self, session_id: str | None = None) -> ChatSession:
+        """The live session with session_id, or a new one (with a new id) if there is none."""
+        session = self._load(session_id) if session_id else None
+        if session is None:
+            self.telemetry.increment("chat.session.created")
+            return ChatSession(uuid.uuid4().hex, self.new_history(), last_used=self.clock())
+        self.telemetry.increment("chat.session.resumed")
+        return session
+
+    def save(self, session: ChatSession) -> None:
+        """Store session after a turn, compacted, and evict expired sessions."""
+        session.compact()
+        session.last_used = self.clock()
+        if self.path:
+            self._save_disk(session)
+            return
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            self._evict_memory()
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.path:
+            with self._connect() as db:
+                db.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        if self.path:
+            with self._connect() as db:
+                return db.execute(
+                    "SELECT COUNT(*) FROM chat_sessions WHERE last_used >= ?", (self.clock() - self.ttl,)
+                ).fetchone()[0]
+        with self._lock:
+            self._evict_memory()
+            return len(self._sessions)
+
+    def _load(self, session_id: str) -> ChatSession | None:
+        if not self.path:
+            with self._lock:
+                self._evict_memory()
+                return self._sessions.get(session_id)
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT state, last_used FROM chat_sessions WHERE session_id = ? AND last_used >= ?",
+                (session_id, self.clock() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        return ChatSession.from_json(session_id, row[0], self.new_history(), row[1])
+
+    def _evict_memory(self) -> None:
+        expired = [sid for sid, s in self._sessions.items() if s.last_used < self.clock() - self.ttl]
+        while len(self._sessions) - len(expired) > self.max_sessions:
+            # Least recently used first; the expired ones are dropped below anyway
+            expired.append(next(sid for sid in self._sessions if sid not in expired))
+        for sid in expired:
+            del self._sessions[sid]
+        if expired:
+            self.telemetry.increment("chat.session.evicted", len(expired))
+
+    def _save_disk(self, session: ChatSession) -> None:
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO chat_sessions (session_id, state, last_used) VALUES (?, ?, ?)",
+                    (session.session_id, session.to_json(), session.last_used),
+                )
+                evicted = db.execute("DELETE FROM chat_sessions WHERE last_used < ?", (self.clock() - self.ttl,)).rowcount
+                evicted += db.execute(
+                    "DELETE FROM chat_sessions WHERE session_id IN "
+                    "(SELECT session_id FROM chat_sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,),
+                ).rowcount
+        except sqlite3.Error as e:
+            logging.getLogger(self.__class__.__name__).warning(f"Could not persist chat session: {e}")
+            return
+        if evicted:
+            self.telemetry.increment("chat.session.evicted", evicted)
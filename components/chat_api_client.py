@@ -0,0 +1,46 @@
+import json
+from urllib.parse import urlsplit, urlunsplit
+
+from befriends.chatbot_client import Replacement
+
+
+def websocket_url(base_url: str, path: str = "/ws/chat") -> str:
+    """ws(s):// URL of path on the API at base_url (http(s)://host:port)."""
+    parts = urlsplit(base_url)
+    scheme = {"https": "wss", "http": "ws"}.get(parts.scheme, parts.scheme)
+    return urlunsplit((scheme, parts.netloc, parts.path.rstrip("/") + path, "", ""))
+
+
+class ChatApiClient:
+    """
+    Sends chat turns to the chat API (befriends.app's /ws/chat) instead of
+    answering them in the Streamlit process.
+
+    The server keeps the session; ``session_id`` is the one to send with the
+    next turn and is updated from every answer.
+    """
+
+    def __init__(self, base_url, session_id=None, timeout=60.0):
+        self.url = websocket_url(base_url)
+        self.session_id = session_id
+        self.timeout = timeout
+
+    def stream(self, message, filters=None, profile=None):
+        """Yield the answer's text chunks like ChatbotService with stream set (Replacement included)."""
+        from websockets.sync.client import connect
+
+        request = {"message": message, "session_id": self.session_id, "filters": filters, "profile": profile}
+        with connect(self.url, open_timeout=self.timeout) as websocket:
+            websocket.send(json.dumps(request, ensure_ascii=False, default=str))
+            while True:
+                frame = json.loads(websocket.recv(timeout=self.timeout))
+                if frame["type"] == "session":
+                    self.session_id = frame["session_id"]
+                elif frame["type"] == "chunk":
+                    yield frame["text"]
+                elif frame["type"] == "replace":
+                    yield Replacement(frame["text"])
+                elif frame["type"] == "done":
+                    return
+                else:
+                    raise RuntimeError(f"Chat API error: {frame.get('detail')}")
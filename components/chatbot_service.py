@@ -1,63 +1,77 @@
-import re
-import copy
-
 import logging
 
-# Move is_event_suggestion_request here to avoid circular import
-import re
+from befriends.chatbot_client import FALLBACK_REPLY
+from befriends.domain.filters import EventFilter
+from befriends.llm.history import ConversationHistory
+from befriends.recommendation.context import RetrievalContext
+from befriends.response.event_context import FORMAT_NOTE
+from components.intent_matcher import analyze
+
+# How far to widen the search when the user's own region has nothing in the window.
+NEARBY_RADIUS_KM = 40
+
 def is_event_suggestion_request(user_input: str) -> bool:
     """Detect if the user is asking for event suggestions in a generic way."""
-    user_input = user_input.strip().lower()
-    patterns = [
-        r"what's happening( this weekend)?",
-        r"any events( this weekend)?",
-        r"was geht( am wochenende)?",
-        r"tipps?",
-        r"irgendwas los",
-    ]
-    return any(re.search(pat, user_input) for pat in patterns)
+    return "suggestion" in analyze(user_input)
+
+
+def is_surprise_request(user_input: str) -> bool:
+    """Detect 'surprise me' requests, answered with a random event instead of the LLM."""
+    return "surprise" in analyze(user_input)
 
 class ChatbotService:
-    def __init__(self, chatbot_client, profile):
+    def __init__(self, chatbot_client, profile, use_tools=False, history=None, deadline=None):
+        """
+        With use_tools set, event questions are answered through the catalog
+        tools (see befriends.llm.tools.EventTools) instead of a prefetched event
+        list in the system prompt.
+
+        history (a befriends.llm.history.ConversationHistory) bounds the chat
+        history sent with each prompt; pass the session's instance so its
+        rolling summary carries over between turns.
+
+        With a deadline (seconds), event answers that the LLM has not given
+        in time are replaced by a templated list of the retrieved events;
+        when streaming, a late LLM answer then replaces the list.
+        """
         self.chatbot_client = chatbot_client
         self.profile = profile
+        self.use_tools = use_tools
+        self.history = history or ConversationHistory()
+        self.deadline = deadline
 
     @staticmethod
     def detect_intent(user_input: str) -> str:
-        user_input = user_input.strip().lower()
-        greetings = ["hi", "hello", "hey", "hallo", "servus", "guten tag", "moin", "grüß dich", "yo"]
-        for g in greetings:
-            if user_input == g or user_input.startswith(g + " ") or re.fullmatch(rf"{g}[.!?]*", user_input):
-                return "greeting"
-        smalltalk_patterns = [
-            r"how are you", r"was geht", r"wie geht's", r"alles klar", r"what's up", r"wie läuft's", r"wie geht es dir"
-        ]
-        for pat in smalltalk_patterns:
-            if re.search(pat, user_input):
-                return "smalltalk"
-        event_keywords = [
-            "event", "veranstaltung", "konzert", "party", "festival", "happening", "los", "tipps", "wo kann ich", "was kann ich", "wo ist", "wo gibt es", "wo findet", "wo läuft", "wo kann man"
-        ]
-        for k in event_keywords:
-            if k in user_input:
-                return "event_query"
-        if 'is_event_suggestion_request' in globals() and is_event_suggestion_request(user_input):
-            return "event_query"
-        return "other"
-
-    def get_response(self, user_input, messages, filters, intent, today, repo, recommender, events_to_json, get_profile_summary):
+        """greeting, smalltalk, surprise, event_query or other (see components.intent_matcher)."""
+        return analyze(user_input).intent
+
+    def get_response(self, user_input, messages, filters, intent, today, repo, recommender, encode_events, get_profile_summary, context=None, stream=False):
+        """Answer one chat turn.
+
+        With stream set, answers that come from the LLM are returned as an
+        iterator of text chunks (see ChatbotClient.stream_response); canned
+        answers are still returned as strings.
+
+        encode_events(events, max_events=..., generation=...) renders the
+        events for the prompt, e.g. befriends.response.event_context.events_to_context.
+
+        Retrievals go through context (a RetrievalContext for this turn, created
+        if not given), which also keeps the events put into the prompt so the
+        recommendation panel can show the same ones.
+        """
         logger = logging.getLogger("chatbot_service")
+        context = context or RetrievalContext(repo, recommender)
         logger.info(f"[USER QUERY] {user_input}")
-        filters = copy.deepcopy(filters)
+        filters = EventFilter.of(filters)
         logger.info(f"[PROFILE] {self.profile}")
-        logger.info(f"[FILTERS] {filters}")
+        logger.info(f"[FILTERS] {filters.as_dict()}")
         # --- Ensure user profile city is mapped to region filter if region is not set ---
         if self.profile and isinstance(self.profile, dict):
-            if not filters.get("region"):
+            if filters.region_unset:
                 city = self.profile.get("city")
                 if city:
-                    filters["region"] = city
-        logger.info(f"[FILTERS AFTER CITY/REGION LOGIC] {filters}")
+                    filters = filters.replace(region=city)
+        logger.info(f"[FILTERS AFTER CITY/REGION LOGIC] {filters.as_dict()}")
         logger.info(f"[INTENT] {intent}")
         logger.info(f"[MESSAGES] {messages}")
         if intent == "greeting":
@@ -68,61 +82,48 @@ class ChatbotService:
             response = "Mir geht's super, danke der Nachfrage! Und wie läuft's bei dir? 😊"
             logger.info(f"[BOT RESPONSE] {response}")
             return response
+        elif intent == "surprise":
+            # Straight to a random sample: no date-ordered top 10, no LLM round trip
+            from befriends.response.formatter import ResponseFormatter
+            events = repo.sample(filters, k=1)
+            if events:
+                response = "🎲 Überraschung! Wie wär's damit?\n" + ResponseFormatter().chat_event_list(events)
+            else:
+                response = "Ich habe gerade kein passendes Event für eine Überraschung gefunden – probier's mit anderen Filtern! 😊"
+            logger.info(f"[BOT RESPONSE] {response}")
+            return response
         if intent == "event_query" or (len(messages) == 1 and is_event_suggestion_request(user_input)):
             import datetime
             today_real = datetime.datetime.now().date()
             today_str = today_real.strftime("%A, %d %B %Y")
             user_input_lc = user_input.strip().lower()
-            # Detect 'this week' and set date_from/date_to accordingly
-            if ("this week" in user_input_lc) or ("diese woche" in user_input_lc):
-                today_real = datetime.datetime.now().date()
-                start_of_week = today_real - datetime.timedelta(days=today_real.weekday())
-                end_of_week = start_of_week + datetime.timedelta(days=6)
-                filters["date_from"] = start_of_week
-                filters["date_to"] = end_of_week
-            # Detect 'this weekend' and set date_from/date_to to Saturday and Sunday
-            elif ("this weekend" in user_input_lc) or ("dieses wochenende" in user_input_lc):
-                today_real = datetime.datetime.now().date()
-                # Saturday = 5, Sunday = 6
-                days_until_saturday = (5 - today_real.weekday()) % 7
-                saturday = today_real + datetime.timedelta(days=days_until_saturday)
-                sunday = saturday + datetime.timedelta(days=1)
-                filters["date_from"] = saturday
-                filters["date_to"] = sunday
-            # Detect 'next few days' and set date_from/date_to to today and today+3
-            elif ("next few days" in user_input_lc) or ("kommenden tage" in user_input_lc):
-                today_real = datetime.datetime.now().date()
-                filters["date_from"] = today_real
-                filters["date_to"] = today_real + datetime.timedelta(days=3)
-            # Detect 'this month' and set date_from/date_to to first and last day of month
-            elif ("this month" in user_input_lc) or ("diesen monat" in user_input_lc):
-                today_real = datetime.datetime.now().date()
-                start = today_real.replace(day=1)
-                if today_real.month == 12:
-                    end = today_real.replace(year=today_real.year+1, month=1, day=1) - datetime.timedelta(days=1)
-                else:
-                    end = today_real.replace(month=today_real.month+1, day=1) - datetime.timedelta(days=1)
-                filters["date_from"] = start
-                filters["date_to"] = end
-            # Detect 'tonight' and set date_from/date_to to today
-            elif ("tonight" in user_input_lc) or ("heute abend" in user_input_lc):
-                today_real = datetime.datetime.now().date()
-                filters["date_from"] = today_real
-                filters["date_to"] = today_real
-            elif not filters.get("date_from"):
-                filters["date_from"] = today.date()
-            if filters.get("city") and not any(e for e in repo.search_text("", filters)):
-                filters["city"] = ""
-            logger.info(f"[DEBUG] get_response filters (after date/city logic): {filters}")
-            logger.info(f"[DEBUG] get_response calling recommender.recommend_events with filters: {filters}")
-            events = recommender.recommend_events(filters, self.profile, 10, today=today)
+            # "this weekend", "heute abend", "ce mois" ...: the scan that found the intent also found the period
+            window = analyze(user_input).window(today_real)
+            if window:
+                filters = filters.replace(date_from=window[0], date_to=window[1])
+            elif not filters.date_from:
+                filters = filters.replace(date_from=today.date())
+            filters = context.recommender.effective_filters(filters, self.profile, today.date())
+            # Nothing in the user's own region for this window: include the nearby regions
+            if filters.region and not filters.region_radius and not context.exists(filters):
+                filters = filters.replace(region_radius=NEARBY_RADIUS_KM)
+            logger.info(f"[DEBUG] get_response filters (after date/region logic): {filters.as_dict()}")
+            generation = self._generation(context.repository)
+            if self.use_tools:
+                return self._tool_reply(
+                    user_input_lc, messages, filters, today, today_str, context, encode_events, generation,
+                    get_profile_summary, stream,
+                )
+            logger.info(f"[DEBUG] get_response calling recommender.recommend_events with filters: {filters.as_dict()}")
+            events = context.share(context.recommend(filters, self.profile, 10, today=today))
             logger.info(f"[DEBUG] get_response recommender returned {len(events)} events")
-            event_json = events_to_json(events, max_events=10)
+            event_table = encode_events(events, max_events=10, generation=generation)
             # Only trigger medieval Karolina prompt if user_input contains 'karolina', not event data
             base_instruction = (
-                "IMPORTANT: Never invent or hallucinate events. Only use the events provided in the JSON list below. "
+                "IMPORTANT: Never invent or hallucinate events. Only use the events provided in the event list below. "
                 "If there are no events matching the user's criteria, respond with a friendly message such as: 'Sorry, I couldn't find any events for your request. Please try different criteria or ask about something else.' "
             )
+            event_list = f"\nHere are the upcoming events ({FORMAT_NOTE}):\n" + (event_table or "(none)")
             if "karolina" in user_input_lc:
                 system_prompt = {
                     "role": "system",
@@ -135,7 +136,7 @@ class ChatbotService:
                         f"Today is {today_str}. "
                         "You are <b>EventMate</b>, a warm, approachable, and friendly companion who helps users discover fun events and activities. "
                         + get_profile_summary(self.profile)
-                        + "\nHere is a list of upcoming events as JSON: " + event_json
+                        + event_list
                     )
                 }
             else:
@@ -146,24 +147,15 @@ class ChatbotService:
                         f"Today is {today_str}. "
                         "You are <b>EventMate</b>, a warm, approachable, and friendly companion who helps users discover fun events and activities. "
                         + get_profile_summary(self.profile)
-                        + "\nHere is a list of upcoming events as JSON: " + event_json
+                        + event_list
                     )
                 }
-            full_messages = [system_prompt] + messages
-            try:
-                response = self.chatbot_client.get_response(
-                    user_id="eventbot-user",
-                    messages=full_messages,
-                )
-                logger.info(f"[DEBUG] ChatbotClient response type: {type(response)}, value: {repr(response)}")
-                logger.info(f"[DEBUG] get_response ChatbotClient response: {response}")
-            except Exception as e:
-                logger.error(f"[ERROR] Exception in chatbot_client.get_response: {e}")
-                response = f"[Error from chatbot backend: {e}]"
-            if not response or not isinstance(response, str):
-                logger.error(f"[ERROR] Invalid response in get_response: {repr(response)}, type: {type(response)}, messages: {messages}")
-                return "I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊"
-            return response
+            full_messages = self.history.compact(messages, system_prompt)
+            # The prompt embeds catalog events, so its answer is only reused within one catalog generation
+            return self._reply(
+                full_messages, messages, stream, cache_scope=generation and f"catalog:{generation}",
+                fallback=self._event_list_reply(events) if self.deadline else None,
+            )
         else:
             import datetime
             today_real = datetime.datetime.now().date()
@@ -200,18 +192,107 @@ class ChatbotService:
                         + "\nAntworte freundlich und locker auf die Nachricht des Users. Wenn du nicht sicher bist, was gemeint ist, stelle eine Rückfrage."
                     )
                 }
-            short_history = messages[-2:] if len(messages) > 1 else messages
-            full_messages = [system_prompt] + short_history
-            try:
-                response = self.chatbot_client.get_response(
-                    user_id="eventbot-user",
-                    messages=full_messages,
-                )
-                logger.info(f"[DEBUG] ChatbotClient response type: {type(response)}, value: {repr(response)}")
-            except Exception as e:
-                logger.error(f"[ERROR] Exception in chatbot_client.get_response: {e}")
-                response = f"[Error from chatbot backend: {e}]"
-            if not response or not isinstance(response, str):
-                logger.error(f"[ERROR] Invalid response in get_response: {repr(response)}, type: {type(response)}, messages: {messages}")
-                return "I'm here to help! Could you please rephrase your question or ask about events, concerts, or activities? 😊"
-            return response
+            full_messages = self.history.compact(messages, system_prompt)
+            return self._reply(full_messages, messages, stream)
+
+    @staticmethod
+    def _generation(repo):
+        try:
+            return str(repo.generation())
+        except Exception as e:
+            logging.getLogger("chatbot_service").warning(f"No catalog generation for the prompt caches: {e}")
+            return None
+
+    def _tool_reply(self, user_input_lc, messages, filters, today, today_str, context, encode_events, generation, get_profile_summary, stream):
+        """Answer an event question with the model fetching events through the catalog tools."""
+        from befriends.llm.tools import EventTools
+        logger = logging.getLogger("chatbot_service")
+        tools = EventTools(
+            context, self.profile, defaults=filters, today=today.date(),
+            encode_events=encode_events, generation=generation,
+        )
+        defaults = ", ".join(f"{k}={v}" for k, v in filters.as_dict().items()) or "none"
+        content = (
+            "IMPORTANT: Never invent or hallucinate events. Only mention events returned by the tools. "
+            "Use search_events to find events, get_event for details and similar_events for alternatives. "
+            "If the tools find nothing, say so in a friendly way and suggest different criteria. "
+            f"The user's current filters, used by search_events for any argument you leave out: {defaults}. "
+            f"Today is {today_str}. "
+            "You are <b>EventMate</b>, a warm, approachable, and friendly companion who helps users discover fun events and activities. "
+            + get_profile_summary(self.profile)
+        )
+        if "karolina" in user_input_lc:
+            content += (
+                "\nThe user asked about Karolina Anna Kehl-Soltys, the legendary founder, known for her wisdom, kindness, "
+                "and love of dance, music, and community: praise her in medieval, poetic language."
+            )
+        full_messages = self.history.compact(messages, {"role": "system", "content": content})
+        try:
+            response = self.chatbot_client.complete_with_tools(
+                user_id="eventbot-user", messages=full_messages, tools=tools,
+            )
+        except Exception as e:
+            logger.error(f"[ERROR] Exception in chatbot_client.complete_with_tools: {e}")
+            response = f"[Error from chatbot backend: {e}]"
+        context.share(tools.returned)
+        logger.info(f"[DEBUG] get_response tools returned {len(tools.returned)} events")
+        if not response or not isinstance(response, str):
+            logger.error(f"[ERROR] Invalid response in get_response: {repr(response)}, messages: {messages}")
+            response = FALLBACK_REPLY
+        # The tool loop needs the whole answer before it knows no further call follows
+        return iter([response]) if stream else response
+
+    @staticmethod
+    def _event_list_reply(events):
+        """Answer built from the retrieved events without the LLM, for when it is too slow."""
+        from befriends.response.formatter import ResponseFormatter
+        if not events:
+            return "Sorry, I couldn't find any events for your request. Please try different criteria or ask about something else."
+        return "Hier sind ein paar Events, die gut passen könnten:\n" + ResponseFormatter().chat_event_list(events[:5])
+
+    def _reply(self, full_messages, messages, stream, cache_scope=None, fallback=None):
+        """
+        The LLM's answer to full_messages, as a string or, if stream is set, an iterator of text chunks.
+
+        With a fallback and the service's deadline, a slow LLM is hedged and, past the deadline, the fallback served.
+        """
+        slo = {"deadline": self.deadline, "fallback": fallback} if self.deadline and fallback else {}
+        if stream:
+            return self._stream_reply(full_messages, cache_scope, **slo)
+        logger = logging.getLogger("chatbot_service")
+        try:
+            response = self.chatbot_client.get_response(
+                user_id="eventbot-user",
+                messages=full_messages,
+                cache_scope=cache_scope,
+                **slo,
+            )
+            logger.info(f"[DEBUG] ChatbotClient response type: {type(response)}, value: {repr(response)}")
+        except Exception as e:
+            logger.error(f"[ERROR] Exception in chatbot_client.get_response: {e}")
+            response = f"[Error from chatbot backend: {e}]"
+        if not response or not isinstance(response, str):
+            logger.error(f"[ERROR] Invalid response in get_response: {repr(response)}, type: {type(response)}, messages: {messages}")
+            return FALLBACK_REPLY
+        return response
+
+    def _stream_reply(self, full_messages, cache_scope=None, **slo):
+        # Same error and empty-answer handling as the blocking path, applied to a stream
+        logger = logging.getLogger("chatbot_service")
+        received = False
+        try:
+            for chunk in self.chatbot_client.stream_response(
+                user_id="eventbot-user",
+                messages=full_messages,
+                cache_scope=cache_scope,
+                **slo,
+            ):
+                received = received or bool(chunk.strip())
+                yield chunk
+        except Exception as e:
+            logger.error(f"[ERROR] Exception in chatbot_client.stream_response: {e}")
+            yield f"[Error from chatbot backend: {e}]"
+            return
+        if not received:
+            logger.error("[ERROR] Empty streamed response in get_response")
+            yield FALLBACK_REPLY
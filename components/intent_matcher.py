@@ -0,0 +1,153 @@
+"""Single-pass intent and time-phrase matching for chat messages."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping
+
+VOCABULARY_PATH = Path(__file__).resolve().parents[1] / "befriends" / "data" / "chat_vocabulary.json"
+
+# Intents in order of precedence; "suggestion" phrases also count as event queries.
+INTENTS = ("greeting", "smalltalk", "surprise", "event_query")
+# Periods in order of precedence when a message names several.
+PERIODS = ("this_week", "this_weekend", "next_days", "this_month", "tonight")
+
+
+@dataclass(frozen=True)
+class Utterance:
+    """What one scan of a message found."""
+
+    intent: str
+    labels: frozenset[str] = frozenset()
+    period: str | None = None
+
+    def __contains__(self, label: str) -> bool:
+        """Whether a phrase of intent label (e.g. "surprise", "suggestion") occurs, whatever won."""
+        return label in self.labels
+
+    def window(self, today: datetime.date) -> tuple[datetime.date, datetime.date] | None:
+        """(date_from, date_to) of the period relative to today, or None."""
+        return period_window(self.period, today) if self.period else None
+
+
+def period_window(period: str, today: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """Date window of a named period."""
+    if period == "this_week":
+        monday = today - datetime.timedelta(days=today.weekday())
+        return monday, monday + datetime.timedelta(days=6)
+    if period == "this_weekend":
+        saturday = today + datetime.timedelta(days=(5 - today.weekday()) % 7)
+        return saturday, saturday + datetime.timedelta(days=1)
+    if period == "next_days":
+        return today, today + datetime.timedelta(days=3)
+    if period == "this_month":
+        first_of_next = (today.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return today.replace(day=1), first_of_next - datetime.timedelta(days=1)
+    if period == "tonight":
+        return today, today
+    raise ValueError(f"Unknown period: {period}")
+
+
+def trie_pattern(phrases: list[str]) -> str:
+    """Regex matching any of phrases, longest first, with shared prefixes factored out.
+
+    A flat alternation makes the regex engine try every phrase at every
+    position; the trie form follows a single path per position.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase ends here: the longer ones are tried first, greedily
+        if "" in node:
+            return body + "?" if len(branches) == 1 and len(branches[0]) == 1 else f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+def normalize(text: str) -> str:
+    """Lower-cased, stripped text with typographic apostrophes made plain."""
+    return text.strip().lower().replace("’", "'")
+
+
+class IntentMatcher:
+    """
+    Classifies a message and finds the period it names in one regex scan.
+
+    All phrases of the vocabulary are compiled into one trie-shaped regex
+    (see ``trie_pattern``) that finds the longest phrase at each position in
+    a single left-to-right pass. A phrase carries the intents of every
+    vocabulary phrase it contains (so "any events" is a suggestion and has
+    the keyword "event"), which stands in for overlapping matches; only
+    phrases glued together without a space could still hide one another.
+    Periods come from the matched phrase only, so "this weekend" is not also
+    "this week".
+
+    Greetings count only at the start of the message, followed by a space,
+    end punctuation or nothing; they are checked with one anchored match.
+    """
+
+    def __init__(self, vocabulary: Mapping[str, Mapping[str, Mapping[str, list[str]]]]):
+        greetings = {normalize(p) for phrases in vocabulary["intents"].get("greeting", {}).values() for p in phrases}
+        labels: dict[str, set[str]] = {}
+        periods: dict[str, str] = {}
+        for intent, languages in vocabulary["intents"].items():
+            if intent != "greeting":
+                for phrase in (normalize(p) for phrases in languages.values() for p in phrases):
+                    labels.setdefault(phrase, set()).add(intent)
+        for period, languages in vocabulary["periods"].items():
+            for phrase in (normalize(p) for phrases in languages.values() for p in phrases):
+                periods[phrase] = period
+                labels.setdefault(phrase, set())
+        phrases = sorted(labels, key=len, reverse=True)
+        self._labels = {p: frozenset().union(*(labels[q] for q in phrases if q in p)) for p in phrases}
+        self._periods = periods
+        self._greeting = re.compile(rf"(?:{trie_pattern(sorted(greetings))})(?= |[.!?]*$)")
+        self._pattern = re.compile(trie_pattern(phrases))
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "IntentMatcher":
+        """Matcher for a vocabulary file (default: the shipped DE/EN/FR vocabulary)."""
+        with open(path or VOCABULARY_PATH, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def scan(self, text: str) -> Utterance:
+        """Intent, matched intent labels and period of text."""
+        text = normalize(text)
+        found: set[str] = {"greeting"} if self._greeting.match(text) else set()
+        periods: set[str] = set()
+        for phrase in self._pattern.findall(text):
+            found.update(self._labels[phrase])
+            if phrase in self._periods:
+                periods.add(self._periods[phrase])
+        if "suggestion" in found:
+            found.add("event_query")
+        intent = next((i for i in INTENTS if i in found), "other")
+        period = next((p for p in PERIODS if p in periods), None)
+        return Utterance(intent, frozenset(found), period)
+
+
+@lru_cache(maxsize=None)
+def default_matcher() -> IntentMatcher:
+    """The matcher for the shipped vocabulary, compiled once per process."""
+    return IntentMatcher.load()
+
+
+@lru_cache(maxsize=1024)
+def analyze(text: str) -> Utterance:
+    """``default_matcher().scan(text)``, memoized: intent detection and date resolution share one scan."""
+    return default_matcher().scan(text)
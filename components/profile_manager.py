@@ -36,9 +36,10 @@ class ProfileManager:
         return ProfileManager.ensure_profile_in_session().get("city", "")
 
     @staticmethod
-    def get_default_filters() -> dict:
+    def get_default_filters():
         import sqlite3
         from befriends.common.config import AppConfig
+        from befriends.domain.filters import EventFilter
         config = AppConfig.from_env()
         db_path = config.db_url.replace("sqlite:///", "") if config.db_url.startswith("sqlite:///") else config.db_url
         profile = ProfileManager.ensure_profile_in_session()
@@ -52,12 +53,4 @@ class ProfileManager:
                     city_value = ""
         except Exception:
             city_value = ""
-        return {
-            "city": city_value,
-            "category": "",
-            "date_from": None,
-            "date_to": None,
-            "price_min": None,
-            "price_max": None,
-            "apply_filters": True,
-        }
+        return EventFilter.of(region=city_value)
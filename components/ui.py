@@ -1,19 +1,24 @@
 from befriends.recommendation.service import RecommendationService
 from befriends.catalog.repository import CatalogRepository
+from befriends.domain.filters import EventFilter
 import streamlit as st
 import logging
 from typing import Dict, Any, List, Optional, Callable
 from befriends.response.formatter import ResponseFormatter
 def render_event_recommendations(
-    filters: Optional[Dict[str, Any]] = None,
-    max_events: int = 6
+    filters: Optional[EventFilter] = None,
+    max_events: int = 6,
+    context=None,
 ) -> None:
     """
     Fetch and render event recommendations as cards, optionally filtered.
 
     Args:
-        filters (Optional[Dict[str, Any]]): Dictionary of filter values (city, category, date_from, etc.).
+        filters (Optional[EventFilter]): Filter values (region, event_type, date_from, etc.).
         max_events (int): Maximum number of events to show.
+        context (Optional[RetrievalContext]): The current chat turn's retrievals. Its
+            shared events (those the chatbot just answered with) are shown without
+            a query; otherwise recommendations are fetched through it.
     """
     # st.markdown("---")
     st.markdown("##### Recommended for you")
@@ -21,28 +26,32 @@ def render_event_recommendations(
     formatter = ResponseFormatter()
     # Load user profile (hardcoded fallback for sidebar)
     import datetime
-    if filters is None:
-        filters = {}
+    filters = EventFilter.of(filters)
     try:
         with open("karolina_profile.json", "r") as f:
             profile = json.load(f)
     except Exception:
         profile = {"city": "Basel", "interests": []}
     # --- Patch: Always filter by user city (as region_standardized) and this week ---
-    if profile.get("city") and not filters.get("region_standardized"):
-        filters["region_standardized"] = profile["city"]
-        # Only set date_from/date_to to this week (Monday-Sunday) if missing or None
+    if profile.get("city") and filters.region_unset:
+        filters = filters.replace(region=profile["city"])
+        # Only set date_from/date_to to this week (Monday-Sunday) if missing
         today = datetime.datetime.now().date()
         start_of_week = today - datetime.timedelta(days=today.weekday())
         end_of_week = start_of_week + datetime.timedelta(days=6)
-        if "date_from" not in filters or filters["date_from"] is None:
-            filters["date_from"] = start_of_week
-        if "date_to" not in filters or filters["date_to"] is None:
-            filters["date_to"] = end_of_week
+        filters = filters.replace(
+            date_from=filters.date_from or start_of_week,
+            date_to=filters.date_to or end_of_week,
+        )
     try:
-        repo = CatalogRepository()
-        recommender = RecommendationService(repo)
-        filtered_events = recommender.recommend_events(filters, profile, max_events)
+        if context is not None and context.shared_events is not None:
+            filtered_events = context.shared_events[:max_events]
+        elif context is not None:
+            filtered_events = context.recommend(filters, profile, max_events)
+        else:
+            repo = CatalogRepository()
+            recommender = RecommendationService(repo)
+            filtered_events = recommender.recommend_events(filters, profile, max_events)
         # Debug: show number of events found and type
         # Ensure filtered_events are Event objects, not dicts
         from befriends.domain.event import Event
@@ -58,18 +67,23 @@ def render_event_recommendations(
         st.warning(f"Could not load event recommendations: {e}")
         st.info("No events found for your filters.")
 def render_sidebar_filters(default_city=None):
-    # Logging removed
+    """Render the sidebar filter widgets.
+
+    Returns:
+        tuple[EventFilter, bool, bool]: The selected filters and whether
+        "Apply Filters" and "Reset Filters" were pressed.
+    """
     import streamlit as st
     import datetime
-    filters = st.session_state.get("filters", {})
+    filters = EventFilter.of(st.session_state.get("filters"))
     date_from = st.date_input(
         "From",
-        value=filters.get("date_from") if filters.get("date_from") else datetime.date.today(),
+        value=filters.date_from or datetime.date.today(),
         key="sidebar_date_from"
     )
     date_to = st.date_input(
         "To",
-        value=filters.get("date_to") if filters.get("date_to") else (datetime.date.today() + datetime.timedelta(days=30)),
+        value=filters.date_to or (datetime.date.today() + datetime.timedelta(days=30)),
         key="sidebar_date_to"
     )
     # Use selectbox for region, not free text
@@ -94,6 +108,9 @@ def render_sidebar_filters(default_city=None):
         key="sidebar_region_standardized",
         on_change=trigger_apply_filter
     )
+    region_radius = st.sidebar.slider(
+        "Include nearby regions (km)", min_value=0, max_value=80, value=0, step=10, key="sidebar_region_radius"
+    )
     category = st.sidebar.selectbox("Category", ["", "Music", "Sports", "Food & Drink", "Theater", "Comedy", "Family", "Outdoors", "Workshops", "Other"], key="sidebar_category")
     price_min = st.sidebar.number_input("Min price", min_value=0.0, value=0.0, step=1.0, key="sidebar_price_min")
     price_max = st.sidebar.number_input("Max price", min_value=0.0, value=999.0, step=1.0, key="sidebar_price_max")
@@ -102,18 +119,16 @@ def render_sidebar_filters(default_city=None):
         st.session_state["region_changed"] = False
     reset_filters = st.sidebar.button("Reset Filters", key="sidebar_reset_filters")
 
-    # When returning filters, log them
-    sidebar_filters = {
-        "region_standardized": region_standardized,
-    "category": category,
-    "date_from": date_from,
-    "date_to": date_to,
-    "price_min": price_min,
-    "price_max": price_max,
-    "apply_filters": apply_filters,
-    "reset_filters": reset_filters,
-    }
-    return sidebar_filters
+    sidebar_filters = EventFilter.of(
+        region=region_standardized,
+        region_radius=region_radius,
+        event_type=category,
+        date_from=date_from,
+        date_to=date_to,
+        price_min=price_min,
+        price_max=price_max,
+    )
+    return sidebar_filters, apply_filters, reset_filters
 
 
 def render_event_card(event: Dict[str, Any], key_prefix: str = "") -> None:
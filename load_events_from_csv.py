@@ -8,6 +8,9 @@ from befriends.catalog.repository import CatalogRepository
 from befriends.catalog.orm import get_engine_and_session, Base
 from befriends.catalog.orm import EventORM  # Ensure EventORM is registered
 from befriends.data_processing.events_loader import load_events_from_csv
+from befriends.recommendation.candidates import candidate_lists_for
+from befriends.recommendation.similar import similar_index_for
+from befriends.search.embedding import embedding_index_for
 
 def get_latest_csv_path():
     csv_files = glob.glob("befriends/data/events/*_events.csv")
@@ -60,6 +63,21 @@ def import_events_from_csv(csv_path=CSV_PATH, db_url=DB_URL, verbose=True):
         logger.info(f"Filtered events: {len(filtered_events)} remain after removing regions with <10 entries.")
         count = repo.upsert(filtered_events)
         logger.info(f"Upserted {count} events into DB.")
+        try:
+            # Precompute semantic vectors at ingest time so serving processes only memory-map them
+            embedding_index_for(repo)
+        except Exception as e:
+            logger.warning(f"Could not build embedding index: {e}")
+        try:
+            # Neighbour lists back /events/{id}/similar; later imports patch them incrementally
+            similar_index_for(repo)
+        except Exception as e:
+            logger.warning(f"Could not build similar-events index: {e}")
+        try:
+            # Region × window recommendation lists; later imports recompute them in place
+            candidate_lists_for(repo)
+        except Exception as e:
+            logger.warning(f"Could not materialize recommendation candidates: {e}")
         if verbose:
             print(f"Imported {count} events from {csv_path}")
         return {"imported": count, "errors": []}
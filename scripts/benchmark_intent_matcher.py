@@ -0,0 +1,77 @@
+"""
+Microbenchmark of chat message classification.
+
+Times the compiled single-pass matcher (components.intent_matcher) against
+the per-call pattern lists it replaced, which classified the intent and then
+ran a separate chain of substring checks for the time phrase. Reports
+microseconds per message and checks both agree on the intent.
+
+    python scripts/benchmark_intent_matcher.py --repeat 2000
+"""
+import argparse
+import re
+import timeit
+
+from components.intent_matcher import IntentMatcher
+
+MESSAGES = [
+    "hi", "Hey!", "Guten Tag, gibt es Konzerte diese Woche?", "how are you?", "Was geht am Wochenende?",
+    "Surprise me with a random event.", "Zufälliges Event bitte", "Any events this weekend?",
+    "What's happening in Basel tonight?", "Tipps für die kommenden Tage?", "irgendwas los heute abend?",
+    "Wo kann ich diesen Monat tanzen gehen?", "Is there a salsa party in Lörrach next few days?",
+    "tell me a joke", "Wer hat dich gebaut und warum magst du eigentlich Events so sehr?",
+    "I am looking for something to do with my friends, ideally outdoors and not too expensive, this month",
+]
+
+
+def legacy_intent(user_input):
+    user_input = user_input.strip().lower()
+    for g in ["hi", "hello", "hey", "hallo", "servus", "guten tag", "moin", "grüß dich", "yo"]:
+        if user_input == g or user_input.startswith(g + " ") or re.fullmatch(rf"{g}[.!?]*", user_input):
+            return "greeting"
+    for pat in [r"how are you", r"was geht", r"wie geht's", r"alles klar", r"what's up", r"wie läuft's", r"wie geht es dir"]:
+        if re.search(pat, user_input):
+            return "smalltalk"
+    if any(re.search(p, user_input) for p in [r"surprise me", r"random event", r"überrasch", r"zufällige[sn]? (event|veranstaltung)", r"surprends[- ]moi"]):
+        return "surprise"
+    for k in ["event", "veranstaltung", "konzert", "party", "festival", "happening", "los", "tipps", "wo kann ich", "was kann ich", "wo ist", "wo gibt es", "wo findet", "wo läuft", "wo kann man"]:
+        if k in user_input:
+            return "event_query"
+    if any(re.search(p, user_input) for p in [r"what's happening( this weekend)?", r"any events( this weekend)?", r"was geht( am wochenende)?", r"tipps?", r"irgendwas los"]):
+        return "event_query"
+    return "other"
+
+
+def legacy_period(user_input):
+    text = user_input.strip().lower()
+    for period, phrases in [
+        ("this_week", ("this week", "diese woche")),
+        ("this_weekend", ("this weekend", "dieses wochenende")),
+        ("next_days", ("next few days", "kommenden tage")),
+        ("this_month", ("this month", "diesen monat")),
+        ("tonight", ("tonight", "heute abend")),
+    ]:
+        if any(p in text for p in phrases):
+            return period
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="passes over the message set")
+    args = parser.parse_args()
+    matcher = IntentMatcher.load()
+    for message in MESSAGES:
+        assert matcher.scan(message).intent == legacy_intent(message), message
+    runs = args.repeat * len(MESSAGES)
+    legacy = timeit.timeit(lambda: [(legacy_intent(m), legacy_period(m)) for m in MESSAGES], number=args.repeat)
+    compiled = timeit.timeit(lambda: [matcher.scan(m) for m in MESSAGES], number=args.repeat)
+    build = timeit.timeit(IntentMatcher.load, number=20) / 20
+    print(f"{'implementation':<22}{'us/message':>12}")
+    print(f"{'pattern lists':<22}{legacy / runs * 1e6:>12.2f}")
+    print(f"{'compiled matcher':<22}{compiled / runs * 1e6:>12.2f}")
+    print(f"\nSpeed-up {legacy / compiled:.1f}x; building the matcher takes {build * 1e3:.2f} ms once per process")
+
+
+if __name__ == "__main__":
+    main()
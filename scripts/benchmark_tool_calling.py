@@ -0,0 +1,199 @@
+"""
+Compare prefetched events in the system prompt with function-calling retrieval.
+
+Runs a scripted multi-turn conversation through ChatbotService twice, once
+with the event table in every system prompt and once with the catalog tools
+(BEFRIENDS_FEATURES=llm_tools), against a local mock completion server whose
+latency grows with the prompt size. Reports prompt tokens, round trips and
+latency per turn.
+
+    python scripts/benchmark_tool_calling.py --events 300 --ms-per-token 0.3
+"""
+import argparse
+import datetime
+import functools
+import json
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.chatbot_client import ChatbotClient, ChatbotConfig
+from befriends.common.config import AppConfig
+from befriends.domain.event import Event
+from befriends.llm.transport import LLMTransport
+from befriends.recommendation.context import RetrievalContext
+from befriends.response.event_context import estimate_tokens, events_to_context
+from components.chatbot_service import ChatbotService
+
+REGIONS = ["Basel (CH)", "Lörrach (DE)", "Weil am Rhein (DE)", "Riehen (CH)"]
+TYPES = ["Party", "Concert", "Dance", "Festival", "Workshop"]
+STYLES = ["Salsa", "Bachata", "Kizomba", "Tango", "Swing"]
+
+# (user message, tool call the mock model makes for it); "{id}" is the last event it recommended
+SCRIPT = [
+    ("Any events in the next days?", ("search_events", {})),
+    ("Are there concert events?", ("search_events", {"event_type": "Concert"})),
+    ("Tell me more about that event", ("get_event", {"event_id": "{id}"})),
+    ("Any similar events?", ("similar_events", {"event_id": "{id}"})),
+    ("And free events this month?", ("search_events", {"free_only": True})),
+]
+_RECOMMENDED = re.compile(r"\[id:([^\]]+)\]")
+
+
+def make_catalog(path, count, seed=7):
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    events = []
+    for i in range(count):
+        start = datetime.datetime.combine(today + datetime.timedelta(days=rng.randrange(30)), datetime.time(rng.choice([18, 19, 20, 21])))
+        price = rng.choice([0, 10, 15, 25, 40])
+        events.append(Event(
+            id=f"evt_{i}", event_name=f"{rng.choice(STYLES)} {rng.choice(TYPES)} #{i}",
+            start_datetime=start, end_datetime=start + datetime.timedelta(hours=3),
+            recurrence_rule=None, date_description=None, event_type=rng.choice(TYPES), dance_focus=None,
+            dance_style=rng.sample(STYLES, 2), price_min=price, price_max=price, currency="CHF",
+            pricing_type="free" if not price else "paid", price_category="free" if not price else None,
+            audience_min=None, audience_max=None, audience_size_bucket=None,
+            age_min=rng.choice([None, 16, 18]), age_max=None, age_group_label=None, user_category=None,
+            event_location=f"Venue {rng.randrange(40)}", region=None, region_standardized=rng.choice(REGIONS),
+            season=None, cross_border_potential=None, organizer=f"Organizer {rng.randrange(25)}", instagram=None,
+            description="An evening of music and dancing. " * 8,
+        ))
+    repo = CatalogRepository(f"sqlite:///{path}")
+    repo.upsert(events)
+    return repo
+
+
+def _strings(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+    elif value is not None:
+        yield str(value)
+
+
+def prompt_tokens(payload):
+    """Estimated prompt tokens: message text plus a few per message, and the tools' names and descriptions.
+
+    The API renders tool schemas into a compact signature, so their JSON
+    punctuation is not counted.
+    """
+    tokens = 0
+    for message in payload["messages"]:
+        tokens += 4 + estimate_tokens(message.get("content") or "")
+        tokens += sum(estimate_tokens(text) for text in _strings(message.get("tool_calls")))
+    return tokens + sum(estimate_tokens(text) for text in _strings(payload.get("tools")))
+
+
+class MockCompletionServer:
+    """OpenAI-style completion endpoint whose latency is base_ms plus ms_per_token per prompt token."""
+
+    def __init__(self, base_ms, ms_per_token):
+        self.prompt_tokens = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                tokens = prompt_tokens(payload)
+                server.prompt_tokens.append(tokens)
+                time.sleep((base_ms + ms_per_token * tokens) / 1000)
+                body = json.dumps({"choices": [{"message": server.answer(payload)}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def answer(payload):
+        messages = payload["messages"]
+        user = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+        if payload.get("tool_choice") == "auto" and messages[-1]["role"] != "tool":
+            name, arguments = dict(SCRIPT)[user]
+            last = [i for m in messages if m["role"] == "assistant" for i in _RECOMMENDED.findall(m.get("content") or "")]
+            arguments = {k: v.format(id=last[-1] if last else "evt_0") if isinstance(v, str) else v for k, v in arguments.items()}
+            call = {"id": "call_1", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            return {"role": "assistant", "content": None, "tool_calls": [call]}
+        # Recommend the first event of the freshest table: a tool result or the system prompt
+        tables = [m["content"] for m in messages if m["role"] == "tool"] or [messages[0]["content"]]
+        rows = [line for line in tables[-1].split("\n") if re.match(r"evt_\d+\|", line)]
+        if not rows:
+            return {"role": "assistant", "content": "Sorry, nothing matches."}
+        name = rows[0].split("|")[1]
+        return {"role": "assistant", "content": f"How about {name}? [id:{rows[0].split('|')[0]}]"}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run(repo, server, use_tools, context_tokens):
+    app_config = AppConfig(
+        db_url="", openai_api_key="sk-bench", openai_api_endpoint=server.url,
+        sources=[], features={}, llm_cache_size=0,
+    )
+    client = ChatbotClient(ChatbotConfig(app_config), transport=LLMTransport())
+    profile = {"city": "Basel (CH)"}
+    service = ChatbotService(client, profile, use_tools=use_tools)
+    encode_events = functools.partial(events_to_context, token_budget=context_tokens)
+    messages, latencies = [], []
+    server.prompt_tokens.clear()
+    for user_message, _ in SCRIPT:
+        messages.append({"role": "user", "content": user_message})
+        context = RetrievalContext(repo)
+        started = time.perf_counter()
+        answer = service.get_response(
+            user_message, messages, {}, service.detect_intent(user_message), datetime.datetime.now(),
+            repo, context.recommender, encode_events, lambda profile: "", context=context,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        messages.append({"role": "assistant", "content": answer})
+    return list(server.prompt_tokens), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300, help="catalog size")
+    parser.add_argument("--base-ms", type=float, default=50.0, help="fixed latency per completion")
+    parser.add_argument("--ms-per-token", type=float, default=0.3, help="latency per prompt token")
+    parser.add_argument("--context-tokens", type=int, default=700, help="token budget of event tables (BEFRIENDS_LLM_CONTEXT_TOKENS)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = make_catalog(f"{tmp}/bench.db", args.events)
+        server = MockCompletionServer(args.base_ms, args.ms_per_token)
+        try:
+            results = {mode: run(repo, server, mode == "tools", args.context_tokens) for mode in ("prefetch", "tools")}
+        finally:
+            server.close()
+    print(f"{'mode':<10}{'requests':>10}{'prompt tokens':>15}{'tokens/turn':>13}{'mean ms/turn':>14}{'p95 ms':>9}")
+    for mode, (tokens, latencies) in results.items():
+        p95 = sorted(latencies)[max(0, round(0.95 * len(latencies)) - 1)]
+        print(
+            f"{mode:<10}{len(tokens):>10}{sum(tokens):>15}{sum(tokens) / len(SCRIPT):>13.0f}"
+            f"{statistics.mean(latencies):>14.1f}{p95:>9.1f}"
+        )
+    prefetch, tools = (sum(results[mode][0]) for mode in ("prefetch", "tools"))
+    print(f"\nPrompt tokens with tools: {tools / prefetch:.0%} of prefetch")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from befriends.common.telemetry import Telemetry
 
 # Compose dependencies
 repo = CatalogRepository()
-policy = RelevancePolicy()
+policy = RelevancePolicy(repository=repo)
 service = SearchService(repo, policy)
 formatter = ResponseFormatter()
 telemetry = Telemetry()
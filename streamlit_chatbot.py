@@ -15,6 +15,7 @@ logger.setLevel(logging.INFO)
 import html
 import uuid
 import datetime
+import functools
 import json
 from pathlib import Path
 from components.ui import render_sidebar_filters
@@ -27,13 +28,17 @@ from components.chat_ui import (
     render_chat_bubble,
 )
 from befriends.recommendation.service import RecommendationService
+from befriends.recommendation.context import RetrievalContext
 from befriends.catalog.repository import CatalogRepository
-from befriends.chatbot_client import ChatbotClient, ChatbotConfig
+from befriends.domain.filters import EventFilter
+from befriends.chatbot_client import ChatbotClient, ChatbotConfig, Replacement
 from befriends.common.config import AppConfig
 from befriends.response.formatter import ResponseFormatter
-from befriends.response.event_json import events_to_json
+from befriends.response.event_context import events_to_context
+from befriends.llm.history import ConversationHistory
 from components.profile_manager import ProfileManager
 from components.chatbot_service import ChatbotService
+from components.chat_api_client import ChatApiClient
 
 # --- Constants ---
 CHAT_HEADER_PATH = "assets/chat_header.html"
@@ -48,11 +53,8 @@ def get_chatbot_today():
 
 def get_event_summaries(filters, profile, limit=10):
     """Get event summaries for recommendations."""
-    filters = st.session_state.get("filters", filters)
+    filters = EventFilter.of(st.session_state.get("filters", filters))
     profile = st.session_state.get("profile", profile)
-    if "region" in filters and "region_standardized" not in filters:
-        filters["region_standardized"] = filters["region"]
-        del filters["region"]
     try:
         repo = CatalogRepository()
         recommender = RecommendationService(repo)
@@ -142,6 +144,66 @@ def render_chat_ui(chatbot_client):
             else:
                 st.warning("Please enter a message before sending.")
 
+def stream_into_bubble(chunks, placeholder):
+    """Render a streamed answer into placeholder as it arrives and return the full text."""
+    text = ""
+    timestamp = datetime.datetime.now().strftime("%H:%M")
+    for chunk in chunks:
+        # A late LLM answer replaces the event list served at the deadline
+        text = chunk if isinstance(chunk, Replacement) else text + chunk
+        placeholder.markdown(render_chat_bubble("assistant", text + " ▌", timestamp, True), unsafe_allow_html=True)
+    return text
+
+def answer_via_api(api_url, message, col_chat):
+    """Stream the answer from the chat API into a bubble; the API keeps the session's history."""
+    api = ChatApiClient(api_url, st.session_state.get("chat_session_id"))
+    with col_chat:
+        render_chat_ui(None)
+        response = stream_into_bubble(
+            api.stream(message, EventFilter.of(st.session_state["filters"]).as_dict(), st.session_state.get("profile")),
+            st.empty(),
+        )
+    st.session_state["chat_session_id"] = api.session_id
+    return response
+
+def answer_in_process(config, chatbot_client, col_chat):
+    """Answer the last user message with ChatbotService in this process, streaming it into a bubble."""
+    # One history per session, so its summary is extended rather than rebuilt every turn
+    if "history" not in st.session_state:
+        st.session_state["history"] = ConversationHistory(
+            keep_turns=config.llm_history_turns, token_budget=config.llm_prompt_tokens,
+        )
+    chatbot_service = ChatbotService(
+        chatbot_client, st.session_state["profile"], use_tools=config.features.get("llm_tools", False),
+        history=st.session_state["history"],
+        deadline=config.llm_deadline or None,
+    )
+    last_user_message = st.session_state["messages"][-1]["content"]
+    intent = chatbot_service.detect_intent(last_user_message)
+    # One retrieval context per turn, shared with the recommendation panel
+    repo = CatalogRepository()
+    context = RetrievalContext(repo, RecommendationService(repo))
+    st.session_state["turn_context"] = context
+    response = chatbot_service.get_response(
+        last_user_message,
+        st.session_state["messages"],
+        st.session_state["filters"],
+        intent,
+        get_chatbot_today(),
+        repo,
+        context.recommender,
+        functools.partial(events_to_context, token_budget=config.llm_context_tokens),
+        get_profile_summary,
+        context=context,
+        stream=True,
+    )
+    if not isinstance(response, str):
+        # Show the history and let the answer grow in a bubble below it
+        with col_chat:
+            render_chat_ui(chatbot_client)
+            response = stream_into_bubble(response, st.empty())
+    return response
+
 def append_message(role, content):
     """Append a message to chat history."""
     now_str = datetime.datetime.now().strftime("%H:%M")
@@ -167,24 +229,20 @@ def main():
             st.session_state[key] = default
     if "filters" not in st.session_state or not st.session_state.filters:
         st.session_state.filters = ProfileManager.get_default_filters()
-    if "region" in st.session_state.filters and "region_standardized" not in st.session_state.filters:
-        st.session_state.filters["region_standardized"] = st.session_state.filters["region"]
-        del st.session_state.filters["region"]
-    if "apply_filters" not in st.session_state.filters or not st.session_state.filters["apply_filters"]:
-        st.session_state.filters["apply_filters"] = True
     if not st.session_state["messages"]:
         today = datetime.datetime.now().date()
         one_month_later = today + datetime.timedelta(days=30)
-        st.session_state["filters"]["date_from"] = today
-        st.session_state["filters"]["date_to"] = one_month_later
+        st.session_state["filters"] = EventFilter.of(st.session_state["filters"], date_from=today, date_to=one_month_later)
 
     # --- AppConfig and ChatbotClient setup ---
     chatbot_client = None
     chatbot_init_error = None
     try:
         config = AppConfig.from_env()
-        chatbot_client = ChatbotClient(ChatbotConfig(config))
-        logger.info("ChatbotClient initialized.")
+        # With a chat API the turns are answered there; this script only renders them
+        if not config.chat_api_url:
+            chatbot_client = ChatbotClient(ChatbotConfig(config))
+            logger.info("ChatbotClient initialized.")
     except Exception as e:
         chatbot_init_error = e
         logger.error(f"Chatbot init error: {e}")
@@ -200,33 +258,32 @@ def main():
     with st.sidebar:
         st.markdown("## EventBot Filters")
         try:
-            sidebar_filters = render_sidebar_filters(default_city=ProfileManager.get_default_city())
+            sidebar_filters, apply_filters, reset_filters = render_sidebar_filters(
+                default_city=ProfileManager.get_default_city()
+            )
         except Exception as e:
             st.error(f"Failed to load sidebar filters: {e}")
             logger.error(f"Sidebar filter error: {e}")
-            sidebar_filters = {}
-        if sidebar_filters.get("apply_filters"):
+            sidebar_filters, apply_filters, reset_filters = EventFilter(), False, False
+        if apply_filters:
             logger.info("Sidebar: Apply filters pressed.")
-            st.session_state["filters"] = sidebar_filters.copy()
-        elif sidebar_filters.get("reset_filters"):
+            st.session_state["filters"] = sidebar_filters
+            st.session_state.pop("turn_context", None)
+        elif reset_filters:
             logger.info("Sidebar: Reset filters pressed.")
-            st.session_state["filters"] = {
-                "city": "",
-                "category": "",
-                "date_from": None,
-                "date_to": None,
-                "price_min": 0.0,
-                "price_max": 0.0,
-                "apply_filters": False,
-            }
+            st.session_state["filters"] = EventFilter()
+            st.session_state.pop("turn_context", None)
         if st.session_state.show_debug:
             st.markdown("---")
             st.markdown("### Debug Info")
             st.write({
                 "messages": st.session_state.get("messages"),
-                "filters": st.session_state.get("filters"),
+                "filters": EventFilter.of(st.session_state.get("filters")).as_dict(),
                 "show_sidebar": st.session_state.get("show_sidebar"),
-                "region_standardized": st.session_state.get("filters", {}).get("region_standardized"),
+                "llm_cache": chatbot_client.cache.stats() if chatbot_client and chatbot_client.cache else None,
+                "prompt_size": st.session_state["history"].stats() if "history" in st.session_state else None,
+                "llm_slo": chatbot_client.slo_stats() if chatbot_client else None,
+                "llm_queue": chatbot_client.scheduler.stats() if chatbot_client and chatbot_client.scheduler else None,
             })
 
     # --- Main Chat and Recommendations Layout ---
@@ -261,20 +318,10 @@ def main():
             if st.session_state["messages"] and st.session_state["messages"][-1]["role"] == "user":
                 try:
                     logger.info("Chatbot: Backend call started.")
-                    chatbot_service = ChatbotService(chatbot_client, st.session_state["profile"])
-                    last_user_message = st.session_state["messages"][-1]["content"]
-                    intent = chatbot_service.detect_intent(last_user_message)
-                    response = chatbot_service.get_response(
-                        last_user_message,
-                        st.session_state["messages"],
-                        st.session_state["filters"],
-                        intent,
-                        get_chatbot_today(),
-                        CatalogRepository(),
-                        RecommendationService(CatalogRepository()),
-                        events_to_json,
-                        get_profile_summary,
-                    )
+                    if config.chat_api_url:
+                        response = answer_via_api(config.chat_api_url, st.session_state["messages"][-1]["content"], col_chat)
+                    else:
+                        response = answer_in_process(config, chatbot_client, col_chat)
                     logger.info(f"Chatbot: Backend call finished. Response: {response}")
                     if isinstance(response, dict) and "content" in response:
                         response = response["content"]
@@ -308,7 +355,7 @@ def main():
         try:
             from components.recommendation_panel import RecommendationPanel
             logger.info(f"[TRACE] About to render RecommendationPanel. filters={st.session_state.get('filters')}")
-            RecommendationPanel.render(filters=st.session_state["filters"])
+            RecommendationPanel.render(filters=st.session_state["filters"], context=st.session_state.get("turn_context"))
             logger.info("[TRACE] Recommendations UI rendered.")
         except Exception as e:
             logger.error(f"Recommendations: Failed to load: {e}")
@@ -61,45 +61,48 @@ class DummyEvent:
             summary += f" [{self.event_type}]"
         return summary
 
+def build_event(**fields):
+    """An Event with every field defaulted; fields override the defaults."""
+    base = dict(
+        id="1",
+        event_name="Sample Event",
+        start_datetime=datetime(2025, 10, 1, 20, 0),
+        end_datetime=None,
+        recurrence_rule=None,
+        date_description=None,
+        event_type=None,
+        dance_focus=None,
+        dance_style=None,
+        price_min=None,
+        price_max=None,
+        currency=None,
+        pricing_type=None,
+        price_category=None,
+        audience_min=None,
+        audience_max=None,
+        audience_size_bucket=None,
+        age_min=None,
+        age_max=None,
+        age_group_label=None,
+        user_category=None,
+        event_location=None,
+        region=None,
+        region_standardized=None,
+        season=None,
+        cross_border_potential=None,
+        organizer=None,
+        instagram=None,
+        event_link=None,
+        event_link_fit=None,
+        description=None,
+        ingested_at=datetime.now(),
+    )
+    base.update(fields)
+    return Event(**base)
+
 @pytest.fixture
 def make_event():
-    def _make_event(**kwargs):
-        base = dict(
-            id="1",
-            event_name="Sample Event",
-            start_datetime=datetime(2025, 10, 1, 20, 0),
-            end_datetime=None,
-            recurrence_rule=None,
-            date_description=None,
-            event_type=None,
-            dance_focus=None,
-            dance_style=None,
-            price_min=None,
-            price_max=None,
-            currency=None,
-            pricing_type=None,
-            price_category=None,
-            audience_min=None,
-            audience_max=None,
-            audience_size_bucket=None,
-            age_min=None,
-            age_max=None,
-            age_group_label=None,
-            user_category=None,
-            event_location=None,
-            region=None,
-            season=None,
-            cross_border_potential=None,
-            organizer=None,
-            instagram=None,
-            event_link=None,
-            event_link_fit=None,
-            description=None,
-            ingested_at=datetime.now(),
-        )
-        base.update(kwargs)
-        return Event(**base)
-    return _make_event
+    return build_event
 
 class MockResponse:
     def __init__(self, json_data, status_code=200):
@@ -117,3 +120,16 @@ class MockResponse:
 def enable_strict_mode():
     # Example: could set up strict mode, logging, or env vars for all tests
     pass
+
+@pytest.fixture(autouse=True)
+def fresh_llm_transport():
+    # Pool, circuit breaker, response cache, hedge latencies and rate budget are process-wide; keep tests from sharing their state
+    from befriends.llm.cache import shared_response_cache
+    from befriends.llm.hedging import shared_hedger
+    from befriends.llm.scheduler import shared_scheduler
+    from befriends.llm.transport import shared_transport
+    for shared in (shared_transport, shared_response_cache, shared_hedger, shared_scheduler):
+        shared.cache_clear()
+    yield
+    for shared in (shared_transport, shared_response_cache, shared_hedger, shared_scheduler):
+        shared.cache_clear()
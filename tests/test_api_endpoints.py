@@ -2,6 +2,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from befriends.app import create_app
+from befriends.catalog.repository import CatalogRepository
 
 
 @pytest.fixture(scope="module")
@@ -27,3 +28,35 @@ def test_admin_reingest_endpoint(client):
     data = response.json()
     assert data["status"] == "ok"
     assert "ingested" in data
+
+
+def test_suggest_endpoint(client):
+    response = client.get("/suggest", params={"prefix": "sa", "limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["prefix"] == "sa"
+    assert len(data["suggestions"]) <= 3
+    assert client.get("/suggest", params={"prefix": ""}).status_code == 422
+
+
+def test_search_profile_requires_admin(client):
+    params = {"query_text": "music", "profile": 1}
+    assert client.get("/search", params=params).status_code == 401
+    assert client.get("/search", params={**params, "password": "wrong"}).status_code == 401
+    data = client.get("/search", params={**params, "password": "import123"}).json()
+    assert {"sql_ms", "hydration_ms", "rank_ms", "format_ms", "rows", "cache_hits", "total_ms"} <= set(data["profile"])
+    assert "profile" not in client.get("/search", params={"query_text": "music"}).json()
+
+
+def test_similar_events_endpoint(client):
+    assert client.get("/events/does-not-exist/similar").status_code == 404
+    recent = CatalogRepository().list_recent(limit=1)
+    if not recent:
+        pytest.skip("catalog is empty")
+    event_id = recent[0].id
+    response = client.get(f"/events/{event_id}/similar", params={"limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["event_id"] == event_id
+    assert len(data["cards"]) <= 3
+    assert event_id not in [card["id"] for card in data["cards"]]
@@ -174,3 +174,53 @@ def test_find_by_id_none(repo):
 def test_search_text_empty(repo):
     events = repo.search_text("anything")
     assert isinstance(events, list)
+
+
+def test_slow_index_build_does_not_block_search(repo):
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+
+    def build():
+        started.set()
+        release.wait(timeout=5)
+        return "index"
+
+    builder = threading.Thread(target=repo.derived_index, args=("slow", build))
+    builder.start()
+    try:
+        assert started.wait(timeout=5)
+        searcher = threading.Thread(target=repo.search_text, args=("anything",))
+        searcher.start()
+        searcher.join(timeout=2)
+        assert not searcher.is_alive()
+    finally:
+        release.set()
+        builder.join()
+    assert repo.derived_index("slow", lambda: "rebuilt") == "index"
+
+
+def test_index_update_does_not_block_other_lookups(repo, make_event):
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+
+    def update(index, events, generation):
+        started.set()
+        release.wait(timeout=5)
+        index.append(generation)
+
+    patched = repo.derived_index("patched", list, update)
+    repo.derived_index("other", lambda: "index")
+    writer = threading.Thread(target=repo.upsert, args=([make_event(id="u1")],))
+    writer.start()
+    try:
+        assert started.wait(timeout=5)
+        reader = threading.Thread(target=repo.derived_index, args=("other", lambda: "rebuilt"))
+        reader.start()
+        reader.join(timeout=2)
+        assert not reader.is_alive()
+    finally:
+        release.set()
+        writer.join()
+    assert repo.derived_index("patched", list, update) is patched == [repo.generation()]
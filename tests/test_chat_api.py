@@ -0,0 +1,172 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from befriends.app import Application, create_app
+from befriends.catalog.repository import CatalogRepository
+from befriends.chatbot_client import Replacement
+from befriends.common.config import AppConfig
+from befriends.common.telemetry import Telemetry
+from befriends.domain.filters import EventFilter
+from befriends.llm.history import ConversationHistory
+from befriends.web.chat_controller import ChatController, profile_summary
+from befriends.web.session_store import SessionStore
+from components.chat_api_client import websocket_url
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def turns(count):
+    messages = []
+    for i in range(count):
+        messages += [{"role": "user", "content": f"question {i}"}, {"role": "assistant", "content": f"answer {i}"}]
+    return messages
+
+
+@pytest.fixture
+def repo(tmp_path, make_event):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'chat.db'}")
+    tomorrow = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time(20))
+    repo.upsert([
+        make_event(id="b1", event_name="Jazz Night", start_datetime=tomorrow, event_type="Concert",
+                   region="Basel (CH)", region_standardized="Basel (CH)"),
+    ])
+    return repo
+
+
+@pytest.fixture
+def controller(repo):
+    config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint", sources=[], features={},
+    )
+    client = MagicMock()
+    client.get_response.return_value = "Try the Jazz Night!"
+    client.stream_response.side_effect = lambda **kwargs: iter(["Try the", " Jazz Night!"])
+    return ChatController(client, SessionStore(), repo, config, Telemetry())
+
+
+def test_sessions_expire_and_are_bounded():
+    clock = Clock()
+    store = SessionStore(ttl=60, max_sessions=2, clock=clock)
+    first = store.open()
+    store.save(first)
+    assert store.open(first.session_id) is first
+    assert store.open("unknown").session_id != "unknown"
+    clock.now += 61
+    assert store.open(first.session_id) is not first
+    sessions = [store.open() for _ in range(3)]
+    for session in sessions:
+        store.save(session)
+    assert len(store) == 2
+    assert store.open(sessions[0].session_id) is not sessions[0]
+    assert store.telemetry.counters()["chat.session.evicted"] == 2
+
+
+def test_saved_sessions_keep_only_unfolded_turns():
+    store = SessionStore(new_history=lambda: ConversationHistory(keep_turns=2))
+    session = store.open()
+    session.messages = turns(3) + [{"role": "user", "content": "question 3"}]
+    session.history.compact(session.messages)
+    session.messages.append({"role": "assistant", "content": "answer 3"})
+    store.save(session)
+    assert [m["content"] for m in session.messages] == ["question 2", "answer 2", "question 3", "answer 3"]
+    # The summary carries on for the next turn
+    session.messages.append({"role": "user", "content": "question 4"})
+    prompt = session.history.compact(session.messages)
+    assert "question 0" in prompt[0]["content"] and "question 2" in prompt[0]["content"]
+
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SessionStore(path=path), SessionStore(path=path)
+    session = first.open()
+    session.filters = EventFilter.of(region="Basel (CH)", date_from="2025-10-01")
+    session.profile = {"city": "Basel"}
+    session.messages = turns(1)
+    session.history.summary = "User: hello"
+    first.save(session)
+    restored = second.open(session.session_id)
+    assert restored.messages == turns(1)
+    assert restored.filters == session.filters
+    assert (restored.profile, restored.history.summary) == ({"city": "Basel"}, "User: hello")
+    second.drop(session.session_id)
+    assert first.open(session.session_id).session_id != session.session_id
+
+
+def test_turns_continue_the_session(controller):
+    first = controller.handle_chat("Any concerts in Basel?", filters={"region": "Basel (CH)"})
+    assert first["reply"] == "Try the Jazz Night!"
+    assert first["event_ids"] == ["b1"]
+    second = controller.handle_chat("And tomorrow?", session_id=first["session_id"])
+    assert second["session_id"] == first["session_id"]
+    prompt = controller.chatbot_client.get_response.call_args.kwargs["messages"]
+    assert [m["content"] for m in prompt if m["role"] != "system"] == [
+        "Any concerts in Basel?", "Try the Jazz Night!", "And tomorrow?",
+    ]
+
+
+def test_failed_turns_are_not_stored(controller):
+    session_id = controller.handle_chat("Any concerts in Basel?")["session_id"]
+    controller.encode_events = MagicMock(side_effect=RuntimeError("catalog unavailable"))
+    with pytest.raises(RuntimeError):
+        controller.handle_chat("Any concerts in Basel?", session_id=session_id)
+    assert len(controller.sessions.open(session_id).messages) == 2
+
+
+def test_stream_frames(controller):
+    frames = list(controller.stream_chat("Any concerts in Basel?"))
+    assert frames[0]["type"] == "session"
+    assert [f["text"] for f in frames[1:-1]] == ["Try the", " Jazz Night!"]
+    assert frames[-1]["reply"] == "Try the Jazz Night!"
+    controller.chatbot_client.stream_response.side_effect = lambda **kwargs: iter(["list", Replacement("LLM answer")])
+    frames = list(controller.stream_chat("Any concerts in Basel?", session_id=frames[0]["session_id"]))
+    assert [f["type"] for f in frames] == ["session", "chunk", "replace", "done"]
+    assert frames[-1]["reply"] == "LLM answer"
+
+
+@pytest.fixture
+def api(controller, monkeypatch):
+    monkeypatch.setattr(Application, "chat_controller", lambda self: controller)
+    # Without the context manager the startup CSV import does not run
+    return TestClient(create_app())
+
+
+def test_chat_endpoint(api):
+    first = api.post("/chat", json={"message": "Any concerts in Basel?", "filters": {"region": "Basel (CH)"}}).json()
+    second = api.post("/chat", json={"message": "And tomorrow?", "session_id": first["session_id"]}).json()
+    assert second["session_id"] == first["session_id"]
+    assert second["reply"] == "Try the Jazz Night!"
+    assert api.post("/chat", json={"message": ""}).status_code == 422
+
+
+def test_websocket_streams_every_turn(api):
+    with api.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"message": "Any concerts in Basel?"})
+        frames = [websocket.receive_json()]
+        while frames[-1]["type"] != "done":
+            frames.append(websocket.receive_json())
+        assert "".join(f["text"] for f in frames if f["type"] == "chunk") == "Try the Jazz Night!"
+        websocket.send_json({"session_id": frames[0]["session_id"]})
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"message": "hi", "session_id": frames[0]["session_id"]})
+        assert websocket.receive_json() == {"type": "session", "session_id": frames[0]["session_id"]}
+
+
+def test_chat_needs_the_llm_backend(monkeypatch):
+    monkeypatch.setattr(Application, "chat_controller", lambda self: None)
+    assert TestClient(create_app()).post("/chat", json={"message": "hi"}).status_code == 503
+
+
+def test_helpers():
+    assert websocket_url("https://chat.example.org/api/") == "wss://chat.example.org/api/ws/chat"
+    assert websocket_url("http://localhost:8000") == "ws://localhost:8000/ws/chat"
+    assert profile_summary({"age": 30, "city": "Basel", "interests": ["jazz"]}) == "Age: 30, City: Basel. Interests: jazz."
+    assert profile_summary({}) == ""
@@ -15,13 +15,20 @@ def make_app_config(endpoint, api_key):
     )
 
 
+def patch_post(monkeypatch, mock_post):
+    """Route the transport's pooled session through mock_post(url, headers, json, timeout)."""
+    def session_post(session, url, headers, json, timeout, stream=False):
+        return mock_post(url, headers, json, timeout)
+    monkeypatch.setattr(requests.Session, "post", session_post)
+
+
 def test_chatbot_client_custom_endpoint_and_key(monkeypatch):
     # Test with custom config values
     def mock_post(url, headers, json, timeout):
         assert url == "https://custom.endpoint"
         assert headers["Authorization"] == "Bearer custom-key"
         return MockResponse({"choices": [{"message": {"content": "Custom endpoint reply"}}]})
-    monkeypatch.setattr("requests.post", mock_post)
+    patch_post(monkeypatch, mock_post)
     app_config = make_app_config("https://custom.endpoint", "custom-key")
     config = ChatbotConfig(app_config)
     client = ChatbotClient(config)
@@ -34,7 +41,7 @@ def test_chatbot_client_error(monkeypatch):
     # Simulate HTTP error
     def mock_post(url, headers, json, timeout):
         return MockResponse({}, status_code=401)
-    monkeypatch.setattr("requests.post", mock_post)
+    patch_post(monkeypatch, mock_post)
     app_config = make_app_config("https://mock.endpoint", "sk-test")
     config = ChatbotConfig(app_config)
     client = ChatbotClient(config)
@@ -56,7 +63,7 @@ class MockResponse:
 
 
 def test_chatbot_client(monkeypatch):
-    # Mock requests.post
+    # Mock the pooled session's POST
     def mock_post(url, headers, json, timeout):
         assert headers["Authorization"].startswith("Bearer ")
         assert json["user"] == "test_user"
@@ -64,7 +71,7 @@ def test_chatbot_client(monkeypatch):
         return MockResponse({
             "choices": [{"message": {"content": "Hello from GPT-5!"}}]
         })
-    monkeypatch.setattr("requests.post", mock_post)
+    patch_post(monkeypatch, mock_post)
     app_config = make_app_config("https://mock.endpoint", "sk-test")
     config = ChatbotConfig(app_config)
     client = ChatbotClient(config)
@@ -81,7 +88,7 @@ def test_chatbot_client(monkeypatch):
 def test_chatbot_client_timeout(monkeypatch):
     def mock_post(*a, **k):
         raise requests.Timeout()
-    monkeypatch.setattr("requests.post", mock_post)
+    patch_post(monkeypatch, mock_post)
     app_config = make_app_config("https://mock.endpoint", "sk-test")
     config = ChatbotConfig(app_config)
     client = ChatbotClient(config)
@@ -106,7 +113,7 @@ def test_chatbot_client_malformed_response(monkeypatch):
             raise Exception("bad json")
     def mock_post(*a, **k):
         return BadResponse()
-    monkeypatch.setattr("requests.post", mock_post)
+    patch_post(monkeypatch, mock_post)
     app_config = make_app_config("https://mock.endpoint", "sk-test")
     config = ChatbotConfig(app_config)
     client = ChatbotClient(config)
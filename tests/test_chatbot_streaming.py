@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.chatbot_client import ChatbotClient, ChatbotConfig
+from befriends.common.config import AppConfig
+from befriends.llm.transport import LLMTransport
+from components.chatbot_service import FALLBACK_REPLY, ChatbotService
+
+
+class FakeSSEServer:
+    """OpenAI-compatible endpoint that streams a completion as chunked server-sent events.
+
+    Tokens after the first are held back until ``release`` is set, so tests can
+    observe the first token while the rest of the completion is still pending.
+    """
+
+    def __init__(self, tokens, status=200):
+        self.tokens = tokens
+        self.status = status
+        self.release = threading.Event()
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_chunk(self, text):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                server.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                if server.status != 200:
+                    self.send_error(server.status)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.send_chunk(": keep-alive\n\n")
+                self.send_chunk('data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n')
+                for i, token in enumerate(server.tokens):
+                    if i == 1:
+                        server.release.wait(5)
+                    self.send_chunk("data: " + json.dumps({"choices": [{"delta": {"content": token}}]}) + "\n\n")
+                self.send_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.release.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_client(url):
+    config = AppConfig(db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint=url, sources=[], features={})
+    return ChatbotClient(ChatbotConfig(config), transport=LLMTransport(sleep=lambda seconds: None))
+
+
+def test_tokens_arrive_before_the_completion_finishes():
+    with FakeSSEServer(["Hallo", " du", "!"]) as server:
+        client = make_client(server.url)
+        stream = client.stream_response("user42", [{"role": "user", "content": "Hi"}])
+        assert next(stream) == "Hallo"
+        # The server has not sent the rest yet
+        assert client.telemetry.recent_events("llm.stream") == []
+        server.release.set()
+        assert list(stream) == [" du", "!"]
+    assert server.requests[0]["stream"] is True
+    assert server.requests[0]["user"] == "user42"
+    ttft = client.telemetry.recent_events("llm.ttft")
+    assert len(ttft) == 1 and ttft[0]["ms"] >= 0
+    assert client.telemetry.recent_events("llm.stream")[0]["chunks"] == 3
+
+
+def test_http_errors_raise_before_streaming():
+    with FakeSSEServer(["x"], status=500) as server:
+        client = make_client(server.url)
+        with pytest.raises(RuntimeError, match="Backend error"):
+            list(client.stream_response("user", [{"role": "user", "content": "Hi"}]))
+
+
+def test_chatbot_service_passes_the_stream_through():
+    with FakeSSEServer(["Wie", " geht's?"]) as server:
+        server.release.set()
+        service = ChatbotService(make_client(server.url), {"city": "Basel (CH)"})
+        reply = service.get_response(
+            "Erzähl mir was", [{"role": "user", "content": "Erzähl mir was"}], None, "other", None,
+            MagicMock(), MagicMock(), MagicMock(), lambda profile: "", stream=True,
+        )
+        assert not isinstance(reply, str)
+        assert "".join(reply) == "Wie geht's?"
+    # Canned answers stay plain strings
+    assert isinstance(service.get_response("hi", [], None, "greeting", None, None, None, None, None, stream=True), str)
+
+
+def test_stream_failures_become_a_reply():
+    client = MagicMock()
+    client.stream_response.side_effect = RuntimeError("down")
+    service = ChatbotService(client, {})
+    reply = service.get_response("Erzähl mir was", [], None, "other", None, None, None, None, lambda p: "", stream=True)
+    assert "".join(reply) == "[Error from chatbot backend: down]"
+    client.stream_response.side_effect = None
+    client.stream_response.return_value = iter([" "])
+    reply = service.get_response("Erzähl mir was", [], None, "other", None, None, None, None, lambda p: "", stream=True)
+    assert "".join(reply) == " " + FALLBACK_REPLY
@@ -0,0 +1,84 @@
+import datetime
+from unittest.mock import MagicMock
+
+from befriends.llm.history import SUMMARY_HEADER, ConversationHistory, extractive_summary, message_tokens
+from components.chatbot_service import ChatbotService
+
+SYSTEM = {"role": "system", "content": "You are EventMate."}
+
+
+def conversation(turns, words=5):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "word " * words, "timestamp": "12:00"})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return messages
+
+
+def test_short_sessions_are_sent_verbatim():
+    history = ConversationHistory(keep_turns=4)
+    messages = conversation(3)
+    prompt = history.compact(messages, SYSTEM)
+    assert prompt == [SYSTEM] + [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def test_older_turns_are_folded_into_a_summary():
+    history = ConversationHistory(keep_turns=2)
+    prompt = history.compact(conversation(5), SYSTEM)
+    assert prompt[1]["role"] == "system" and prompt[1]["content"].startswith(SUMMARY_HEADER)
+    assert "User: question 0" in prompt[1]["content"] and "EventMate: answer 2" in prompt[1]["content"]
+    assert [m["content"].split()[:2] for m in prompt[2:]] == [
+        ["question", "3"], ["answer", "3"], ["question", "4"], ["answer", "4"],
+    ]
+
+
+def test_summary_is_extended_not_rebuilt():
+    summarize = MagicMock(side_effect=extractive_summary)
+    history = ConversationHistory(keep_turns=2, summarize=summarize)
+    messages = conversation(3)
+    for turn in range(3, 6):
+        history.compact(messages)
+        messages += conversation(turn + 1)[-2:]
+    # Each call only sees the turn that left the verbatim window
+    assert [len(call.args[1]) for call in summarize.call_args_list] == [2, 2, 2]
+    assert [call.args[1][0]["content"].split()[1] for call in summarize.call_args_list] == ["0", "1", "2"]
+
+
+def test_reset_sessions_start_a_new_summary():
+    history = ConversationHistory(keep_turns=1)
+    history.compact(conversation(3))
+    assert "question 0" in history.summary
+    fresh = [{"role": "user", "content": "hello again"}]
+    assert history.compact(fresh) == fresh
+    assert history.summary == ""
+
+
+def test_token_budget_folds_more_turns_but_keeps_the_question():
+    history = ConversationHistory(keep_turns=4, token_budget=120, summary_tokens=40)
+    messages = conversation(4, words=30)[:-1]
+    prompt = history.compact(messages, SYSTEM)
+    assert message_tokens(prompt) <= 120
+    assert prompt[-1]["content"] == messages[-1]["content"]
+    # A huge last question still goes out, alone with the system prompt and summary
+    messages.append({"role": "user", "content": "word " * 500})
+    prompt = history.compact(messages, SYSTEM)
+    assert prompt[-1]["content"] == messages[-1]["content"]
+    assert [m["role"] for m in prompt] == ["system", "system", "user"]
+    assert history.stats()["turns"] == 2
+    assert history.stats()["last_tokens"] == message_tokens(prompt)
+
+
+def test_chatbot_prompt_is_compacted():
+    client = MagicMock()
+    client.get_response.return_value = "Mir geht's gut!"
+    history = ConversationHistory(keep_turns=2)
+    service = ChatbotService(client, {}, history=history)
+    messages = conversation(6) + [{"role": "user", "content": "Erzähl mir was"}]
+    service.get_response(
+        "Erzähl mir was", messages, None, "other", datetime.datetime(2025, 10, 1, 9), None, None,
+        lambda events, **kwargs: "", lambda profile: "",
+    )
+    sent = client.get_response.call_args.kwargs["messages"]
+    assert sent[1]["content"].startswith(SUMMARY_HEADER)
+    assert [m["content"] for m in sent[2:]] == [messages[-3]["content"], messages[-2]["content"], "Erzähl mir was"]
+    assert all("timestamp" not in m for m in sent)
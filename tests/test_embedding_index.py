@@ -0,0 +1,94 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.recommendation.service import RecommendationService
+from befriends.search.embedding import EmbeddingIndex, embedding_index_for, tokenize
+from .conftest import build_event
+
+
+def make_event(event_id, name, event_type, description=None, days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=name,
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        event_type=event_type,
+        region="Basel (CH)",
+        region_standardized="Basel (CH)",
+        description=description,
+    )
+
+
+EVENTS = [
+    make_event("jazz", "Jazz im Hof", "Konzert", "Entspannter Abend mit Live-Band"),
+    make_event("stamm", "Stammtisch für Neue", "Community Treffen", "Leute kennenlernen und Begegnungen"),
+    make_event("kids", "Kinderflohmarkt", "Markt", "Für Familie und Kinder"),
+]
+
+
+def test_tokenize_adds_concepts_and_stems():
+    tokens = tokenize("Live-Musik mit Freunden")
+    assert "c:music" in tokens
+    assert "s:musi" in tokens
+    assert "mit" not in tokens
+
+
+def test_search_matches_paraphrases():
+    index = EmbeddingIndex.build(EVENTS)
+    assert index.search("something chill with live music")[0][0] == "jazz"
+    assert index.search("meet new people")[0][0] == "stamm"
+    assert index.search("family day with the kids")[0][0] == "kids"
+
+
+def test_upsert_replaces_and_appends_rows():
+    index = EmbeddingIndex.build(EVENTS[:2])
+    index.upsert([make_event("jazz", "Yoga im Park", "Sport"), EVENTS[2]])
+    assert len(index) == 3
+    assert index.search("yoga")[0][0] == "jazz"
+    assert index.search("kinder")[0][0] == "kids"
+
+
+def test_save_and_load_memory_maps_matrix(tmp_path):
+    path = str(tmp_path / "events.vec.f32")
+    index = EmbeddingIndex.build(EVENTS)
+    index.save(path, "gen-1")
+    loaded = EmbeddingIndex.load(path)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.generation == "gen-1"
+    assert loaded.search("live music") == index.search("live music")
+
+
+def test_save_replaces_matrix_and_metadata_as_a_pair(tmp_path):
+    path = str(tmp_path / "events.vec.f32")
+    EmbeddingIndex.build(EVENTS[:1]).save(path, "gen-1")
+    old = EmbeddingIndex.load(path)
+    EmbeddingIndex.build(EVENTS).save(path, "gen-2")
+    # A matrix file is never rewritten under metadata that describes another shape
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["events.vec.f32.gen-2", "events.vec.f32.json"]
+    assert len(EmbeddingIndex.load(path)) == len(EVENTS)
+    assert old.vectors.shape == (1, old.embedder.dim)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'semantic.db'}")
+    repo.upsert(EVENTS)
+    return repo
+
+
+def test_index_is_patched_incrementally_on_upsert(repo):
+    index = embedding_index_for(repo)
+    repo.upsert([make_event("yoga", "Sunrise Yoga", "Sport")])
+    assert embedding_index_for(repo) is index
+    assert index.search("yoga")[0][0] == "yoga"
+    reloaded = EmbeddingIndex.load(repo.engine.url.database + ".vec.f32")
+    assert reloaded.generation == repo.generation()
+    assert "yoga" in reloaded.ids
+
+
+def test_recommend_events_tops_up_with_semantic_candidates(repo):
+    service = RecommendationService(repo)
+    events = service.recommend_events({}, {}, max_events=1, text="something chill with live music")
+    assert [e.id for e in events] == ["jazz"]
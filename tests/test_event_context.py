@@ -0,0 +1,98 @@
+import dataclasses
+import datetime
+from unittest.mock import MagicMock
+
+from befriends.domain.filters import EventFilter
+from befriends.response.event_context import EventContextEncoder, estimate_tokens, events_to_context
+from befriends.response.event_json import events_to_json
+from components.chatbot_service import ChatbotService
+from .conftest import build_event
+
+
+def make_event(event_id, name="Salsa Night", days_ahead=1, **fields):
+    start = datetime.datetime.combine(datetime.date(2025, 10, 1) + datetime.timedelta(days=days_ahead), datetime.time(20, 0))
+    base = dict(
+        id=event_id,
+        event_name=name,
+        start_datetime=start,
+        end_datetime=start + datetime.timedelta(hours=3),
+        event_type="Dance",
+        dance_style=["Salsa", "Bachata"],
+        price_min=10.0,
+        price_max=15.0,
+        currency="CHF",
+        age_min=18,
+        event_location="Kaserne",
+        region="Basel",
+        region_standardized="Basel (CH)",
+        season="autumn",
+        cross_border_potential="high",
+        organizer="Org",
+    )
+    base.update(fields)
+    return build_event(**base)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Salsa|Basel") == 5
+    assert estimate_tokens("cross_border_potential") == 6
+
+
+def test_table_drops_empty_and_irrelevant_fields():
+    table = events_to_context([make_event("e1"), make_event("e2", price_category="free", price_min=0, price_max=0)])
+    header, first, second = table.split("\n")
+    assert header == "id|name|start|end|type|styles|price|age|location|region|organizer"
+    assert first == "e1|Salsa Night|Thu 2025-10-02 20:00|23:00|Dance|Salsa/Bachata|10-15 CHF|18+|Kaserne|Basel (CH)|Org"
+    assert second.split("|")[6] == "free"
+
+
+def test_table_is_much_smaller_than_the_json_dump():
+    events = [make_event(f"e{i}") for i in range(10)]
+    assert estimate_tokens(events_to_context(events, token_budget=10_000)) * 2 < estimate_tokens(events_to_json(events))
+
+
+def test_events_are_packed_by_rank_within_the_budget():
+    events = [make_event(f"e{i}", days_ahead=i) for i in range(10)]
+    events.insert(2, make_event("long", name="A very long event name " * 20))
+    encoder = EventContextEncoder(token_budget=200)
+    table = encoder.encode(events)
+    assert estimate_tokens(table) <= 200
+    ids = [line.split("|")[0] for line in table.split("\n")[1:]]
+    # The long event does not fit and is skipped for the next ones in rank order
+    assert ids == ["e0", "e1", "e2"]
+    assert encoder.encode(events, token_budget=5) == ""
+
+
+def test_pipes_and_line_breaks_cannot_break_rows():
+    table = events_to_context([make_event("e1", name="Rock | Roll\nParty")])
+    assert table.split("\n")[1].split("|")[1] == "Rock / Roll Party"
+
+
+def test_cells_are_cached_per_event_and_generation():
+    encoder = EventContextEncoder()
+    event = make_event("e1")
+    renamed = dataclasses.replace(event, event_name="Renamed")
+    encoder.encode([event], generation="g1")
+    assert "Salsa Night" in encoder.encode([renamed], generation="g1")
+    assert "Renamed" in encoder.encode([renamed], generation="g2")
+    assert "Renamed" in encoder.encode([renamed])
+
+
+def test_chatbot_prompt_carries_the_table():
+    client = MagicMock()
+    client.get_response.return_value = "Go dancing!"
+    context = MagicMock()
+    context.recommender.effective_filters.return_value = EventFilter(date_from=datetime.date(2025, 10, 1))
+    context.recommend.return_value = [make_event("e1")]
+    context.share.side_effect = lambda events: events
+    context.repository.generation.return_value = "g7"
+    service = ChatbotService(client, {})
+    service.get_response(
+        "Any events?", [{"role": "user", "content": "Any events?"}], None, "event_query",
+        datetime.datetime(2025, 10, 1, 9), None, None, events_to_context, lambda profile: "", context=context,
+    )
+    prompt = client.get_response.call_args.kwargs["messages"][0]["content"]
+    assert "id|name|start" in prompt and "e1|Salsa Night" in prompt
+    assert "cross_border_potential" not in prompt
+    assert client.get_response.call_args.kwargs["cache_scope"] == "catalog:g7"
@@ -0,0 +1,94 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.common.telemetry import Telemetry
+from befriends.domain.filters import EventFilter
+from befriends.domain.search_models import SearchQuery
+from befriends.recommendation.service import RecommendationService
+from .conftest import build_event
+
+
+def make_event(event_id, organizer, region="Basel (CH)", event_type="Party", price=10.0, days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        event_type=event_type,
+        dance_style=["Salsa"],
+        price_min=price,
+        price_max=price,
+        currency="CHF",
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer=organizer,
+    )
+
+
+def test_aliases_dates_and_unset_values_are_canonicalized():
+    raw = {
+        "region_standardized": "Basel (CH)",
+        "category": "",
+        "start_datetime_from": "2030-05-01",
+        "date_to": datetime.datetime(2030, 5, 3, 18, 30),
+        "price_min": 0.0,
+        "dance_style": ["Salsa", "  "],
+        "apply_filters": True,
+    }
+    f = EventFilter.of(raw)
+    assert f == EventFilter(
+        region="Basel (CH)",
+        dance_style=("Salsa",),
+        date_from=datetime.date(2030, 5, 1),
+        date_to=datetime.date(2030, 5, 3),
+    )
+    assert hash(f) == hash(EventFilter.of(city="Basel (CH)", date_from=datetime.date(2030, 5, 1), date_to="2030-05-03", dance_style="Salsa"))
+    assert EventFilter.of({"region": "Lörrach (DE)", "city": "Basel (CH)"}).region == "Lörrach (DE)"
+    assert not EventFilter.of({"category": " ", "reset_filters": True})
+    assert EventFilter.of({"region_standardized": "All", "category": "All"}) == EventFilter(all_regions=True)
+
+
+def test_filters_are_immutable_and_replace_normalizes():
+    f = EventFilter.of(region="Basel (CH)")
+    with pytest.raises(AttributeError):
+        f.region = "Weil am Rhein (DE)"
+    assert f.replace(region="All", date_from=datetime.datetime(2030, 1, 1, 9)).as_dict() == {
+        "all_regions": True, "date_from": datetime.date(2030, 1, 1),
+    }
+    assert not EventFilter.of(region="All").replace(region="Basel (CH)").all_regions
+    assert EventFilter.of(f) is f
+    assert SearchQuery.from_filter("salsa", f).as_filter() == f
+
+
+def test_all_regions_does_not_fall_back_to_the_profile_city():
+    profile = {"city": "Basel (CH)"}
+    today = datetime.date(2030, 5, 1)
+    everywhere = RecommendationService.effective_filters({"region": "All"}, profile, today)
+    assert everywhere.region is None and everywhere.all_regions and not everywhere.region_unset
+    assert EventFilter.of(everywhere.as_dict()) == everywhere
+    assert RecommendationService.effective_filters({}, profile, today).region == "Basel (CH)"
+
+
+def test_search_results_are_cached_per_generation(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'filters.db'}", telemetry=Telemetry())
+    repo.upsert([make_event("a", "Org 1"), make_event("b", "Org 2", region="Lörrach (DE)")])
+    first = repo.search_text("", {"region_standardized": "Basel (CH)"})
+    again = repo.search_text("", EventFilter.of(city="Basel (CH)", category="All"))
+    assert [e.id for e in again] == [e.id for e in first] == ["a"]
+    assert repo.telemetry.counters()["search_cache.hit"] == 1
+    repo.upsert([make_event("c", "Org 3")])
+    assert {e.id for e in repo.search_text("", {"region": "Basel (CH)"})} == {"a", "c"}
+
+
+def test_cached_results_are_keyed_by_fuzzy_threshold_and_detached(tmp_path):
+    path = f"sqlite:///{tmp_path / 'fuzzy.db'}"
+    repo = CatalogRepository(path, telemetry=Telemetry())
+    repo.upsert([make_event("a", "Org 1")])
+    repo.search_text("Evnt", {})
+    eager = CatalogRepository(path, telemetry=Telemetry(), fuzzy_min_results=0)
+    eager.search_text("Evnt", {})
+    assert "search_cache.hit" not in eager.telemetry.counters()
+    repo.search_text("", {})[0].dance_style.append("Tango")
+    assert repo.search_text("", {})[0].dance_style == ["Salsa"]
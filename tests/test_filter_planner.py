@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from befriends.catalog.orm import EventORM
+from befriends.catalog.repository import CatalogRepository
+from befriends.common.telemetry import Telemetry
+from befriends.search.planner import CatalogStatistics, ColumnStats, FilterPlanner, Predicate
+from .conftest import build_event
+
+
+def make_event(event_id, organizer, region="Basel (CH)", event_type="Party", price=10.0, days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        event_type=event_type,
+        dance_style=["Salsa"],
+        price_min=price,
+        price_max=price,
+        currency="CHF",
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer=organizer,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'planner.db'}", telemetry=Telemetry())
+    events = [make_event(str(i), f"Org {i % 50}", days_ahead=1 + i % 30, price=float(i % 40)) for i in range(400)]
+    events += [make_event(f"l{i}", "Latin Lörrach", region="Lörrach (DE)", event_type="Workshop") for i in range(80)]
+    events.append(make_event("past", "Org 1", days_ahead=-5))
+    repo.upsert(events)
+    return repo
+
+
+def explain(repo, filters):
+    session = repo.Session()
+    try:
+        q = repo._apply_filters(session.query(EventORM), filters)
+        compiled = q.statement.compile(repo.engine, compile_kwargs={"literal_binds": True})
+        rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return " ".join(row[-1] for row in rows)
+    finally:
+        session.close()
+
+
+def test_histogram_estimates_ranges():
+    stats = ColumnStats.collect(list(range(100)), n_rows=100, buckets=10)
+    assert stats.n_distinct == 100
+    assert stats.range_selectivity(high=49) == pytest.approx(0.5, abs=0.1)
+    assert stats.range_selectivity(low=90) == pytest.approx(0.1, abs=0.1)
+    assert stats.range_selectivity(low=200) == 0.0
+
+
+def test_planner_picks_strategy_by_selectivity():
+    rows = [
+        {"id": str(i), "region_standardized": "Basel (CH)", "organizer": f"Org {i % 10}", "event_type": "Party" if i % 4 else "Workshop"}
+        for i in range(1000)
+    ]
+    stats = CatalogStatistics.collect(rows)
+    planner = FilterPlanner(memory_max_rows=64, index_max_selectivity=0.25)
+    region = Predicate("region_standardized", "eq", "Basel (CH)")
+    organizer = Predicate("organizer", "eq", "Org 3")
+    workshop = Predicate("event_type", "eq", "Workshop")
+
+    assert planner.plan(stats, [region]).strategy == "scan"
+    plan = planner.plan(stats, [region, workshop])
+    assert (plan.strategy, plan.driving, plan.order) == ("index", workshop, (workshop, region))
+    assert plan.estimated_rows == pytest.approx(250)
+    plan = planner.plan(stats, [region, Predicate("organizer", "eq", "Nobody")])
+    assert (plan.strategy, plan.ids) == ("memory", ())
+    assert planner.plan(stats, [organizer, region]).strategy == "index"
+
+
+def test_search_results_do_not_depend_on_plan(repo):
+    filters = {"region_standardized": "Lörrach (DE)", "organizer": "Latin Lörrach", "price_max": 20}
+    planned = {e.id for e in repo.search_text("", filters)}
+    assert planned == {f"l{i}" for i in range(80)}
+    scan = {e.id for e in CatalogRepository(str(repo.engine.url), planner=FilterPlanner(0, 0.0)).search_text("", filters)}
+    assert scan == planned
+
+
+def test_sql_uses_only_the_driving_index(repo):
+    memory = explain(repo, {"organizer": "Org 7", "region_standardized": "Basel (CH)"})
+    assert "sqlite_autoindex_events_1 (id=?)" in memory
+    index = explain(repo, {"event_type": "Workshop", "region_standardized": "Basel (CH)", "price_max": 50})
+    assert "ix_events_event_type" in index and "ix_events_region_standardized" not in index
+    assert explain(repo, {"region_standardized": "Basel (CH)"}).startswith("SCAN events")
+
+
+def test_plan_choices_are_recorded(repo):
+    repo.search_text("", {"organizer": "Org 7"})
+    repo.search_text("", {"region_standardized": "Basel (CH)"})
+    plans = repo.telemetry.recent_events("query_plan")
+    assert [p["strategy"] for p in plans] == ["memory", "scan"]
+    assert plans[0]["order"] == ["organizer eq"]
+    assert repo.telemetry.counters()["planner.memory"] == 1
+
+
+def test_statistics_refresh_on_import(repo):
+    first = repo.statistics()
+    assert first.n_rows == 480
+    assert repo.statistics() is first
+    repo.upsert([make_event("new", "Org 1")])
+    assert repo.statistics().n_rows == 481
@@ -0,0 +1,73 @@
+import datetime
+import re
+
+import pytest
+
+from components.chatbot_service import ChatbotService, is_event_suggestion_request, is_surprise_request
+from components.intent_matcher import IntentMatcher, analyze, period_window, trie_pattern
+
+WEDNESDAY = datetime.date(2025, 10, 1)
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("hi", "greeting"),
+    ("Hallo!", "greeting"),
+    ("hey was geht", "greeting"),
+    ("Salut !", "greeting"),
+    ("hi, there", "other"),
+    ("hindi music", "other"),
+    ("yoga kurs", "other"),
+    ("Wie geht’s?", "smalltalk"),
+    ("ça va?", "smalltalk"),
+    ("Was geht?", "smalltalk"),
+    ("Überrasch mich!", "surprise"),
+    ("Zufälliges Event bitte", "surprise"),
+    ("Surprends-moi", "surprise"),
+    ("Any events this weekend?", "event_query"),
+    ("Tipps für heute?", "event_query"),
+    ("Des concerts ce soir ?", "event_query"),
+    ("tell me a joke", "other"),
+])
+def test_intents(text, intent):
+    assert ChatbotService.detect_intent(text) == intent
+
+
+def test_labels_are_kept_beside_the_winning_intent():
+    assert is_event_suggestion_request("what's happening this weekend")
+    assert is_surprise_request("hi, surprise me")
+    assert not is_surprise_request("random thoughts")
+
+
+@pytest.mark.parametrize("text, period, window", [
+    ("Konzert diese Woche?", "this_week", (datetime.date(2025, 9, 29), datetime.date(2025, 10, 5))),
+    # Not "this week", which it starts with
+    ("any events this weekend?", "this_weekend", (datetime.date(2025, 10, 4), datetime.date(2025, 10, 5))),
+    ("Quoi de neuf ce week-end ?", "this_weekend", (datetime.date(2025, 10, 4), datetime.date(2025, 10, 5))),
+    ("Tipps für die kommenden Tage", "next_days", (WEDNESDAY, datetime.date(2025, 10, 4))),
+    ("Que faire ce mois-ci ?", "this_month", (WEDNESDAY, datetime.date(2025, 10, 31))),
+    ("party tonight", "tonight", (WEDNESDAY, WEDNESDAY)),
+    ("any events?", None, None),
+])
+def test_periods_resolve_to_windows(text, period, window):
+    utterance = analyze(text)
+    assert utterance.period == period
+    assert utterance.window(WEDNESDAY) == window
+
+
+def test_month_window_handles_december():
+    assert period_window("this_month", datetime.date(2025, 12, 15)) == (datetime.date(2025, 12, 1), datetime.date(2025, 12, 31))
+
+
+def test_vocabulary_is_data():
+    matcher = IntentMatcher({
+        "intents": {"greeting": {"it": ["ciao"]}, "event_query": {"it": ["concerto"]}},
+        "periods": {"tonight": {"it": ["stasera"]}},
+    })
+    assert matcher.scan("Ciao!").intent == "greeting"
+    utterance = matcher.scan("un concerto stasera?")
+    assert (utterance.intent, utterance.period) == ("event_query", "tonight")
+
+
+def test_trie_pattern_prefers_the_longest_phrase():
+    pattern = re.compile(trie_pattern(["tipp", "tipps", "this week", "this weekend"]))
+    assert pattern.findall("tipps this weekend tipp") == ["tipps", "this weekend", "tipp"]
@@ -0,0 +1,133 @@
+import datetime
+import json
+from unittest.mock import MagicMock
+
+from befriends.chatbot_client import FALLBACK_REPLY, ChatbotClient, ChatbotConfig
+from befriends.common.config import AppConfig
+from befriends.llm.cache import ResponseCache, cache_key, entry_scope
+
+MESSAGES = [{"role": "system", "content": "Events: []"}, {"role": "user", "content": "What's happening tonight?"}]
+
+
+def payload(**changes):
+    return {"model": "gpt-3.5-turbo", "messages": MESSAGES, "max_tokens": 256, "temperature": 0.7, **changes}
+
+
+def test_key_covers_model_messages_and_sampling_but_not_user():
+    assert cache_key(payload(user="a")) == cache_key(payload(user="b", stream=True))
+    assert cache_key(payload()) != cache_key(payload(temperature=0.2))
+    assert cache_key(payload()) != cache_key(payload(model="gpt-4o"))
+    assert cache_key(payload()) != cache_key(payload(messages=MESSAGES[1:]))
+
+
+def test_hits_are_scoped_and_reported():
+    cache = ResponseCache()
+    scope = entry_scope("catalog:1", today=datetime.date(2025, 10, 1))
+    assert cache.get("k", scope) is None
+    cache.put("k", scope, "answer", latency_ms=1200.0)
+    assert cache.get("k", scope) == "answer"
+    assert cache.get("k", scope) == "answer"
+    # A new catalog generation or a new day invalidates the answer
+    assert cache.get("k", entry_scope("catalog:2", today=datetime.date(2025, 10, 1))) is None
+    assert cache.get("k", entry_scope("catalog:1", today=datetime.date(2025, 10, 2))) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+    assert stats["hit_rate"] == 0.4
+    assert stats["saved_ms"] == 2400.0
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, "s", key.upper(), 1.0)
+        cache.get("a", "s")  # keep a hot
+    assert cache.get("a", "s") == "A"
+    assert cache.get("b", "s") is None
+    assert cache.get("c", "s") == "C"
+
+
+def test_sqlite_backend_is_shared_and_bounded(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    scope = entry_scope("catalog:1")
+    first, second = ResponseCache(max_entries=2, path=path), ResponseCache(max_entries=2, path=path)
+    first.put("a", scope, "A", 10.0)
+    assert second.get("a", scope) == "A"
+    second.put("b", scope, "B", 10.0)
+    second.put("c", scope, "C", 10.0)
+    assert ResponseCache(path=path).get("a", scope) is None
+    assert ResponseCache(path=path).get("b", scope) == "B"
+    assert ResponseCache(path=path).get("c", scope) == "C"
+
+
+
+def test_sqlite_backend_only_drops_earlier_days(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    day, next_day = datetime.date(2025, 10, 1), datetime.date(2025, 10, 2)
+    smalltalk, events = entry_scope(today=day), entry_scope("catalog:7", today=day)
+    first, second = ResponseCache(path=path), ResponseCache(path=path)
+    first.put("e", events, "E", 10.0)
+    # Smalltalk and an older catalog generation of the same day keep the event answer
+    second.put("s", smalltalk, "S", 10.0)
+    second.put("o", entry_scope("catalog:6", today=day), "O", 10.0)
+    assert ResponseCache(path=path).get("e", events) == "E"
+    assert ResponseCache(path=path).get("s", smalltalk) == "S"
+    first.put("n", entry_scope(today=next_day), "N", 10.0)
+    assert ResponseCache(path=path).get("e", events) is None
+    assert ResponseCache(path=path).get("n", entry_scope(today=next_day)) == "N"
+
+
+def make_client(transport, **config):
+    app_config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint",
+        sources=[], features={}, **config,
+    )
+    return ChatbotClient(ChatbotConfig(app_config), transport=transport)
+
+
+def completion(content):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    return response
+
+
+def test_identical_prompts_skip_the_round_trip():
+    transport = MagicMock()
+    transport.post.return_value = completion("Try the jazz night!")
+    client = make_client(transport)
+    assert client.get_response("u1", MESSAGES, cache_scope="catalog:7") == "Try the jazz night!"
+    assert client.get_response("u2", MESSAGES, cache_scope="catalog:7") == "Try the jazz night!"
+    assert transport.post.call_count == 1
+    client.get_response("u1", MESSAGES, cache_scope="catalog:8")
+    assert transport.post.call_count == 2
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_fallback_answers_are_not_cached():
+    transport = MagicMock()
+    transport.post.return_value = completion("")
+    client = make_client(transport)
+    assert client.get_response("u", MESSAGES) == FALLBACK_REPLY
+    assert client.get_response("u", MESSAGES) == FALLBACK_REPLY
+    assert transport.post.call_count == 2
+
+
+def test_completed_streams_are_cached():
+    transport = MagicMock()
+    events = [{"choices": [{"delta": {"content": token}}]} for token in ("Jazz", " tonight")]
+    transport.post.return_value.iter_lines.return_value = [f"data: {json.dumps(e)}".encode() for e in events] + [b"data: [DONE]"]
+    client = make_client(transport)
+    assert list(client.stream_response("u", MESSAGES)) == ["Jazz", " tonight"]
+    assert list(client.stream_response("u", MESSAGES)) == ["Jazz tonight"]
+    assert transport.post.call_count == 1
+    # Streamed and blocking requests share entries
+    assert client.get_response("u", MESSAGES) == "Jazz tonight"
+
+
+def test_cache_can_be_disabled():
+    transport = MagicMock()
+    transport.post.return_value = completion("Hi")
+    client = make_client(transport, llm_cache_size=0)
+    assert client.cache is None
+    client.get_response("u", MESSAGES)
+    client.get_response("u", MESSAGES)
+    assert transport.post.call_count == 2
@@ -0,0 +1,189 @@
+import datetime
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.chatbot_client import ChatbotClient, ChatbotConfig, Replacement
+from befriends.common.config import AppConfig
+from befriends.common.telemetry import Telemetry
+from befriends.domain.filters import EventFilter
+from befriends.llm.hedging import Hedger, percentile
+from befriends.recommendation.context import RetrievalContext
+from befriends.response.event_context import events_to_context
+from components.chatbot_service import ChatbotService
+
+MESSAGES = [{"role": "system", "content": "Events: []"}, {"role": "user", "content": "What's happening tonight?"}]
+
+
+def completion(content):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    return response
+
+
+def streamed(*chunks, first_delay=0.0):
+    """A streaming response whose first chunk comes after first_delay seconds."""
+    def lines():
+        time.sleep(first_delay)
+        for chunk in chunks:
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}".encode()
+        yield b"data: [DONE]"
+
+    response = MagicMock(status_code=200)
+    response.iter_lines.side_effect = lambda **kwargs: lines()
+    return response
+
+
+def slow_then_fast(first_delay, content="Jazz tonight!"):
+    """post side effect: the first request takes first_delay seconds, later ones answer at once."""
+    calls = []
+    lock = threading.Lock()
+
+    def post(*args, **kwargs):
+        with lock:
+            calls.append(time.perf_counter())
+            first = len(calls) == 1
+        if first:
+            time.sleep(first_delay)
+            return completion(f"{content} (primary)")
+        return completion(f"{content} (hedge)")
+
+    return post
+
+
+def make_client(transport, hedge_after=0.05):
+    app_config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint",
+        sources=[], features={},
+    )
+    return ChatbotClient(ChatbotConfig(app_config), transport=transport, hedger=Hedger(hedge_after=hedge_after))
+
+
+def test_hedge_wins_when_the_primary_is_slow():
+    telemetry = Telemetry()
+    hedger = Hedger(hedge_after=0.02)
+    gate = threading.Event()
+    answers = iter([lambda: gate.wait(1) and "primary", lambda: "hedge"])
+    assert hedger.submit(lambda: next(answers)(), telemetry).result(timeout=1) == "hedge"
+    gate.set()
+    counters = telemetry.counters()
+    assert (counters["llm.hedge.call"], counters["llm.hedge.sent"], counters["llm.hedge.won"]) == (1, 1, 1)
+
+
+def test_no_hedge_when_the_primary_is_fast():
+    telemetry = Telemetry()
+    assert Hedger(hedge_after=0.1).submit(lambda: "primary", telemetry).result(timeout=1) == "primary"
+    time.sleep(0.15)
+    assert "llm.hedge.sent" not in telemetry.counters()
+
+
+def test_error_is_raised_once_every_attempt_failed():
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("Backend error: 503")
+
+    with pytest.raises(RuntimeError, match="503"):
+        Hedger(hedge_after=0.01).submit(fail).result(timeout=1)
+    assert len(calls) == 2
+
+
+def test_delay_follows_the_p95_latency():
+    assert percentile([float(i) for i in range(1, 101)], 0.95) == 95.0
+    hedger = Hedger(default_delay=2.0, min_samples=5)
+    assert hedger.delay() == 2.0
+    for _ in range(5):
+        hedger.submit(lambda: "ok").result(timeout=1)
+    assert hedger.delay() < 0.1
+    assert Hedger(hedge_after=0.3).delay() == 0.3
+
+
+def test_hedged_request_beats_the_deadline():
+    transport = MagicMock()
+    transport.post.side_effect = slow_then_fast(0.5)
+    client = make_client(transport, hedge_after=0.02)
+    assert client.get_response("u", MESSAGES, deadline=0.3, fallback="list") == "Jazz tonight! (hedge)"
+    stats = client.slo_stats()
+    assert (stats["calls"], stats["hedge_rate"], stats["hedge_win_rate"], stats["fallback_rate"]) == (1, 1.0, 1.0, 0.0)
+
+
+def test_fallback_is_served_past_the_deadline_and_the_late_answer_cached():
+    transport = MagicMock()
+    transport.post.side_effect = lambda *a, **k: time.sleep(0.15) or completion("Jazz tonight!")
+    client = make_client(transport, hedge_after=1.0)
+    assert client.get_response("u", MESSAGES, deadline=0.05, fallback="list") == "list"
+    time.sleep(0.2)
+    assert client.get_response("u", MESSAGES, deadline=0.05, fallback="list") == "Jazz tonight!"
+    assert transport.post.call_count == 1
+    assert client.slo_stats()["fallback_rate"] == 0.5
+
+
+def test_deadline_without_fallback_raises():
+    transport = MagicMock()
+    transport.post.side_effect = lambda *a, **k: time.sleep(0.15) or completion("Jazz tonight!")
+    with pytest.raises(RuntimeError, match="deadline"):
+        make_client(transport, hedge_after=1.0).get_response("u", MESSAGES, deadline=0.05)
+
+
+def test_stream_replaces_the_fallback_with_the_late_answer():
+    transport = MagicMock()
+    transport.read_timeout = 1.0
+    transport.post.side_effect = lambda *a, **k: streamed("Jazz", " tonight!", first_delay=0.15)
+    client = make_client(transport, hedge_after=1.0)
+    chunks = list(client.stream_response("u", MESSAGES, deadline=0.05, fallback="list"))
+    assert chunks == ["list", "Jazz", " tonight!"]
+    assert isinstance(chunks[1], Replacement) and not isinstance(chunks[0], Replacement)
+    assert client.slo_stats()["late_answer_rate"] == 1.0
+
+
+def test_deadline_stream_yields_tokens_as_they_arrive():
+    transport = MagicMock()
+    transport.post.side_effect = lambda *a, **k: streamed("Jazz", " tonight!")
+    client = make_client(transport, hedge_after=0.5)
+    chunks = list(client.stream_response("u", MESSAGES, deadline=1.0, fallback="list"))
+    assert chunks == ["Jazz", " tonight!"]
+    assert transport.post.call_count == 1
+
+
+def test_stream_without_a_first_token_is_hedged():
+    transport = MagicMock()
+    responses = iter([streamed("slow", first_delay=0.5), streamed("Jazz", " tonight!")])
+    transport.post.side_effect = lambda *a, **k: next(responses)
+    client = make_client(transport, hedge_after=0.02)
+    assert list(client.stream_response("u", MESSAGES, deadline=0.3, fallback="list")) == ["Jazz", " tonight!"]
+    assert client.slo_stats()["hedge_win_rate"] == 1.0
+
+
+def test_service_falls_back_to_the_retrieved_events(tmp_path, make_event):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'slo.db'}")
+    tomorrow = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time(20))
+    repo.upsert([
+        make_event(id=event_id, event_name=f"Event {event_id}", start_datetime=tomorrow, event_type="Party",
+                   region="Basel (CH)", region_standardized="Basel (CH)")
+        for event_id in ("b1", "b2")
+    ])
+    context = RetrievalContext(repo)
+    client = MagicMock()
+    client.get_response.return_value = "Two parties!"
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time(9))
+
+    def ask(service):
+        return service.get_response(
+            "Any events in Basel?", [{"role": "user", "content": "Any events in Basel?"}],
+            EventFilter(region="Basel (CH)"), "event_query", today, repo, context.recommender,
+            events_to_context, lambda profile: "", context=context,
+        )
+
+    assert ask(ChatbotService(client, {}, deadline=2.0)) == "Two parties!"
+    kwargs = client.get_response.call_args.kwargs
+    assert kwargs["deadline"] == 2.0
+    assert "Event b1" in kwargs["fallback"] and "Event b2" in kwargs["fallback"]
+    # Without a deadline the client is called as before
+    ask(ChatbotService(client, {}))
+    assert "deadline" not in client.get_response.call_args.kwargs
@@ -0,0 +1,144 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.chatbot_client import ChatbotClient, ChatbotConfig
+from befriends.common.config import AppConfig
+from befriends.llm.scheduler import (
+    BACKGROUND, INTERACTIVE, LLMScheduler, RateBudget, SchedulerOverloaded, SQLiteRateBudget, request_tokens,
+    shared_scheduler,
+)
+
+MESSAGES = [{"role": "system", "content": "Events: []"}, {"role": "user", "content": "What's happening tonight?"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Permits(RateBudget):
+    """Grants exactly as many requests as were released."""
+
+    def __init__(self):
+        super().__init__()
+        self.permits = threading.Semaphore(0)
+
+    def acquire(self, tokens):
+        return 0.0 if self.permits.acquire(blocking=False) else 0.01
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_request_and_token_buckets():
+    clock = Clock()
+    budget = RateBudget(requests_per_minute=2, tokens_per_minute=600, clock=clock)
+    assert budget.acquire(100) == 0
+    assert budget.acquire(100) == 0
+    assert budget.acquire(100) == pytest.approx(30.0)
+    clock.now += 30
+    assert budget.acquire(100) == 0
+    tokens = RateBudget(tokens_per_minute=600, clock=clock)
+    assert tokens.acquire(500) == 0
+    # 100 tokens are left and 10 come back per second
+    assert tokens.acquire(200) == pytest.approx(10.0)
+    assert RateBudget(clock=clock).acquire(10**6) == 0
+
+
+def test_lease_is_shared_across_instances(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "rate.db")
+    first = SQLiteRateBudget(path, requests_per_minute=2, clock=clock)
+    second = SQLiteRateBudget(path, requests_per_minute=2, clock=clock)
+    assert first.acquire(0) == 0
+    assert second.acquire(0) == 0
+    assert first.acquire(0) == pytest.approx(30.0)
+    clock.now += 30
+    assert second.acquire(0) == 0
+
+
+def test_interactive_requests_go_first():
+    budget = Permits()
+    scheduler = LLMScheduler(budget)
+    order = []
+
+    def request(name, priority):
+        scheduler.run(lambda: order.append(name), priority=priority)
+
+    threads = [threading.Thread(target=request, args=("enrich", BACKGROUND))]
+    threads[0].start()
+    wait_until(lambda: scheduler.depth() == 1)
+    threads.append(threading.Thread(target=request, args=("chat", INTERACTIVE)))
+    threads[1].start()
+    wait_until(lambda: scheduler.depth() == 2)
+    for expected in (1, 2):
+        budget.permits.release()
+        wait_until(lambda: len(order) == expected)
+    for thread in threads:
+        thread.join()
+    assert order == ["chat", "enrich"]
+    assert scheduler.stats()["granted"] == 2
+
+
+def test_full_queue_sheds_background_work_first():
+    scheduler = LLMScheduler(Permits(), max_queue=1)
+    errors = []
+
+    def background():
+        try:
+            scheduler.run(lambda: None, priority=BACKGROUND)
+        except SchedulerOverloaded as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    wait_until(lambda: scheduler.depth() == 1)
+    chat = threading.Thread(target=lambda: scheduler.run(lambda: None))
+    chat.start()
+    thread.join(timeout=2)
+    assert len(errors) == 1
+    # A request of the same priority is refused
+    with pytest.raises(SchedulerOverloaded, match="full"):
+        scheduler.run(lambda: None)
+    scheduler.budget.permits.release()
+    chat.join(timeout=2)
+    assert scheduler.stats()["shed"] == 2
+
+
+def test_requests_waiting_too_long_are_shed():
+    scheduler = LLMScheduler(Permits(), max_wait=0.05)
+    with pytest.raises(SchedulerOverloaded, match="waited"):
+        scheduler.run(lambda: None)
+    assert scheduler.depth() == 0
+    assert scheduler.stats()["shed"] == 1
+
+
+def test_client_charges_requests_and_tokens():
+    transport = MagicMock()
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"choices": [{"message": {"content": "Jazz tonight!"}}]}
+    transport.post.return_value = response
+    app_config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint",
+        sources=[], features={}, llm_requests_per_minute=60, llm_tokens_per_minute=10000, llm_cache_size=0,
+    )
+    client = ChatbotClient(ChatbotConfig(app_config), transport=transport)
+    assert client.scheduler is shared_scheduler(60, 10000, 64, None)
+    assert client.get_response("u", MESSAGES) == "Jazz tonight!"
+    waits = client.scheduler.telemetry.recent_events("llm.queue_wait")
+    assert [e["tokens"] for e in waits] == [request_tokens(client._payload("u", MESSAGES, "gpt-3.5-turbo"))]
+    assert client.scheduler.stats()["granted"] == 1
+    # Without limits requests go straight to the transport
+    assert ChatbotClient(ChatbotConfig(AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint", sources=[], features={},
+    )), transport=transport).scheduler is None
@@ -0,0 +1,186 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from befriends.llm.transport import CircuitBreaker, CircuitOpenError, LLMTransport, retry_after_seconds
+
+
+class StubServer:
+    """Keep-alive HTTP/1.1 server answering POSTs from a script of (status, headers) pairs.
+
+    Once the script is used up every request gets 200. ``connections`` holds
+    the client address of every accepted connection.
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.connections = []
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                stub.connections.append(self.client_address)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests += 1
+                status, headers = stub.script.pop(0) if stub.script else (200, {})
+                body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(script=()):
+        servers.append(StubServer(script))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def make_transport(**kwargs):
+    sleeps = []
+    transport = LLMTransport(sleep=sleeps.append, **kwargs)
+    return transport, sleeps
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+def test_requests_reuse_one_keep_alive_connection(stub):
+    server = stub()
+    transport, _ = make_transport()
+    for _ in range(3):
+        assert transport.post(server.url, headers={}, json={"n": 1}).json()["choices"][0]["message"]["content"] == "ok"
+    assert server.requests == 3
+    assert len(server.connections) == 1
+
+
+def test_retry_after_is_honoured(stub):
+    server = stub([(503, {"Retry-After": "2"}), (429, {"Retry-After": "1"})])
+    transport, sleeps = make_transport()
+    response = transport.post(server.url, headers={}, json={})
+    assert response.status_code == 200
+    assert sleeps == [2.0, 1.0]
+    assert transport.telemetry.counters()["llm.retry"] == 2
+
+
+def test_backoff_is_jittered_exponential_and_gives_up(stub):
+    server = stub([(502, {})] * 10)
+    transport, sleeps = make_transport(max_retries=3, backoff_base=0.5, backoff_max=1.5)
+    response = transport.post(server.url, headers={}, json={})
+    assert response.status_code == 502
+    assert server.requests == 4
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(1.5, 0.5 * 2 ** attempt)
+
+
+def test_retry_after_beyond_the_limit_is_not_waited_for(stub):
+    server = stub([(429, {"Retry-After": "3600"})])
+    transport, sleeps = make_transport()
+    assert transport.post(server.url, headers={}, json={}).status_code == 429
+    assert sleeps == [] and server.requests == 1
+
+
+def test_client_errors_are_not_retried(stub):
+    server = stub([(401, {})])
+    transport, sleeps = make_transport()
+    assert transport.post(server.url, headers={}, json={}).status_code == 401
+    assert sleeps == [] and transport.breaker.state == "closed"
+
+
+def test_circuit_opens_fails_fast_and_recovers(stub):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    transport, sleeps = make_transport(max_retries=1, breaker=breaker)
+    down = unused_url()
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            transport.post(down, headers={}, json={})
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        transport.post(down, headers={}, json={})
+    assert transport.telemetry.counters()["llm.circuit_open"] == 1
+    assert len(sleeps) == 2  # one retry per call, none while open
+    now[0] = 10.0
+    assert breaker.state == "half_open"
+    # A single probe goes out; its success closes the circuit
+    server = stub()
+    assert transport.post(server.url, headers={}, json={}).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens_the_circuit():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5.0, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 5.0
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 9.0
+    assert not breaker.allow()
+
+
+def test_retry_after_http_date():
+    response = requests.Response()
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:30 GMT"
+    assert retry_after_seconds(response, now=1445412500.0) == pytest.approx(10.0)
+    response.headers["Retry-After"] = "soon"
+    assert retry_after_seconds(response) is None
+
+
+def test_shared_instances_count_on_the_app_telemetry(tmp_path, monkeypatch):
+    from befriends.app import Application
+    from befriends.chatbot_client import ChatbotClient, ChatbotConfig
+    from befriends.common.config import AppConfig
+    from befriends.common.telemetry import Telemetry
+
+    monkeypatch.chdir(tmp_path)
+    config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint", sources=[], features={},
+    )
+    app = Application(config, Telemetry())
+    client = app.chat_controller().chatbot_client
+    assert client.transport.telemetry is client.cache.telemetry is app.telemetry
+    client.cache.get("key", "scope")
+    assert app.admin_controller().status()["counters"]["llm_cache.miss"] == 1
+    # Clients without telemetry of their own keep sharing one pool and cache
+    first, second = ChatbotClient(ChatbotConfig(config)), ChatbotClient(ChatbotConfig(config))
+    assert (first.transport, first.cache) == (second.transport, second.cache)
+    assert first.transport is not client.transport
@@ -0,0 +1,89 @@
+import datetime
+import json
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from befriends.catalog.orm import EventORM
+from befriends.catalog.prices import FxRates, is_free
+from befriends.catalog.repository import CatalogRepository
+from .conftest import build_event
+
+
+def make_event(event_id, price, currency, region="Basel (CH)", price_category=None):
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=3),
+        event_type="Party",
+        dance_style=["Salsa"],
+        price_min=price,
+        price_max=price,
+        currency=currency,
+        price_category=price_category,
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer="Org",
+    )
+
+
+RATES = FxRates("EUR", {"EUR": 1.0, "CHF": 1.1})
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'prices.db'}", fx_rates=RATES)
+    repo.upsert([
+        make_event("chf", 19.0, "CHF"),
+        make_event("eur", 19.0, "EUR", region="Lörrach (DE)"),
+        make_event("implied", 19.0, None),
+        make_event("free", 0.0, None, region="Weil am Rhein (DE)", price_category="Free"),
+    ])
+    return repo
+
+
+def test_conversion_uses_explicit_or_implied_currency():
+    assert RATES.convert(10, "chf") == 11.0
+    assert RATES.convert(10, None, "Basel (CH)") == 11.0
+    assert RATES.convert(10, None, "Lörrach (DE)") == 10.0
+    assert RATES.convert(10, "USD") is None
+    assert RATES.convert(None, "EUR") is None
+    assert is_free("Kostenlos", None, None) and not is_free(None, None, "EUR")
+
+
+def test_price_filters_compare_in_reference_currency(repo):
+    assert {e.id for e in repo.search_text("", {"price_max": 20})} == {"eur", "free"}
+    assert {e.id for e in repo.search_text("", {"price_min": 20})} == {"chf", "implied"}
+    assert {e.id for e in repo.search_text("", {"is_free": True})} == {"free"}
+
+
+def test_changed_rates_renormalize_existing_rows(repo, tmp_path):
+    cheaper = CatalogRepository(str(repo.engine.url), fx_rates=FxRates("EUR", {"EUR": 1.0, "CHF": 1.0}))
+    assert {e.id for e in cheaper.search_text("", {"price_max": 20})} == {"chf", "eur", "implied", "free"}
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"reference": "EUR", "rates": {"EUR": 1.0, "CHF": 1.0}}))
+    assert FxRates.load(path).version == cheaper.fx_rates.version
+
+
+def test_old_schema_gains_normalized_columns(tmp_path):
+    url = f"sqlite:///{tmp_path / 'old.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE events (id VARCHAR PRIMARY KEY, event_name VARCHAR, start_datetime DATETIME, "
+            "price_min VARCHAR, price_max VARCHAR, currency VARCHAR, region_standardized VARCHAR, "
+            "price_category VARCHAR, pricing_type VARCHAR)"
+        ))
+        conn.execute(text(
+            "INSERT INTO events (id, event_name, start_datetime, price_min, price_max, currency, region_standardized) "
+            "VALUES ('old', 'Old', '2999-01-01 20:00:00', '10', '10', 'CHF', 'Basel (CH)')"
+        ))
+    repo = CatalogRepository(url, fx_rates=RATES)
+    columns = {c["name"] for c in inspect(repo.engine).get_columns("events")}
+    assert {"price_min_norm", "price_max_norm", "is_free"} <= columns
+    session = repo.Session()
+    try:
+        assert session.get(EventORM, "old").price_max_norm == 11.0
+    finally:
+        session.close()
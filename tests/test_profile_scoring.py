@@ -0,0 +1,92 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.recommendation.scoring import EventEncodings, ProfileScorer, interest_encodings_for
+from befriends.recommendation.service import RecommendationService
+from .conftest import build_event
+
+TODAY = datetime.date.today()
+KAROLINA = {"city": "Basel (CH)", "age": 33, "interests": ["dance (zouk, salsa)", "concerts", "dogs"]}
+
+
+def make_event(event_id, days_ahead, event_type=None, dance_style=None, age_min=None, age_max=None, age_group_label=None):
+    start = datetime.datetime.combine(TODAY + datetime.timedelta(days=days_ahead), datetime.time(20, 0))
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=start,
+        event_type=event_type,
+        dance_style=dance_style or [],
+        price_min=10.0,
+        price_max=10.0,
+        currency="CHF",
+        age_min=age_min,
+        age_max=age_max,
+        age_group_label=age_group_label,
+        event_location="Kaserne",
+        region="Basel (CH)",
+        region_standardized="Basel (CH)",
+        organizer="Org",
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'scoring.db'}")
+    repo.upsert([
+        make_event("market", 1, event_type="Market"),
+        make_event("teens", 2, event_type="Concert", age_min=13, age_max=17),
+        make_event("concert", 3, event_type="Concert", age_group_label="All Ages"),
+        make_event("zouk", 4, dance_style=["Zouk", "Kizomba"]),
+        make_event("yoga", 5, event_type="Sport"),
+    ])
+    return repo
+
+
+def test_recommend_events_ranks_by_interests_and_age(repo):
+    service = RecommendationService(repo)
+    assert [e.id for e in service.recommend_events({}, KAROLINA, max_events=3)] == ["zouk", "concert", "market"]
+    assert [e.id for e in service.recommend_events({}, {"city": "Basel (CH)"}, max_events=3)] == ["market", "teens", "concert"]
+    # Free-text results are ranked for the profile too.
+    assert [e.id for e in service.recommend_events({}, KAROLINA, max_events=1, text="concert")] == ["concert"]
+
+
+def test_encodings_are_built_once_and_patched_on_import(repo):
+    encodings = interest_encodings_for(repo)
+    assert len(encodings) == 5
+    repo.upsert([make_event("yoga", 5, event_type="Salsa Night"), make_event("dogs", 6, event_type="Dog Walk")])
+    assert interest_encodings_for(repo) is encodings
+    assert len(encodings) == 6
+    events = repo.search_text("", {"region": "Basel (CH)"})
+    scorer = ProfileScorer()
+    np.testing.assert_allclose(scorer.score([KAROLINA], events, encodings), scorer.score([KAROLINA], events), atol=1e-6)
+    ranked = RecommendationService(repo).recommend_events({}, KAROLINA, max_events=2)
+    # zouk, the re-encoded yoga and dogs tie on interests; the sooner ones win.
+    assert [e.id for e in ranked] == ["zouk", "yoga"]
+
+
+def test_unencoded_events_score_neutral():
+    encodings = EventEncodings.build([make_event("a", 1, event_type="Concert")])
+    unknown = make_event("b", 2, event_type="Concert")
+    scores = ProfileScorer(recency_weight=0.0).score([KAROLINA], [make_event("a", 1, event_type="Concert"), unknown], encodings)
+    assert scores[0, 0] > 0 and scores[0, 1] == 0
+
+
+def test_patched_encodings_stay_compact():
+    events = [make_event("a", 1, event_type="Concert"), make_event("b", 2, event_type="Dance", dance_style=["Zouk"])]
+    encodings = EventEncodings.build(events)
+    for style in ("Salsa", "Tango", "Swing", "Bachata", "Zouk"):
+        encodings.upsert([make_event("b", 2, event_type="Dance", dance_style=[style])])
+    # Orphaned entries are dropped once they outnumber the live ones
+    assert len(encodings.entry_columns) <= 2 * int((encodings.row_end - encodings.row_start).sum())
+    fresh = EventEncodings.build(events)
+    rows = np.array([1, -1, 0])
+    ours = encodings.event_matrix(rows)
+    expected = fresh.event_matrix(np.array([fresh.row_of["b"], -1, fresh.row_of["a"]]))
+    vocabulary = sorted(fresh.vocabulary)
+    np.testing.assert_allclose(
+        ours[:, [encodings.vocabulary[w] for w in vocabulary]], expected[:, [fresh.vocabulary[w] for w in vocabulary]],
+    )
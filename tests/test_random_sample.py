@@ -0,0 +1,64 @@
+import collections
+import datetime
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from components.chatbot_service import ChatbotService
+from .conftest import build_event
+
+
+def make_event(event_id, organizer, region="Basel (CH)", days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        event_type="Party",
+        region=region,
+        region_standardized=region,
+        organizer=organizer,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'sample.db'}")
+    events = [make_event(str(i), f"Org {i % 5}", days_ahead=1 + i % 20) for i in range(100)]
+    events += [make_event(f"l{i}", "Org 0", region="Lörrach (DE)") for i in range(4)]
+    events += [make_event(f"past{i}", "Org 0", days_ahead=-3) for i in range(50)]
+    repo.upsert(events)
+    return repo
+
+
+def test_sample_is_uniform_over_matching_upcoming_events(repo):
+    rng = random.Random(42)
+    counts = collections.Counter(e.id for _ in range(1200) for e in repo.sample({"organizer": "Org 0"}, k=1, rng=rng))
+    assert set(counts) == {str(i) for i in range(0, 100, 5)} | {f"l{i}" for i in range(4)}
+    # 24 candidates, 50 draws each on average: every one lands well inside a loose band.
+    assert min(counts.values()) > 20 and max(counts.values()) < 90
+
+
+def test_sample_applies_all_filters_and_caps_at_matches(repo):
+    events = repo.sample({"organizer": "Org 0", "region_standardized": "Lörrach (DE)"}, k=10, rng=random.Random(1))
+    assert sorted(e.id for e in events) == ["l0", "l1", "l2", "l3"]
+    picked = repo.sample(None, k=5, rng=random.Random(2))
+    assert len({e.id for e in picked}) == 5
+    assert all(not e.id.startswith("past") for e in picked)
+    assert repo.sample({"organizer": "Nobody"}, k=3) == []
+
+
+def test_surprise_intent_skips_the_llm():
+    assert ChatbotService.detect_intent("Surprise me with a random event.") == "surprise"
+    assert ChatbotService.detect_intent("Überrasch mich!") == "surprise"
+    client = MagicMock()
+    repo = MagicMock()
+    repo.sample.return_value = [make_event("x", "Org 1")]
+    service = ChatbotService(client, {"city": "Basel (CH)"})
+    response = service.get_response(
+        "Surprise me with a random event.", [], {}, "surprise", datetime.datetime.now(), repo, MagicMock(), MagicMock(), MagicMock()
+    )
+    assert "Event x" in response
+    client.get_response.assert_not_called()
+    assert repo.sample.call_args.kwargs["k"] == 1
@@ -0,0 +1,94 @@
+import datetime
+import types
+
+import numpy as np
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.recommendation.scoring import ProfileScorer
+from befriends.recommendation.service import RecommendationService
+from .conftest import build_event
+
+TODAY = datetime.date.today()
+
+
+def make_event(event_id, region, days_ahead, event_type="Party", dance_style=None, age_min=None, age_max=None):
+    start = datetime.datetime.combine(TODAY + datetime.timedelta(days=days_ahead), datetime.time(20, 0))
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=start,
+        event_type=event_type,
+        dance_style=dance_style or [],
+        price_min=10.0,
+        price_max=10.0,
+        currency="CHF",
+        age_min=age_min,
+        age_max=age_max,
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer="Org",
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'many.db'}")
+    repo.upsert([
+        make_event("techno", "Basel (CH)", 1, event_type="Party"),
+        make_event("kids", "Basel (CH)", 2, event_type="Family", age_max=12),
+        make_event("salsa", "Basel (CH)", 3, event_type="Dance", dance_style=["Salsa", "Bachata"]),
+        make_event("jazz", "Basel (CH)", 4, event_type="Concert", dance_style=["Swing"]),
+        make_event("zouk", "Lörrach (DE)", 2, event_type="Dance", dance_style=["Zouk"]),
+        make_event("market", "Lörrach (DE)", 3, event_type="Market"),
+    ])
+    return repo
+
+
+def test_scorer_ranks_interests_and_age_fit():
+    events = [
+        make_event("a", "X", 1, event_type="Party"),
+        make_event("b", "X", 2, dance_style=["Salsa"], age_min=18, age_max=30),
+        make_event("c", "X", 3, event_type="Concert"),
+    ]
+    profiles = [{"interests": ["dance (zouk, salsa)"], "age": 25}, {"interests": ["Salsa"], "age": 60}, {}]
+    scorer = ProfileScorer()
+    top = scorer.top_k(scorer.score(profiles, events), 2)
+    assert [[events[j].id for j in row] for row in top] == [["b", "a"], ["a", "c"], ["a", "b"]]
+    assert scorer.top_k(np.zeros((1, 1), dtype=np.float32), 5).shape == (1, 1)
+
+
+def test_recommend_many_groups_profiles_and_streams_in_order(repo):
+    calls = []
+    search_text = repo.search_text
+
+    def counting_search_text(self, text, filters=None, profile=None):
+        calls.append(filters)
+        return search_text(text, filters, profile)
+
+    repo.search_text = types.MethodType(counting_search_text, repo)
+    profiles = [
+        {"name": "a", "city": "Basel (CH)", "interests": ["Salsa dancing"], "age": 30},
+        {"name": "b", "city": "Lörrach (DE)", "interests": ["zouk"]},
+        {"name": "c", "city": "Basel (CH)", "interests": ["jazz concerts"]},
+        {"name": "d", "city": "Basel (CH)", "interests": [], "age": 40},
+    ]
+    results = RecommendationService(repo).recommend_many(iter(profiles), k=2, batch_size=3)
+    assert not isinstance(results, list)
+    out = [(p["name"], [e.id for e in events]) for p, events in results]
+    assert out == [
+        ("a", ["salsa", "techno"]),
+        ("b", ["zouk", "market"]),
+        ("c", ["jazz", "techno"]),
+        ("d", ["techno", "salsa"]),
+    ]
+    # Two regions in the first batch, one in the second.
+    assert len(calls) == 3
+
+
+def test_recommend_many_without_interests_matches_recommend_events(repo):
+    service = RecommendationService(repo)
+    profile = {"city": "Basel (CH)"}
+    [(_, events)] = list(service.recommend_many([profile], k=3))
+    assert events == service.recommend_events({}, profile, max_events=3)
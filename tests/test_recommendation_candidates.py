@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.domain.filters import EventFilter
+from befriends.recommendation.candidates import WINDOWS, candidate_lists_for, window_bounds
+from befriends.recommendation.service import RecommendationService
+from .conftest import build_event
+
+TODAY = datetime.date.today()
+REGIONS = ["Basel (CH)", "Lörrach (DE)", "Huningue (FR)"]
+
+
+def make_event(event_id, region, days_ahead, minute=0):
+    start = datetime.datetime.combine(TODAY + datetime.timedelta(days=days_ahead), datetime.time(19, minute))
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=start,
+        event_type="Party",
+        dance_style=["Salsa"],
+        price_min=10.0,
+        price_max=10.0,
+        currency="CHF",
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer="Org",
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'candidates.db'}")
+    repo.upsert([
+        make_event(f"{r}-{d}", region, d, minute=r)
+        for r, region in enumerate(REGIONS) for d in range(-3, 40, 2)
+    ])
+    return repo
+
+
+def test_lists_match_live_queries_for_every_region_and_window(repo):
+    lists = candidate_lists_for(repo)
+    for region in [None, *REGIONS]:
+        for window in WINDOWS:
+            date_from, date_to = window_bounds(window, TODAY)
+            key = EventFilter.of(region=region, date_from=date_from, date_to=date_to)
+            live = [e.id for e in repo.search_text("", key)][: lists.limit]
+            assert [e.id for e in lists.get(key, lists.limit)] == live, (region, window)
+
+
+def test_recommend_events_serves_materialized_lists_without_querying(repo, monkeypatch):
+    service = RecommendationService(repo)
+    expected = [e.id for e in service.recommend_events({}, {"city": "Lörrach (DE)"}, max_events=5)]
+    everywhere = [e.id for e in service.recommend_events({"region_standardized": "All"}, {}, max_events=5)]
+    monkeypatch.setattr(repo, "search_text", lambda *a, **k: pytest.fail("live query"))
+    served = service.recommend_events({}, {"city": "Lörrach (DE)"}, max_events=5)
+    assert [e.id for e in served] == expected
+    assert all(e.region_standardized == "Lörrach (DE)" for e in served)
+    # "All" means every region, not the profile's city
+    served = service.recommend_events({"region_standardized": "All"}, {"city": "Lörrach (DE)"}, max_events=5)
+    assert [e.id for e in served] == everywhere
+    assert any(e.region_standardized != "Lörrach (DE)" for e in served)
+
+
+def test_unusual_filters_fall_back_to_live_queries(repo):
+    lists = candidate_lists_for(repo)
+    assert lists.get(EventFilter.of(region="Basel (CH)", event_type="Party"), 5) is None
+    date_from, date_to = window_bounds("month", TODAY)
+    assert lists.get(EventFilter.of(region="Basel (CH)", date_from=date_from, date_to=date_to), 500) is None
+    events = RecommendationService(repo).recommend_events({"event_type": "Party"}, {"city": "Basel (CH)"}, max_events=3)
+    assert len(events) == 3
+
+
+def test_lists_refresh_after_import_and_on_a_new_day(repo):
+    lists = candidate_lists_for(repo)
+    repo.upsert([make_event("new", "Weil am Rhein (DE)", 1)])
+    assert candidate_lists_for(repo) is lists
+    key = EventFilter.of(region="Weil am Rhein (DE)", date_from=TODAY, date_to=TODAY + datetime.timedelta(days=30))
+    assert [e.id for e in lists.get(key, 5)] == ["new"]
+    lists.built_on = TODAY - datetime.timedelta(days=1)
+    assert candidate_lists_for(repo) is not lists
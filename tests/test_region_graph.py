@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.domain.search_models import SearchQuery
+from befriends.search.regions import RegionGraph, default_region_graph, region_graph_for
+from befriends.search.relevance import RelevancePolicy
+from .conftest import build_event
+
+
+def make_event(event_id, region, latitude=None, longitude=None, days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=f"Salsa {event_id}",
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        event_type="Party",
+        dance_style=["Salsa"],
+        region=region,
+        region_standardized=region,
+        cross_border_potential="Ja",
+        latitude=latitude,
+        longitude=longitude,
+    )
+
+
+def test_shipped_graph_uses_shortest_travel_distance():
+    graph = default_region_graph()
+    assert graph.distance("Basel (CH)", "Lörrach (DE)") == 9
+    # Huningue -> Weil am Rhein -> Lörrach beats any direct route.
+    assert graph.distance("Huningue (FR)", "Lörrach (DE)") == 10
+    assert list(graph.within("Basel (CH)", 10)) == ["Basel (CH)", "Huningue (FR)", "Weil am Rhein (DE)", "Lörrach (DE)"]
+    assert graph.within("Atlantis", 50) == {"Atlantis": 0.0}
+
+
+def test_unlisted_regions_are_linked_by_coordinates():
+    graph = RegionGraph([("Basel (CH)", "Lörrach (DE)", 9)]).with_coordinates({
+        "Basel (CH)": (47.5596, 7.5886),
+        "Riehen (CH)": (47.5788, 7.6468),
+        "Zürich (CH)": (47.3769, 8.5417),
+    })
+    assert 4 < graph.distance("Riehen (CH)", "Basel (CH)") < 8
+    assert graph.distance("Riehen (CH)", "Lörrach (DE)") == pytest.approx(graph.distance("Riehen (CH)", "Basel (CH)") + 9)
+    assert graph.distance("Zürich (CH)", "Basel (CH)") is None
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'regions.db'}")
+    repo.upsert([
+        make_event("bs", "Basel (CH)", 47.5596, 7.5886),
+        make_event("lo", "Lörrach (DE)", 47.6156, 7.6614),
+        make_event("fr", "Freiburg (DE)", 47.9990, 7.8421),
+        make_event("ri", "Riehen (CH)", 47.5788, 7.6468),
+    ])
+    return repo
+
+
+def test_region_radius_expands_to_nearby_regions(repo):
+    results = repo.search_text("", {"region_standardized": "Basel (CH)", "region_radius": 20})
+    assert {e.id for e in results} == {"bs", "lo", "ri"}
+    assert repo.telemetry.recent_events("query_plan")[-1]["order"] == ["region_standardized in"]
+    assert "Riehen (CH)" in region_graph_for(repo).within("Basel (CH)", 20)
+    assert {e.id for e in repo.search_text("", {"region_standardized": "Basel (CH)"})} == {"bs"}
+
+
+def test_ranking_prefers_nearer_regions(repo):
+    events = repo.search_text("", {"region": "Basel (CH)", "region_radius": 100})
+    query = SearchQuery(text="", start_datetime_from=None, start_datetime_to=None, region="Basel (CH)", region_radius=100)
+    ranked = [e.id for e in RelevancePolicy(region_graph_for(repo)).rank(events, query)]
+    assert ranked[0] == "bs"
+    assert ranked[-1] == "fr"
+
+
+def test_ranking_uses_the_filters_graph(repo):
+    # Riehen is only linked by its coordinates, so the shipped table has no distance for it
+    assert default_region_graph().distance("Basel (CH)", "Riehen (CH)") is None
+    events = repo.search_text("", {"region": "Basel (CH)", "region_radius": 100})
+    query = SearchQuery(text="", start_datetime_from=None, start_datetime_to=None, region="Basel (CH)", region_radius=100)
+    ranked = [e.id for e in RelevancePolicy(repository=repo).rank(events, query)]
+    assert ranked.index("ri") < ranked.index("fr")
@@ -0,0 +1,92 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.domain.filters import EventFilter
+from befriends.recommendation.context import RetrievalContext
+from befriends.recommendation.service import RecommendationService
+from components.chatbot_service import ChatbotService
+from .conftest import build_event
+
+TODAY = datetime.date.today()
+
+
+def make_event(event_id, region, days_ahead, event_type="Party"):
+    start = datetime.datetime.combine(TODAY + datetime.timedelta(days=days_ahead), datetime.time(20, 0))
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=start,
+        event_type=event_type,
+        dance_style=[],
+        price_min=10.0,
+        price_max=10.0,
+        currency="CHF",
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer="Org",
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'turn.db'}")
+    repo.upsert([
+        make_event("b1", "Basel (CH)", 1),
+        make_event("b2", "Basel (CH)", 2, event_type="Concert"),
+        make_event("l1", "Lörrach (DE)", 3),
+        make_event("past", "Lörrach (DE)", -3),
+    ])
+    return repo
+
+
+def test_exists_runs_without_loading_rows(repo):
+    assert repo.exists({"region": "Basel (CH)"})
+    assert not repo.exists({"region": "Basel (CH)", "event_type": "Market"})
+    # Past events do not count
+    assert not repo.exists({"region": "Lörrach (DE)", "date_to": TODAY - datetime.timedelta(days=1)})
+
+
+def test_each_signature_is_retrieved_once(repo):
+    recommender = RecommendationService(repo)
+    recommender.recommend_events = MagicMock(wraps=recommender.recommend_events)
+    context = RetrievalContext(repo, recommender)
+    first = context.recommend({"region": "Basel (CH)"}, {}, 6, today=TODAY)
+    # Same effective filters, spelled differently
+    second = context.recommend(EventFilter.of(city="Basel (CH)"), {}, 6, today=TODAY)
+    assert [e.id for e in first] == [e.id for e in second] == ["b1", "b2"]
+    assert recommender.recommend_events.call_count == 1
+    context.recommend({"region": "Basel (CH)"}, {"interests": ["Concert"]}, 6, today=TODAY)
+    assert recommender.recommend_events.call_count == 2
+
+
+def test_exists_is_answered_from_fetched_results(repo, monkeypatch):
+    context = RetrievalContext(repo)
+    filters = context.recommender.effective_filters({"region": "Basel (CH)"}, {}, TODAY)
+    context.recommend(filters, {}, 6, today=TODAY)
+    monkeypatch.setattr(repo, "exists", MagicMock(side_effect=AssertionError("queried")))
+    assert context.exists(filters)
+    assert context.search("", {"event_type": "Market"}) == []
+    assert not context.exists({"event_type": "Market"})
+
+
+def test_chatbot_turn_shares_its_events_and_widens_empty_regions(repo):
+    client = MagicMock()
+    client.get_response.return_value = "Here you go"
+    recommender = RecommendationService(repo)
+    recommender.recommend_events = MagicMock(wraps=recommender.recommend_events)
+    context = RetrievalContext(repo, recommender)
+    service = ChatbotService(client, {"city": "Weil am Rhein (DE)"})
+    now = datetime.datetime.combine(TODAY, datetime.time(9, 0))
+    response = service.get_response(
+        "Any events?", [{"role": "user", "content": "Any events?"}], None, "event_query", now,
+        repo, recommender, lambda events, **kwargs: "", lambda profile: "", context=context,
+    )
+    assert response == "Here you go"
+    # Nothing in Weil am Rhein itself, so the nearby Basel and Lörrach events are used
+    assert {e.id for e in context.shared_events} == {"b1", "b2", "l1"}
+    # One retrieval for the whole turn; the existence check was a single EXISTS
+    assert recommender.recommend_events.call_count == 1
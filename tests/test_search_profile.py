@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.common.telemetry import Profile, Telemetry
+from befriends.response.formatter import ResponseFormatter
+from befriends.search.relevance import RelevancePolicy
+from befriends.search.service import SearchService
+from befriends.web.search_controller import SearchController
+from .conftest import build_event
+
+
+def make_event(event_id, name):
+    return build_event(
+        id=event_id,
+        event_name=name,
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=3),
+        event_type="Party",
+        dance_style=["Salsa"],
+        event_location="Kaserne",
+        region="Basel (CH)",
+        region_standardized="Basel (CH)",
+        organizer="Salsa Basel",
+    )
+
+
+@pytest.fixture
+def controller(tmp_path):
+    telemetry = Telemetry()
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'profile.db'}", telemetry=telemetry)
+    repo.upsert([make_event("1", "Salsa Social"), make_event("2", "Salsa Practica")])
+    service = SearchService(repo, RelevancePolicy(), telemetry)
+    return SearchController(service, ResponseFormatter(), telemetry)
+
+
+def test_time_block_is_a_shared_noop_without_profile():
+    telemetry = Telemetry()
+    assert telemetry.time_block("sql") is telemetry.time_block("rank")
+    profile = Profile("rows")
+    with telemetry.time_block("sql", profile):
+        pass
+    with telemetry.time_block("sql", profile):
+        pass
+    breakdown = profile.as_dict()
+    assert set(breakdown) == {"sql_ms", "rows", "total_ms"}
+    assert breakdown["rows"] == 0
+
+
+def test_profiled_search_reports_each_stage(controller):
+    payload = controller.handle_search("salsa", profile=True, event_type="Party")
+    breakdown = payload["profile"]
+    assert breakdown["rows"] == 2
+    for stage in ("plan_ms", "sql_ms", "hydration_ms", "rank_ms", "format_ms"):
+        assert breakdown[stage] >= 0
+    assert breakdown["total_ms"] >= breakdown["sql_ms"] + breakdown["rank_ms"]
+    # Planner statistics and the fuzzy-fallback trigram index are built once, then reused.
+    assert (breakdown["cache_hits"], breakdown["cache_misses"]) == (0, 2)
+    assert controller.handle_search("salsa", profile=True, event_type="Party")["profile"]["cache_hits"] == 2
+
+
+def test_unprofiled_search_has_no_breakdown(controller):
+    payload = controller.handle_search("salsa")
+    assert "profile" not in payload
+    assert len(payload["cards"]) == 2
@@ -0,0 +1,86 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.recommendation.similar import EventFeaturizer, NeighbourIndex, similar_index_for
+from .conftest import build_event
+
+NOW = datetime.datetime.now().replace(hour=20, minute=0, second=0, microsecond=0)
+
+
+def make_event(event_id, style, price="mid", lat=47.56, lon=7.59, days_ahead=3, event_type="Party"):
+    return build_event(
+        id=event_id,
+        event_name=f"{style} {event_id}",
+        start_datetime=NOW + datetime.timedelta(days=days_ahead),
+        event_type=event_type,
+        dance_style=[style],
+        price_category=price,
+        age_group_label="Adults",
+        region="Basel (CH)",
+        region_standardized="Basel (CH)",
+        latitude=lat,
+        longitude=lon,
+    )
+
+
+EVENTS = [
+    make_event("salsa1", "Salsa"),
+    make_event("salsa2", "Salsa", days_ahead=10),
+    make_event("salsa_far", "Salsa", lat=48.0, lon=7.85),
+    make_event("tango", "Tango", price="high", event_type="Workshop"),
+    make_event("swing", "Swing", price="low"),
+    make_event("salsa_past", "Salsa", days_ahead=-3),
+]
+
+
+def test_featurizer_dot_product_is_weighted_similarity():
+    vectors = EventFeaturizer().transform(EVENTS)
+    assert vectors.dtype == np.float32
+    assert float(vectors[0] @ vectors[0]) == pytest.approx(1.0, abs=1e-5)
+    same_place = float(vectors[0] @ vectors[1])
+    assert same_place > float(vectors[0] @ vectors[2]) > float(vectors[0] @ vectors[3])
+
+
+def test_neighbours_exclude_self_and_past_events():
+    index = NeighbourIndex.build(EVENTS)
+    neighbours = [n for n, _ in index.similar("salsa1")]
+    assert neighbours[0] == "salsa2"
+    assert "salsa1" not in neighbours and "salsa_past" not in neighbours
+    # Past events still get look-alikes, just not as candidates.
+    assert index.similar("salsa_past", limit=1)[0][0] in {"salsa1", "salsa2"}
+    assert index.similar("missing") is None
+
+
+def test_chunking_does_not_change_results():
+    events = [make_event(str(i), ["Salsa", "Tango", "Swing"][i % 3], lat=47.5 + i / 100, days_ahead=i % 20 - 5) for i in range(60)]
+    whole = NeighbourIndex.build(events, top_n=5)
+    chunked = NeighbourIndex.build(events, top_n=5, memory_budget_bytes=1)
+    assert whole.neighbours == chunked.neighbours
+
+
+def test_upsert_matches_full_rebuild():
+    events = [make_event(str(i), ["Salsa", "Tango", "Swing"][i % 3], lat=47.5 + i / 100) for i in range(30)]
+    index = NeighbourIndex.build(events, top_n=4)
+    changed = [
+        make_event("3", "Tango", price="high", lat=47.9),
+        make_event("new", "Salsa", lat=47.52),
+        make_event("7", "Swing", days_ahead=-2),
+    ]
+    index.upsert(changed)
+    by_id = {e.id: e for e in events + changed}
+    rebuilt = NeighbourIndex.build(by_id.values(), top_n=4)
+    for event_id in by_id:
+        assert [n for n, _ in index.similar(event_id)] == [n for n, _ in rebuilt.similar(event_id)]
+
+
+def test_catalog_index_is_patched_on_import(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'similar.db'}")
+    repo.upsert(EVENTS)
+    index = similar_index_for(repo)
+    assert index.similar("tango", limit=2)
+    repo.upsert([make_event("tango2", "Tango", price="high", event_type="Workshop")])
+    assert similar_index_for(repo) is index
+    assert index.similar("tango", limit=1)[0][0] == "tango2"
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.common.telemetry import Telemetry
+from befriends.domain.search_models import SearchQuery
+from befriends.search.service import SearchService
+from befriends.search.singleflight import SingleFlight
+
+
+class SlowRepository:
+    """search_text blocks until released so callers pile up behind the leader."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def search_text(self, text, filters=None, profile=None):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return ["event"]
+
+
+def make_query(text="Salsa"):
+    return SearchQuery(text=text, start_datetime_from=None, start_datetime_to=None, region="Basel (CH)")
+
+
+@pytest.fixture
+def service():
+    policy = MagicMock()
+    policy.rank.side_effect = lambda events, query: list(events)
+    return SearchService(SlowRepository(), policy, Telemetry())
+
+
+def wait_for_followers(flight, count):
+    deadline = time.time() + 5
+    while flight.stats()["coalesced"] < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_concurrent_threads_share_one_search(service):
+    results = []
+    threads = [
+        threading.Thread(target=lambda t=t: results.append(service.find_events(make_query(t))))
+        for t in ["Salsa", "salsa", "SALSA", "Salsa"]
+    ]
+    for t in threads:
+        t.start()
+    wait_for_followers(service.flight, 3)
+    service.repository.release.set()
+    for t in threads:
+        t.join()
+    assert service.repository.calls == 1
+    assert all(r is results[0] for r in results)
+    stats = service.flight.stats()
+    assert stats == {"leaders": 1, "coalesced": 3, "suppression_rate": 0.75}
+
+
+def test_different_queries_are_not_coalesced(service):
+    service.repository.release.set()
+    service.find_events(make_query("salsa"))
+    service.find_events(make_query("tango"))
+    service.find_events(make_query("salsa"))
+    assert service.repository.calls == 3
+    assert service.flight.stats()["coalesced"] == 0
+
+
+def test_async_callers_share_one_search(service):
+    async def scenario():
+        tasks = [asyncio.create_task(service.find_events_async(make_query())) for _ in range(5)]
+        await asyncio.to_thread(wait_for_followers, service.flight, 4)
+        service.repository.release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    assert service.repository.calls == 1
+    assert len({id(r) for r in results}) == 1
+
+
+def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight(Telemetry(), name="boom")
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        wait_for_followers(flight, 1)
+        raise ValueError("db down")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(timeout=5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert flight.telemetry.counters() == {"boom.leader": 1, "boom.coalesced": 1}
+
+
+def test_key_folds_case_like_the_repository(tmp_path, make_event):
+    import datetime
+
+    from befriends.catalog.repository import CatalogRepository
+
+    assert SearchService.canonical_key(make_query("ZÜRICH")) == SearchService.canonical_key(make_query("zürich"))
+    # No fuzzy fallback, so only the SQL match counts
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'fold.db'}", fuzzy_min_results=0)
+    tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+    repo.upsert([make_event(id="z", event_name="Zürich Salsa Night", start_datetime=tomorrow)])
+    # Both spellings share one coalesced search, so both must match in SQL too
+    assert [e.id for e in repo.search_text("ZÜRICH")] == [e.id for e in repo.search_text("zürich")] == ["z"]
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.search.suggest import PrefixIndex, suggest_index_for
+from .conftest import build_event
+
+
+def make_event(event_id, name, organizer, location, dance_style=None, days_ahead=2):
+    return build_event(
+        id=event_id,
+        event_name=name,
+        start_datetime=datetime.datetime.now() + datetime.timedelta(days=days_ahead),
+        dance_style=dance_style,
+        event_location=location,
+        region="Basel (CH)",
+        region_standardized="Basel (CH)",
+        organizer=organizer,
+    )
+
+
+def test_suggest_orders_by_weight_and_matches_word_starts():
+    index = PrefixIndex.build([
+        ("Salsa Night", "event", 3),
+        ("Salsa", "dance_style", 10),
+        ("Salon Lörrach", "venue", 1),
+        ("Museumsnacht Basel", "event", 5),
+    ])
+    assert [s["text"] for s in index.suggest("sal")] == ["Salsa", "Salsa Night", "Salon Lörrach"]
+    assert [s["text"] for s in index.suggest("lorr")] == ["Salon Lörrach"]
+    assert [s["text"] for s in index.suggest("Bas")] == ["Museumsnacht Basel"]
+    assert index.suggest("xyz") == []
+
+
+def test_dense_prefixes_use_precomputed_completions():
+    terms = [(f"Tango {i}", "event", i) for i in range(200)]
+    index = PrefixIndex.build(terms, top_k=5, dense_threshold=16)
+    assert "t" in index._dense
+    assert [s["weight"] for s in index.suggest("t", limit=3)] == [199, 198, 197]
+    assert [s["text"] for s in index.suggest("tango 19", limit=2)] == ["Tango 199", "Tango 198"]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'suggest.db'}")
+    repo.upsert([
+        make_event("1", "Salsa Social", "Salsa Basel", "Kaserne", ["Salsa"]),
+        make_event("2", "Salsa Practica", "Salsa Basel", "Volkshaus", ["Salsa", "Bachata"]),
+        make_event("3", "Old Salsa", "Salsa Basel", "Kaserne", ["Salsa"], days_ahead=-10),
+    ])
+    return repo
+
+
+def test_index_weights_count_upcoming_events(repo):
+    index = suggest_index_for(repo)
+    by_text = {s["text"]: s for s in index.suggest("sal", limit=10)}
+    assert by_text["Salsa Basel"]["weight"] == 2
+    assert by_text["Salsa"] == {"text": "Salsa", "kind": "dance_style", "weight": 2}
+    assert "Old Salsa" not in by_text
+
+
+def test_index_rebuilds_on_generation_change(repo):
+    first = suggest_index_for(repo)
+    assert suggest_index_for(repo) is first
+    repo.upsert([make_event("4", "Bachata Fever", "Latin Lörrach", "Burghof")])
+    assert suggest_index_for(repo) is not first
+    assert suggest_index_for(repo).suggest("bachata f")[0]["text"] == "Bachata Fever"
@@ -0,0 +1,147 @@
+import datetime
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.chatbot_client import FALLBACK_REPLY, ChatbotClient, ChatbotConfig
+from befriends.common.config import AppConfig
+from befriends.domain.filters import EventFilter
+from befriends.llm.tools import EventTools
+from befriends.recommendation.context import RetrievalContext
+from befriends.response.event_context import events_to_context
+from components.chatbot_service import ChatbotService
+from .conftest import build_event
+
+TODAY = datetime.date.today()
+
+
+def make_event(event_id, region, days_ahead, event_type="Party", description=None):
+    start = datetime.datetime.combine(TODAY + datetime.timedelta(days=days_ahead), datetime.time(20, 0))
+    return build_event(
+        id=event_id,
+        event_name=f"Event {event_id}",
+        start_datetime=start,
+        event_type=event_type,
+        dance_style=[],
+        price_min=10.0,
+        price_max=10.0,
+        currency="CHF",
+        event_location="Kaserne",
+        region=region,
+        region_standardized=region,
+        organizer="Org",
+        description=description,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = CatalogRepository(f"sqlite:///{tmp_path / 'tools.db'}")
+    repo.upsert([
+        make_event("b1", "Basel (CH)", 1, description="Salsa " * 200),
+        make_event("b2", "Basel (CH)", 2, event_type="Concert"),
+        make_event("l1", "Lörrach (DE)", 3),
+    ])
+    return repo
+
+
+def completion(content=None, tool_calls=None):
+    response = MagicMock(status_code=200)
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    response.json.return_value = {"choices": [{"message": message}]}
+    return response
+
+
+def tool_call(name, call_id="call_1", **arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def make_client(transport):
+    app_config = AppConfig(
+        db_url="sqlite://", openai_api_key="sk-test", openai_api_endpoint="https://mock.endpoint",
+        sources=[], features={},
+    )
+    return ChatbotClient(ChatbotConfig(app_config), transport=transport)
+
+
+def test_tool_calls_run_locally_and_results_go_back():
+    transport = MagicMock()
+    transport.post.side_effect = [
+        completion(tool_calls=[tool_call("search_events", query="jazz")]),
+        completion("Try the jazz night!"),
+    ]
+    tools = MagicMock()
+    tools.definitions.return_value = [{"type": "function", "function": {"name": "search_events"}}]
+    tools.call.return_value = "id|name\nj1|Jazz Night"
+    client = make_client(transport)
+    messages = [{"role": "user", "content": "Any jazz?"}]
+    assert client.complete_with_tools("u", messages, tools) == "Try the jazz night!"
+    tools.call.assert_called_once_with("search_events", json.dumps({"query": "jazz"}))
+    second = transport.post.call_args_list[1].kwargs["json"]
+    assert second["tools"] == tools.definitions.return_value
+    assert second["messages"][-2]["tool_calls"][0]["id"] == "call_1"
+    assert second["messages"][-1] == {"role": "tool", "tool_call_id": "call_1", "content": "id|name\nj1|Jazz Night"}
+    loop = client.telemetry.recent_events("llm.tool_loop")[-1]
+    assert (loop["rounds"], loop["tool_calls"]) == (2, 1)
+    # The caller's history is left alone
+    assert messages == [{"role": "user", "content": "Any jazz?"}]
+
+
+def test_round_trips_are_bounded():
+    transport = MagicMock()
+    transport.post.return_value = completion(tool_calls=[tool_call("search_events")])
+    tools = MagicMock()
+    tools.definitions.return_value = []
+    tools.call.return_value = "no events found"
+    client = make_client(transport)
+    assert client.complete_with_tools("u", [{"role": "user", "content": "?"}], tools, max_rounds=2) == FALLBACK_REPLY
+    choices = [call.kwargs["json"]["tool_choice"] for call in transport.post.call_args_list]
+    assert choices == ["auto", "auto", "none"]
+    assert tools.call.call_count == 2
+
+
+def test_tools_answer_from_the_catalog(repo):
+    tools = EventTools(RetrievalContext(repo), today=TODAY)
+    table = tools.search_events(region="Basel (CH)")
+    assert [line.split("|")[0] for line in table.split("\n")[1:]] == ["b1", "b2"]
+    assert "Concert" in tools.search_events(region="Basel (CH)", event_type="Concert")
+    details = tools.get_event("b1")
+    assert details.startswith("id|name") and "\ndescription: Salsa" in details
+    assert len(details.split("description: ")[1]) <= 502
+    assert [e.id for e in tools.returned] == ["b1", "b2"]
+
+
+def test_bad_tool_calls_are_reported_to_the_model(repo):
+    tools = EventTools(RetrievalContext(repo), today=TODAY)
+    assert tools.call("drop_tables", "{}").startswith("error: unknown tool")
+    assert tools.call("get_event", "not json").startswith("error:")
+    assert tools.call("get_event", json.dumps({"event_id": "nope"})) == "error: no event with id 'nope'"
+    assert tools.call("search_events", json.dumps({"date_from": "someday"})).startswith("error:")
+    assert tools.call("search_events", json.dumps({"region": "Nowhere"})) == "no events found"
+
+
+def test_tool_mode_keeps_events_out_of_the_prompt(repo):
+    client = MagicMock()
+    context = RetrievalContext(repo)
+
+    def answer(user_id, messages, tools):
+        tools.call("search_events", "{}")
+        return "Two parties in Basel!"
+
+    client.complete_with_tools.side_effect = answer
+    service = ChatbotService(client, {}, use_tools=True)
+    response = service.get_response(
+        "Any events in Basel?", [{"role": "user", "content": "Any events in Basel?"}], EventFilter(region="Basel (CH)"),
+        "event_query", datetime.datetime.combine(TODAY, datetime.time(9)), repo, context.recommender,
+        events_to_context, lambda profile: "", context=context,
+    )
+    assert response == "Two parties in Basel!"
+    prompt = client.complete_with_tools.call_args.kwargs["messages"][0]["content"]
+    assert "Event b1" not in prompt and "region=Basel (CH)" in prompt
+    client.get_response.assert_not_called()
+    # The panel shows what the model was given
+    assert [e.id for e in context.shared_events] == ["b1", "b2"]
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from befriends.catalog.repository import CatalogRepository
+from befriends.search.trigram import TrigramIndex, bounded_levenshtein, fold_text
+from .conftest import build_event
+
+
+def make_event(event_id, name, organizer=None, location=None, region="Basel (CH)", days_ahead=3):
+    start = datetime.datetime.now() + datetime.timedelta(days=days_ahead)
+    return build_event(
+        id=event_id,
+        event_name=name,
+        start_datetime=start,
+        event_type="Party",
+        dance_style=["Swing"],
+        event_location=location,
+        region=region,
+        region_standardized=region,
+        organizer=organizer,
+    )
+
+
+def test_fold_text_strips_umlauts_and_punctuation():
+    assert fold_text("Lörrach – Fasnacht!") == "lorrach   fasnacht "
+    assert fold_text("Straße") == "strasse"
+
+
+def test_bounded_levenshtein_gives_up_early():
+    assert bounded_levenshtein("basl", "basel", 2) == 1
+    assert bounded_levenshtein("jitterbug", "museum", 2) == 3
+
+
+def test_index_finds_typos_and_missing_umlauts():
+    index = TrigramIndex.build([
+        ("1", "Jitterbug Night", "Swing Basel", "Kaserne Basel"),
+        ("2", "Museumsnacht Basel", "Museen Basel", None),
+        ("3", "Bloodere Clique Fasnachtsumzug", "Bloodere Clique", "Innenstadt Lörrach"),
+    ])
+    assert index.search("jitterbug basl")[0][0] == "1"
+    assert index.search("musemsnacht")[0][0] == "2"
+    assert index.search("lorrach umzug")[0][0] == "3"
+    assert index.search("completely unrelated") == []
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return CatalogRepository(f"sqlite:///{tmp_path / 'trigram.db'}")
+
+
+def test_search_text_falls_back_to_fuzzy_matches(repo):
+    repo.upsert([
+        make_event("jb", "Jitterbug Night", organizer="Swing Basel", location="Kaserne Basel"),
+        make_event("mn", "Museumsnacht Basel", organizer="Museen Basel"),
+    ])
+    assert [e.id for e in repo.search_text("jitterbug basl")] == ["jb"]
+    assert [e.id for e in repo.search_text("musemsnacht")] == ["mn"]
+
+
+def test_fuzzy_fallback_respects_filters_and_generation(repo):
+    repo.upsert([make_event("jb", "Jitterbug Night", region="Basel (CH)")])
+    assert repo.search_text("jiterbug", {"region_standardized": "Lörrach (DE)"}) == []
+    generation = repo.generation()
+    repo.upsert([make_event("jb2", "Jitterbug Matinee", region="Lörrach (DE)")])
+    assert repo.generation() != generation
+    results = repo.search_text("jiterbug", {"region_standardized": "Lörrach (DE)"})
+    assert [e.id for e in results] == ["jb2"]